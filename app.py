@@ -4,19 +4,17 @@ import os
 import time
 import urllib.parse
 from datetime import datetime, timedelta, timezone
+from functools import partial
 from threading import Thread
 
 import flask_table.columns
 import flask_table.table
-import psycopg2
 from dotenv import load_dotenv
 from flask import (Flask, g, jsonify, redirect, render_template, request,
                    send_from_directory, session, url_for)
 from flask_restx import Api
 from hockey_blast_common_lib.db_connection import get_db_params
-from hockey_blast_common_lib.models import (Division, Game, Human, HumanAlias,
-                                            Level, Location, Organization, RequestLog,
-                                            Team, db)
+from hockey_blast_common_lib.models import Game, Human, Organization, db
 from hockey_blast_common_lib.stats_models import (OrgStatsDailyGoalie,
                                                   OrgStatsDailyHuman,
                                                   OrgStatsDailyReferee,
@@ -27,12 +25,24 @@ from hockey_blast_common_lib.stats_models import (OrgStatsDailyGoalie,
                                                   OrgStatsWeeklyReferee,
                                                   OrgStatsWeeklySkater)
 from hockey_blast_common_lib.stats_utils import ALL_ORGS_ID
-from hockey_blast_common_lib.utils import get_non_human_ids
 from markupsafe import Markup
 
 from flask_session import Session
-from options import MAX_HUMAN_SEARCH_RESULTS, MAX_TEAM_SEARCH_RESULTS
-from game_utils import is_game_live, parse_live_time
+from options import MAX_HUMAN_SEARCH_RESULTS, MAX_TEAM_SEARCH_RESULTS, REQUEST_THREADS
+from non_human_registry import non_human_registry
+from chart_artifacts import chart_artifacts
+from compression import compression
+from conditional_get import conditional
+from fragment_cache import MISS, fragment_cache, plain_rows
+from highlight_status import highlight_status
+from human_profile_data import profile_snapshot_cache
+from live_scores import live_scores
+from name_search import name_search
+from query_fanout import FANOUT_WORKERS, fan_out
+from reference_data import reference_data
+from request_log_rollup import ensure_rollup_table
+from request_log_writer import RequestLogWriter
+from video_cache import highlight_videos
 
 # Debug: Print the DB_HOST environment variable
 flask_table.table.Markup = Markup
@@ -60,6 +70,7 @@ from blueprints.games import games_bp
 from blueprints.location import location_bp
 from blueprints.goalie_performance import goalie_performance_bp
 from blueprints.hall_of_fame import hall_of_fame_bp
+from blueprints.live_scores import live_scores_bp
 from blueprints.human_stats import human_stats_bp
 from blueprints.penalties import penalties_bp
 from blueprints.playoffs import playoffs_bp
@@ -70,6 +81,7 @@ from blueprints.request_logs import request_logs_bp
 from blueprints.scorekeeper_performance import scorekeeper_performance_bp
 from blueprints.scorekeeper_quality import scorekeeper_quality_bp
 from blueprints.search_teams import search_teams_bp
+from blueprints.search_suggest import search_suggest_bp
 from blueprints.seasons import seasons_bp
 from blueprints.skater_performance import skater_performance_bp
 from blueprints.skater_to_skater import skater_to_skater_bp  # Add this import
@@ -84,6 +96,12 @@ from blueprints.chat_proxy import chat_proxy_bp
 from blueprints.auth_proxy import auth_proxy_bp
 from blueprints.video_proxy import video_proxy_bp
 
+# Database connections a worker may hold at once: one per request thread, one
+# per fan-out thread, and the background threads (reference data, non-human
+# registry, name search, live scores poller, request log writer, chart builds,
+# fragment refreshes, with room for one more).  4 workers x 22 stays under
+# Postgres' default 100.
+BACKGROUND_DB_THREADS = 8
 
 
 
@@ -120,6 +138,10 @@ def _create_app(db_name):
     db_url = f"postgresql://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['dbname']}"
     app.config["SQLALCHEMY_DATABASE_URI"] = db_url
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_size": REQUEST_THREADS + FANOUT_WORKERS,
+        "max_overflow": BACKGROUND_DB_THREADS,
+    }
     app.config["BACKGROUND_IMAGE"] = "default_background.jpg"
     app.config["ORG_NAME"] = "Hockey Blast"
     app.config["DEBUG"] = debug_mode
@@ -170,9 +192,17 @@ def _create_app(db_name):
 
     db.init_app(app)
 
-    # Load non-human IDs once for filtering (static data, loaded at startup)
-    with app.app_context():
-        non_human_ids = frozenset(get_non_human_ids(db.session))
+    # Request logs are written in batches by a background thread, which also
+    # maintains the pre-aggregated rollups behind the /request_logs dashboard
+    ensure_rollup_table(app)
+    request_log_writer = RequestLogWriter(app)
+    reference_data.init_app(app)
+
+    non_human_registry.init_app(app)
+    name_search.init_app(app)
+    conditional.init_app(app)
+    compression.init_app(app)
+    live_scores.init_app(app)
 
     # Register blueprints
     app.register_blueprint(teams_per_season_bp)
@@ -184,6 +214,7 @@ def _create_app(db_name):
     app.register_blueprint(day_of_week_bp)
     app.register_blueprint(time_of_games_bp)
     app.register_blueprint(search_teams_bp)
+    app.register_blueprint(search_suggest_bp)
     app.register_blueprint(team_stats_bp)
     app.register_blueprint(game_card_bp)
     app.register_blueprint(game_shootout_bp)
@@ -192,6 +223,7 @@ def _create_app(db_name):
     app.register_blueprint(chat_proxy_bp)
     app.register_blueprint(auth_proxy_bp)
     app.register_blueprint(video_proxy_bp)
+    app.register_blueprint(live_scores_bp)
     app.register_blueprint(games_bp, url_prefix="/games")
     app.register_blueprint(location_bp, url_prefix="/location")
     app.register_blueprint(dropdowns_bp, url_prefix="/dropdowns")
@@ -260,28 +292,205 @@ def _create_app(db_name):
         if getattr(g, "skip_logging", True):
             return response
 
-        # Log the request with response time
-        try:
-            log_entry = RequestLog(
-                user_agent=g.user_agent,
-                client_ip=g.client_ip,
-                path=g.path,
-                timestamp=g.timestamp,
-                cgi_params=g.cgi_params,
-                response_time_ms=response_time_ms,
+        # Hand the row to the background writer; it is inserted in a batch later
+        request_log_writer.submit(
+            {
+                "user_agent": g.user_agent,
+                "client_ip": g.client_ip,
+                "path": g.path,
+                "timestamp": g.timestamp,
+                "cgi_params": g.cgi_params,
+                "response_time_ms": response_time_ms,
+            }
+        )
+
+        return response
+
+    def leaderboard(stats_model, condition, *order_by, top_n):
+        """Top rows of an OrgStats* table with their human and organization."""
+        return plain_rows(
+            non_human_registry.top_rows(
+                db.session.query(stats_model, Human, Organization)
+                .join(Human, stats_model.human_id == Human.id)
+                .join(Organization, stats_model.org_id == Organization.id)
+                .filter(condition, stats_model.org_id != ALL_ORGS_ID)
+                .order_by(*order_by),
+                top_n,
             )
-            db.session.add(log_entry)
-            db.session.commit()
-        except psycopg2.errors.InsufficientPrivilege as e:
-            db.session.rollback()
-            logger.error(
-                f"Failed to log request: {e}. User '{db_params['user']}' does not have permission to access the table."
+        )
+
+    def fetch_current_point_streak_skaters(top_n):
+        # Top current point streaks (all-time stats) - only if last game within 1 month
+        one_month_ago = datetime.now() - timedelta(days=30)
+        return plain_rows(
+            non_human_registry.top_rows(
+                db.session.query(OrgStatsSkater, Human, Organization)
+                .join(Human, OrgStatsSkater.human_id == Human.id)
+                .join(Organization, OrgStatsSkater.org_id == Organization.id)
+                .join(Game, OrgStatsSkater.last_game_id == Game.id)
+                .filter(
+                    OrgStatsSkater.current_point_streak > 0,
+                    OrgStatsSkater.org_id != ALL_ORGS_ID,
+                    Game.date >= one_month_ago,
+                )
+                .order_by(
+                    OrgStatsSkater.current_point_streak.desc(),
+                    OrgStatsSkater.current_point_streak_avg_points.desc(),
+                ),
+                top_n,
             )
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Failed to log request: {e}")
+        )
 
-        return response
+    def fetch_latest_completed_games():
+        # Latest completed game per organization
+        latest_completed_games = []
+        organizations = (
+            db.session.query(Organization)
+            .filter(Organization.id != ALL_ORGS_ID)
+            .all()
+        )
+        day_of_week_map = {
+            1: "Mon",
+            2: "Tue",
+            3: "Wed",
+            4: "Thu",
+            5: "Fri",
+            6: "Sat",
+            7: "Sun",
+        }
+
+        for org in organizations:
+            latest_game = (
+                db.session.query(Game)
+                .filter(Game.org_id == org.id, Game.status.startswith("Final"))
+                .order_by(Game.date.desc(), Game.time.desc())
+                .first()
+            )
+
+            if latest_game:
+                day_of_week = day_of_week_map.get(latest_game.day_of_week, "")
+                date_time_str = f"{day_of_week} {latest_game.date.strftime('%m/%d/%y')} {latest_game.time.strftime('%I:%M%p')}"
+                latest_completed_games.append(
+                    {
+                        "org_name": org.organization_name,
+                        "game_id": latest_game.id,
+                        "date_time": date_time_str,
+                    }
+                )
+        return latest_completed_games
+
+    def index_sections(top_n):
+        """Query functions for the independent sections of the index page."""
+        return {
+            # Latest scheduled and played games
+            "last_scheduled": lambda: (
+                db.session.query(Game)
+                .order_by(Game.date.desc(), Game.time.desc())
+                .first()
+            ),
+            "last_played": lambda: (
+                db.session.query(Game)
+                .filter(Game.status.startswith("Final"))
+                .order_by(Game.date.desc(), Game.time.desc())
+                .first()
+            ),
+            # Top performers for the last day
+            "daily_skater_points": lambda: leaderboard(
+                OrgStatsDailySkater,
+                OrgStatsDailySkater.points > 0,
+                OrgStatsDailySkater.points.desc(),
+                top_n=top_n,
+            ),
+            "daily_goalie_games_played": lambda: leaderboard(
+                OrgStatsDailyGoalie,
+                OrgStatsDailyGoalie.games_participated > 0,
+                OrgStatsDailyGoalie.games_participated.desc(),
+                OrgStatsDailyGoalie.save_percentage.desc(),
+                top_n=top_n,
+            ),
+            "daily_referee_games_reffed": lambda: leaderboard(
+                OrgStatsDailyReferee,
+                OrgStatsDailyReferee.games_participated > 0,
+                OrgStatsDailyReferee.games_participated.desc(),
+                (
+                    OrgStatsDailyReferee.gm_given
+                    + OrgStatsDailyReferee.penalties_given
+                ).desc(),
+                top_n=top_n,
+            ),
+            "daily_scorekeeper_games": lambda: leaderboard(
+                OrgStatsDailyHuman,
+                OrgStatsDailyHuman.games_scorekeeper > 0,
+                OrgStatsDailyHuman.games_scorekeeper.desc(),
+                top_n=top_n,
+            ),
+            # Top performers for the last week
+            "weekly_skater_points": lambda: leaderboard(
+                OrgStatsWeeklySkater,
+                OrgStatsWeeklySkater.points > 0,
+                OrgStatsWeeklySkater.points.desc(),
+                top_n=top_n,
+            ),
+            "weekly_goalie_games_played": lambda: leaderboard(
+                OrgStatsWeeklyGoalie,
+                OrgStatsWeeklyGoalie.games_participated > 0,
+                OrgStatsWeeklyGoalie.games_participated.desc(),
+                OrgStatsWeeklyGoalie.save_percentage.desc(),
+                top_n=top_n,
+            ),
+            "weekly_referee_games_reffed": lambda: leaderboard(
+                OrgStatsWeeklyReferee,
+                OrgStatsWeeklyReferee.games_participated > 0,
+                OrgStatsWeeklyReferee.games_participated.desc(),
+                (
+                    OrgStatsWeeklyReferee.gm_given
+                    + OrgStatsWeeklyReferee.penalties_given
+                ).desc(),
+                top_n=top_n,
+            ),
+            "weekly_scorekeeper_games": lambda: leaderboard(
+                OrgStatsWeeklyHuman,
+                OrgStatsWeeklyHuman.games_scorekeeper > 0,
+                OrgStatsWeeklyHuman.games_scorekeeper.desc(),
+                top_n=top_n,
+            ),
+            "live_games": live_scores.games,
+            "current_point_streak_skaters": lambda: fetch_current_point_streak_skaters(
+                top_n
+            ),
+            "latest_completed_games": fetch_latest_completed_games,
+        }
+
+    # A failed or timed out section is rendered empty rather than failing the page
+    INDEX_SECTION_DEFAULTS = {
+        name: None if name in ("last_scheduled", "last_played") else []
+        for name in index_sections(0)
+    }
+
+    # Leaderboards only change when the stats aggregation runs, so they are
+    # served from the fragment cache (bounded top_n keeps the key space small)
+    INDEX_CACHED_SECTIONS = [
+        name
+        for name in INDEX_SECTION_DEFAULTS
+        if name.startswith(("daily_", "weekly_", "current_point_streak"))
+    ]
+    INDEX_CACHE_MAX_TOP_N = 100
+
+    def fetch_index_sections(top_n):
+        """All index sections, leaderboards from the cache and the rest fanned out."""
+        tasks = index_sections(top_n)
+        sections = {}
+        if top_n <= INDEX_CACHE_MAX_TOP_N:
+            for name in INDEX_CACHED_SECTIONS:
+                key = f"index:{name}:{top_n}"
+                value = fragment_cache.cached(key, tasks[name])
+                if value is MISS:
+                    tasks[name] = partial(fragment_cache.compute, key, tasks[name])
+                else:
+                    sections[name] = value
+                    del tasks[name]
+        sections.update(fan_out(tasks, defaults=INDEX_SECTION_DEFAULTS))
+        return sections
 
     @app.route("/", methods=["GET", "POST"])
     def index():
@@ -300,18 +509,21 @@ def _create_app(db_name):
 
             auth_data = None  # Auth handled client-side via Auth0
 
-            # Fetch the latest date and time
-            last_scheduled = (
-                db.session.query(Game)
-                .order_by(Game.date.desc(), Game.time.desc())
-                .first()
-            )
-            last_played = (
-                db.session.query(Game)
-                .filter(Game.status.startswith("Final"))
-                .order_by(Game.date.desc(), Game.time.desc())
-                .first()
-            )
+            # The page sections are independent, so their queries run concurrently
+            sections = fetch_index_sections(top_n)
+            last_scheduled = sections["last_scheduled"]
+            last_played = sections["last_played"]
+            daily_skater_points = sections["daily_skater_points"]
+            daily_goalie_games_played = sections["daily_goalie_games_played"]
+            daily_referee_games_reffed = sections["daily_referee_games_reffed"]
+            daily_scorekeeper_games = sections["daily_scorekeeper_games"]
+            weekly_skater_points = sections["weekly_skater_points"]
+            weekly_goalie_games_played = sections["weekly_goalie_games_played"]
+            weekly_referee_games_reffed = sections["weekly_referee_games_reffed"]
+            weekly_scorekeeper_games = sections["weekly_scorekeeper_games"]
+            live_games_data = sections["live_games"]
+            current_point_streak_skaters = sections["current_point_streak_skaters"]
+            latest_completed_games = sections["latest_completed_games"]
 
             # Format the time as HH:MM AM/PM
             last_scheduled_time = (
@@ -321,263 +533,12 @@ def _create_app(db_name):
                 last_played.time.strftime("%I:%M%p") if last_played else None
             )
 
-            # Fetch top performers for the last day
-            daily_skater_points = (
-                db.session.query(OrgStatsDailySkater, Human, Organization)
-                .join(Human, OrgStatsDailySkater.human_id == Human.id)
-                .join(Organization, OrgStatsDailySkater.org_id == Organization.id)
-                .filter(
-                    OrgStatsDailySkater.points > 0,
-                    ~OrgStatsDailySkater.human_id.in_(non_human_ids),
-                    OrgStatsDailySkater.org_id != ALL_ORGS_ID,
-                )
-                .order_by(OrgStatsDailySkater.points.desc())
-                .limit(top_n)
-                .all()
-            )
-            daily_goalie_games_played = (
-                db.session.query(OrgStatsDailyGoalie, Human, Organization)
-                .join(Human, OrgStatsDailyGoalie.human_id == Human.id)
-                .join(Organization, OrgStatsDailyGoalie.org_id == Organization.id)
-                .filter(
-                    OrgStatsDailyGoalie.games_participated > 0,
-                    ~OrgStatsDailyGoalie.human_id.in_(non_human_ids),
-                    OrgStatsDailyGoalie.org_id != ALL_ORGS_ID,
-                )
-                .order_by(
-                    OrgStatsDailyGoalie.games_participated.desc(),
-                    OrgStatsDailyGoalie.save_percentage.desc(),
-                )
-                .limit(top_n)
-                .all()
-            )
-            daily_referee_games_reffed = (
-                db.session.query(OrgStatsDailyReferee, Human, Organization)
-                .join(Human, OrgStatsDailyReferee.human_id == Human.id)
-                .join(Organization, OrgStatsDailyReferee.org_id == Organization.id)
-                .filter(
-                    OrgStatsDailyReferee.games_participated > 0,
-                    ~OrgStatsDailyReferee.human_id.in_(non_human_ids),
-                    OrgStatsDailyReferee.org_id != ALL_ORGS_ID,
-                )
-                .order_by(
-                    OrgStatsDailyReferee.games_participated.desc(),
-                    (
-                        OrgStatsDailyReferee.gm_given
-                        + OrgStatsDailyReferee.penalties_given
-                    ).desc(),
-                )
-                .limit(top_n)
-                .all()
-            )
-            daily_scorekeeper_games = (
-                db.session.query(OrgStatsDailyHuman, Human, Organization)
-                .join(Human, OrgStatsDailyHuman.human_id == Human.id)
-                .join(Organization, OrgStatsDailyHuman.org_id == Organization.id)
-                .filter(
-                    OrgStatsDailyHuman.games_scorekeeper > 0,
-                    ~OrgStatsDailyHuman.human_id.in_(non_human_ids),
-                    OrgStatsDailyHuman.org_id != ALL_ORGS_ID,
-                )
-                .order_by(OrgStatsDailyHuman.games_scorekeeper.desc())
-                .limit(top_n)
-                .all()
-            )
-
-            # Fetch top performers for the last week
-            weekly_skater_points = (
-                db.session.query(OrgStatsWeeklySkater, Human, Organization)
-                .join(Human, OrgStatsWeeklySkater.human_id == Human.id)
-                .join(Organization, OrgStatsWeeklySkater.org_id == Organization.id)
-                .filter(
-                    OrgStatsWeeklySkater.points > 0,
-                    ~OrgStatsWeeklySkater.human_id.in_(non_human_ids),
-                    OrgStatsWeeklySkater.org_id != ALL_ORGS_ID,
-                )
-                .order_by(OrgStatsWeeklySkater.points.desc())
-                .limit(top_n)
-                .all()
-            )
-            weekly_goalie_games_played = (
-                db.session.query(OrgStatsWeeklyGoalie, Human, Organization)
-                .join(Human, OrgStatsWeeklyGoalie.human_id == Human.id)
-                .join(Organization, OrgStatsWeeklyGoalie.org_id == Organization.id)
-                .filter(
-                    OrgStatsWeeklyGoalie.games_participated > 0,
-                    ~OrgStatsWeeklyGoalie.human_id.in_(non_human_ids),
-                    OrgStatsWeeklyGoalie.org_id != ALL_ORGS_ID,
-                )
-                .order_by(
-                    OrgStatsWeeklyGoalie.games_participated.desc(),
-                    OrgStatsWeeklyGoalie.save_percentage.desc(),
-                )
-                .limit(top_n)
-                .all()
-            )
-            weekly_referee_games_reffed = (
-                db.session.query(OrgStatsWeeklyReferee, Human, Organization)
-                .join(Human, OrgStatsWeeklyReferee.human_id == Human.id)
-                .join(Organization, OrgStatsWeeklyReferee.org_id == Organization.id)
-                .filter(
-                    OrgStatsWeeklyReferee.games_participated > 0,
-                    ~OrgStatsWeeklyReferee.human_id.in_(non_human_ids),
-                    OrgStatsWeeklyReferee.org_id != ALL_ORGS_ID,
-                )
-                .order_by(
-                    OrgStatsWeeklyReferee.games_participated.desc(),
-                    (
-                        OrgStatsWeeklyReferee.gm_given
-                        + OrgStatsWeeklyReferee.penalties_given
-                    ).desc(),
-                )
-                .limit(top_n)
-                .all()
-            )
-            weekly_scorekeeper_games = (
-                db.session.query(OrgStatsWeeklyHuman, Human, Organization)
-                .join(Human, OrgStatsWeeklyHuman.human_id == Human.id)
-                .join(Organization, OrgStatsWeeklyHuman.org_id == Organization.id)
-                .filter(
-                    OrgStatsWeeklyHuman.games_scorekeeper > 0,
-                    ~OrgStatsWeeklyHuman.human_id.in_(non_human_ids),
-                    OrgStatsWeeklyHuman.org_id != ALL_ORGS_ID,
-                )
-                .order_by(OrgStatsWeeklyHuman.games_scorekeeper.desc())
-                .limit(top_n)
-                .all()
-            )
-
-            # Fetch live games (status="OPEN" and within 75 minutes of start time)
-            now = datetime.now()
-            live_games_data = []
-
-            # Query games with status OPEN
-            live_games_query = (
-                db.session.query(Game, Division, Location, Team.name.label('visitor_team_name'), Team.id.label('visitor_team_id'))
-                .join(Division, Game.division_id == Division.id)
-                .outerjoin(Location, Game.location_id == Location.id)
-                .join(Team, Game.visitor_team_id == Team.id)
-                .filter(Game.status == "OPEN")
-            )
-
-            live_games_results = live_games_query.all()
-
-            for game, division, location, visitor_team_name, visitor_team_id in live_games_results:
-                # Check if game is currently live using shared utility function
-                if is_game_live(game, now):
-                    # Fetch home team name
-                    home_team = db.session.query(Team).filter(Team.id == game.home_team_id).first()
-
-                    # Calculate current score from period scores
-                    visitor_score = (
-                        (game.visitor_period_1_score or 0) +
-                        (game.visitor_period_2_score or 0) +
-                        (game.visitor_period_3_score or 0) +
-                        (game.visitor_ot_score or 0)
-                    )
-                    home_score = (
-                        (game.home_period_1_score or 0) +
-                        (game.home_period_2_score or 0) +
-                        (game.home_period_3_score or 0) +
-                        (game.home_ot_score or 0)
-                    )
-
-                    # Get master location for linking (if exists)
-                    master_location = location
-                    if location and location.master_location_id:
-                        master_location = db.session.query(Location).filter(Location.id == location.master_location_id).first()
-
-                    # Get short level name
-                    level_short_name = division.level if division else ""
-                    if division and division.level_id:
-                        level_obj = db.session.query(Level).filter(Level.id == division.level_id).first()
-                        if level_obj and level_obj.short_name:
-                            level_short_name = level_obj.short_name
-
-                    # Parse live_time to extract period and time_left using shared utility
-                    period, time_left = parse_live_time(game.live_time)
-
-                    live_games_data.append({
-                        'game_id': game.id,
-                        'visitor_team_name': visitor_team_name,
-                        'visitor_team_id': visitor_team_id,
-                        'home_team_name': home_team.name if home_team else 'Unknown',
-                        'home_team_id': game.home_team_id,
-                        'visitor_score': visitor_score,
-                        'home_score': home_score,
-                        'level': level_short_name,
-                        'period': period,
-                        'time_left': time_left,
-                        'location': master_location,
-                    })
-
-            # Fetch top current point streak performers (all-time stats) - only show if last game within 1 month
-            one_month_ago = datetime.now() - timedelta(days=30)
-            current_point_streak_skaters = (
-                db.session.query(OrgStatsSkater, Human, Organization)
-                .join(Human, OrgStatsSkater.human_id == Human.id)
-                .join(Organization, OrgStatsSkater.org_id == Organization.id)
-                .join(Game, OrgStatsSkater.last_game_id == Game.id)
-                .filter(
-                    OrgStatsSkater.current_point_streak > 0,
-                    ~OrgStatsSkater.human_id.in_(non_human_ids),
-                    OrgStatsSkater.org_id != ALL_ORGS_ID,
-                    Game.date >= one_month_ago,
-                )
-                .order_by(
-                    OrgStatsSkater.current_point_streak.desc(),
-                    OrgStatsSkater.current_point_streak_avg_points.desc(),
-                )
-                .limit(top_n)
-                .all()
-            )
-
-            # Fetch latest completed game per organization
-
-            latest_completed_games = []
-            organizations = (
-                db.session.query(Organization)
-                .filter(Organization.id != ALL_ORGS_ID)
-                .all()
-            )
-            day_of_week_map = {
-                1: "Mon",
-                2: "Tue",
-                3: "Wed",
-                4: "Thu",
-                5: "Fri",
-                6: "Sat",
-                7: "Sun",
-            }
-
-            for org in organizations:
-                latest_game = (
-                    db.session.query(Game)
-                    .filter(Game.org_id == org.id, Game.status.startswith("Final"))
-                    .order_by(Game.date.desc(), Game.time.desc())
-                    .first()
-                )
-
-                if latest_game:
-                    day_of_week = day_of_week_map.get(latest_game.day_of_week, "")
-                    date_time_str = f"{day_of_week} {latest_game.date.strftime('%m/%d/%y')} {latest_game.time.strftime('%I:%M%p')}"
-                    latest_completed_games.append(
-                        {
-                            "org_name": org.organization_name,
-                            "game_id": latest_game.id,
-                            "date_time": date_time_str,
-                        }
-                    )
-
             if request.method == "POST":
                 team_name = request.form.get("team_name")
-                query = db.session.query(Team)
+                search_similar = False
 
                 if team_name:
-                    query = query.filter(Team.name.ilike(f"%{team_name}%"))
-
-                    # Apply limit directly in the query
-                    results = query.limit(MAX_TEAM_SEARCH_RESULTS).all()
+                    results = name_search.teams(team_name, MAX_TEAM_SEARCH_RESULTS)
 
                     if not results:
                         return render_template(
@@ -600,39 +561,27 @@ def _create_app(db_name):
                     first_name = request.form.get("first_name")
                     last_name = request.form.get("last_name")
 
-                    query = db.session.query(Human)
-
-                    if first_name:
-                        query = query.filter(Human.first_name.ilike(f"%{first_name}%"))
-                    if last_name:
-                        query = query.filter(Human.last_name.ilike(f"%{last_name}%"))
-
-                    # Filter out non-human entities
-                    if non_human_ids:
-                        query = query.filter(~Human.id.in_(non_human_ids))
-
-                    # Apply limit directly in the query
-                    results = query.limit(MAX_HUMAN_SEARCH_RESULTS).all()
+                    # Non-human entities are left out by the index
+                    results = name_search.humans(
+                        first_name, last_name, MAX_HUMAN_SEARCH_RESULTS
+                    )
+                    if not results and (first_name or last_name):
+                        # Nothing contains the name as typed, so offer the
+                        # names that are a typo or two away
+                        similar = name_search.fuzzy_humans(
+                            f"{first_name or ''} {last_name or ''}", MAX_HUMAN_SEARCH_RESULTS
+                        )
+                        results = [human for human, _ in similar]
+                        search_similar = True
 
                     # If only one result, redirect directly to that human's page
-                    if len(results) == 1:
+                    if len(results) == 1 and not search_similar:
                         return redirect(url_for("human_stats.human_stats", human_id=results[0].id, top_n=20))
 
                     links = []
                     for player in results:
-                        aliases = (
-                            db.session.query(HumanAlias)
-                            .filter(HumanAlias.human_id == player.id)
-                            .all()
-                        )
-                        alias_names = [
-                            f"{alias.first_name} {alias.middle_name} {alias.last_name}".strip()
-                            for alias in aliases
-                            if f"{alias.first_name} {alias.middle_name} {alias.last_name}".strip()
-                            != f"{player.first_name} {player.middle_name} {player.last_name}".strip()
-                        ]
                         alias_text = (
-                            f" A.K.A. {', '.join(alias_names)}" if alias_names else ""
+                            f" A.K.A. {', '.join(player.aliases)}" if player.aliases else ""
                         )
                         link_text = f"{player.first_name} {player.middle_name} {player.last_name}{alias_text}"
                         link = f'<a href="{url_for("human_stats.human_stats", human_id=player.id, top_n=20)}">{link_text}</a>'
@@ -641,6 +590,7 @@ def _create_app(db_name):
                 return render_template(
                     "index.html",
                     search_results=links,
+                    search_similar=search_similar,
                     auth_data=auth_data,
                     last_scheduled=last_scheduled,
                     last_scheduled_time=last_scheduled_time,
@@ -825,6 +775,18 @@ def _create_app(db_name):
             "routes": routes,
             "db_status": db_status,
             "registered_blueprints": list(app.blueprints.keys()),
+            "request_log_writer": request_log_writer.stats(),
+            "reference_data": reference_data.stats(),
+            "non_human_registry": non_human_registry.stats(),
+            "name_search": name_search.stats(),
+            "fragment_cache": fragment_cache.stats(),
+            "profile_snapshot_cache": profile_snapshot_cache.stats(),
+            "chart_artifacts": chart_artifacts.stats(),
+            "conditional_get": conditional.stats(),
+            "compression": compression.stats(),
+            "highlight_videos": highlight_videos.stats(),
+            "highlight_status": highlight_status.stats(),
+            "live_scores": live_scores.stats(),
         }
 
         return jsonify(debug_data)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Backfill request_log_rollups from raw request_logs.
+
+Live ingestion only rolls up logs written after it was deployed, and records
+when that was.  This script folds the older raw logs (everything before that
+time, or before --until) into the rollups, and records how far it got after
+every batch.  It refuses to roll up logs that live ingestion or an earlier
+backfill already covered; after an interrupted run, pass --since with the
+time the refusal reports.
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+load_dotenv(".env.production")
+
+# These read their settings from the environment loaded above
+from hockey_blast_common_lib.models import RequestLog, db  # noqa: E402
+from sqlalchemy import func, insert, update  # noqa: E402
+
+from app import create_prod_app  # noqa: E402
+from request_log_rollup import (RequestLogRollupCoverage,  # noqa: E402
+                                dashboard_paths, rollup_request_logs)
+
+BATCH_SIZE = 5000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--days", type=int, default=365, help="How many days of raw logs to roll up"
+    )
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        help="Roll up raw logs from this time instead of --days ago",
+    )
+    parser.add_argument(
+        "--until",
+        type=datetime.fromisoformat,
+        help="Roll up raw logs before this time (default: when live ingestion started)",
+    )
+    args = parser.parse_args()
+
+    app = create_prod_app()
+    with app.app_context():
+        paths = dashboard_paths(app)
+        coverage = RequestLogRollupCoverage.__table__
+        since = args.since or datetime.now() - timedelta(days=args.days)
+        live_start = (
+            db.session.query(func.min(RequestLogRollupCoverage.start))
+            .filter(RequestLogRollupCoverage.source == "live")
+            .scalar()
+        )
+        until = args.until or live_start
+        if until is None:
+            sys.exit("Live ingestion has not recorded when it started; pass --until")
+        if live_start is not None and until > live_start:
+            sys.exit(f"Live ingestion rolls up the logs from {live_start} on")
+        if until <= since:
+            sys.exit(f"Nothing to roll up between {since} and {until}")
+        covered = (
+            db.session.query(RequestLogRollupCoverage)
+            .filter(
+                RequestLogRollupCoverage.source == "backfill",
+                RequestLogRollupCoverage.start < until,
+                RequestLogRollupCoverage.end > since,
+            )
+            .order_by(RequestLogRollupCoverage.start)
+            .first()
+        )
+        if covered is not None:
+            sys.exit(f"The logs from {covered.start} to {covered.end} are already rolled up")
+        print(f"Rolling up request logs from {since} to {until}")
+
+        with db.engine.begin() as conn:
+            coverage_id = conn.execute(
+                insert(coverage)
+                .values(source="backfill", start=since, end=since)
+                .returning(coverage.c.id)
+            ).scalar_one()
+
+        def fold(batch, end):
+            # Record the progress in the same transaction, so an interrupted
+            # run covers exactly what it rolled up
+            with db.engine.begin() as conn:
+                rollup_request_logs(conn, batch, paths)
+                conn.execute(
+                    update(coverage).where(coverage.c.id == coverage_id).values(end=end)
+                )
+
+        query = (
+            db.session.query(
+                RequestLog.user_agent,
+                RequestLog.client_ip,
+                RequestLog.path,
+                RequestLog.timestamp,
+                RequestLog.response_time_ms,
+            )
+            .filter(RequestLog.timestamp >= since, RequestLog.timestamp < until)
+            .order_by(RequestLog.timestamp, RequestLog.id)
+        )
+        batch = []
+        total = 0
+        for row in query.yield_per(BATCH_SIZE):
+            # A full batch is folded once the next row is later, so the
+            # progress recorded never splits the logs of one timestamp
+            if len(batch) >= BATCH_SIZE and row.timestamp > batch[-1]["timestamp"]:
+                fold(batch, row.timestamp)
+                total += len(batch)
+                print(f"  {total} rows")
+                batch = []
+            batch.append(row._asdict())
+        fold(batch, until)
+        total += len(batch)
+        print(f"Done, rolled up {total} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Per-process background threads for the caches and refreshers.
+
+Threads do not survive into forked gunicorn workers, so a BackgroundThread
+is started lazily: ensure_started() starts it on first use in each process
+(and again in a child after a fork).  The target gets the thread's stop
+event and should return soon after it is set.
+"""
+
+import os
+import threading
+
+
+class BackgroundThread:
+    """A daemon thread started once per process."""
+
+    def __init__(self, target, name, on_new_process=None):
+        self.target = target
+        self.name = name
+        # Called (under the start lock) before the first start in a process,
+        # to reset state inherited from the parent
+        self.on_new_process = on_new_process
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def ensure_started(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None:
+                return
+            if self._pid != pid and self.on_new_process is not None:
+                self.on_new_process()
+            self._pid = pid
+            self.stop_event.clear()
+            self._thread = threading.Thread(
+                target=self.target, args=(self.stop_event,), name=self.name, daemon=True
+            )
+            self._thread.start()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self, timeout=None):
+        """Ask the thread to stop, and wait up to `timeout` seconds if given."""
+        self.stop_event.set()
+        thread = self._thread
+        # A thread inherited through a fork is not running in this process
+        if timeout is not None and self.is_alive() and self._pid == os.getpid():
+            thread.join(timeout)
+
+
+def run_every(stop, interval, app, func):
+    """Call func in an app context every `interval` seconds until stop is set."""
+    while not stop.wait(interval):
+        with app.app_context():
+            func()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the human stats profile page.
+
+Renders the profile of the heaviest players (most roster rows) a few times
+through the test client and reports the CPU time, wall time and number of SQL
+queries per profile (CPU time and queries of the rendering thread only, not
+of the app's background threads), so regressions in the pandas code (or new N+1 queries)
+show up before they reach production.  Profile snapshots are bypassed
+unless --cached is given, so the full pipeline is measured.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv(".env.production")
+if "--cached" not in sys.argv:
+    os.environ["PROFILE_SNAPSHOT_CACHE"] = "0"
+
+# These read their settings from the environment prepared above
+from hockey_blast_common_lib.models import GameRoster, db  # noqa: E402
+from sqlalchemy import event, func  # noqa: E402
+
+from app import create_prod_app  # noqa: E402
+from non_human_registry import non_human_registry  # noqa: E402
+
+
+def heaviest_humans(limit):
+    """Ids of the real humans with the most roster rows."""
+    non_human_ids = non_human_registry.ids()
+    rows = (
+        db.session.query(GameRoster.human_id, func.count().label("games"))
+        .group_by(GameRoster.human_id)
+        .order_by(func.count().desc())
+        .limit(limit + len(non_human_ids))
+        .all()
+    )
+    return [row.human_id for row in rows if row.human_id not in non_human_ids][
+        :limit
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--human-id",
+        type=int,
+        action="append",
+        help="Profile to benchmark (repeatable, default: the heaviest players)",
+    )
+    parser.add_argument(
+        "--players", type=int, default=5, help="How many of the heaviest players"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Renders per profile")
+    parser.add_argument("--top-n", type=int, default=20)
+    parser.add_argument(
+        "--cached", action="store_true", help="Serve profiles from snapshots"
+    )
+    args = parser.parse_args()
+
+    app = create_prod_app()
+    with app.app_context():
+        human_ids = args.human_id or heaviest_humans(args.players)
+        queries = {"count": 0}
+        # The test client renders in this thread
+        thread = threading.get_ident()
+
+        @event.listens_for(db.engine, "before_cursor_execute")
+        def count_query(*args, **kwargs):
+            if threading.get_ident() == thread:
+                queries["count"] += 1
+
+    client = app.test_client()
+    print(f"{'human_id':>10} {'cpu ms':>10} {'wall ms':>10} {'queries':>8}")
+    for human_id in human_ids:
+        url = f"/human_stats/human_stats?human_id={human_id}&top_n={args.top_n}"
+        client.get(url)  # warm up caches
+        cpu_times, wall_times = [], []
+        for _ in range(args.repeat):
+            queries["count"] = 0
+            cpu_start, wall_start = time.thread_time(), time.perf_counter()
+            response = client.get(url)
+            cpu_times.append((time.thread_time() - cpu_start) * 1000)
+            wall_times.append((time.perf_counter() - wall_start) * 1000)
+            if response.status_code != 200:
+                print(f"{human_id:>10} failed with HTTP {response.status_code}")
+                break
+        else:
+            print(
+                f"{human_id:>10} {statistics.median(cpu_times):>10.1f} "
+                f"{statistics.median(wall_times):>10.1f} {queries['count']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
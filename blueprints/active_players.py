@@ -3,10 +3,13 @@ from flask import Blueprint, jsonify, render_template, request
 from hockey_blast_common_lib.models import (HumansInLevels, LevelsMonthly,
                                             db)
 
+from conditional_get import conditional
+
 active_players_bp = Blueprint("active_players", __name__)
 
 
 @active_players_bp.route("/active_players")
+@conditional()
 def interactive_plot():
     levels = db.session.query(LevelsMonthly.level).distinct().all()
     levels = sorted([level[0] for level in levels])  # Sort levels alphabetically
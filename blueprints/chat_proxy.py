@@ -3,14 +3,52 @@ Chat proxy — forwards requests from hockey-blast.com to sportsbook.hockey-blas
 
 Avoids CORS preflight issues caused by Cloudflare Bot Fight Mode blocking OPTIONS
 requests when the stats site calls the sportsbook API cross-origin.
+
+Upstream connections come from a pooled keep-alive session.  Responses the
+sportsbook streams (server-sent events, or chunked bodies without a length)
+are relayed to the browser chunk by chunk as they arrive; anything else is
+read in full and returned as before.
 """
+import logging
+
 import requests
 from flask import Blueprint, request, Response, jsonify
 
+from http_session import pooled_session
+from options import REQUEST_THREADS
+
+logger = logging.getLogger(__name__)
 chat_proxy_bp = Blueprint("chat_proxy", __name__)
 
 SPORTSBOOK_BASE = "http://127.0.0.1:5002"
+CONNECT_TIMEOUT = 5
 TIMEOUT = 90  # Chat can take a while (Bedrock round trips)
+POOL_SIZE = REQUEST_THREADS  # one per thread of a worker, so requests never wait for a connection
+
+# One session per worker process; it keeps up to POOL_SIZE connections to
+# the sportsbook alive between chat messages
+upstream = pooled_session(POOL_SIZE)
+
+
+def _is_streamed(resp):
+    content_type = resp.headers.get("Content-Type", "")
+    return content_type.startswith("text/event-stream") or (
+        resp.headers.get("Transfer-Encoding", "").lower() == "chunked"
+        and "Content-Length" not in resp.headers
+    )
+
+
+def _relay(resp):
+    """Yield an upstream body as it arrives, then return the connection."""
+    try:
+        for chunk in resp.iter_content(chunk_size=None):
+            if chunk:
+                yield chunk
+    except requests.exceptions.RequestException as e:
+        # The status line is already sent, so the stream just ends early
+        logger.error(f"Chat stream from upstream broke off: {e}")
+    finally:
+        resp.close()
 
 
 def _proxy(path):
@@ -22,21 +60,39 @@ def _proxy(path):
     auth = request.headers.get("Authorization")
     if auth:
         headers["Authorization"] = auth
+    # Lets the browser ask for a token stream (text/event-stream)
+    accept = request.headers.get("Accept")
+    if accept:
+        headers["Accept"] = accept
 
     try:
-        resp = requests.request(
+        resp = upstream.request(
             method=request.method,
             url=url,
             headers=headers,
             json=request.get_json(silent=True) if request.method == "POST" else None,
             params=request.args,
-            timeout=TIMEOUT,
+            timeout=(CONNECT_TIMEOUT, TIMEOUT),
+            stream=True,
         )
-        return Response(
-            resp.content,
+        content_type = resp.headers.get("Content-Type", "application/json")
+        if not _is_streamed(resp):
+            try:
+                return Response(
+                    resp.content, status=resp.status_code, content_type=content_type
+                )
+            finally:
+                resp.close()
+
+        response = Response(
+            _relay(resp),
             status=resp.status_code,
-            content_type=resp.headers.get("Content-Type", "application/json"),
+            content_type=content_type,
         )
+        response.headers["Cache-Control"] = "no-cache"
+        # Tell nginx not to buffer the stream
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
     except requests.exceptions.Timeout:
         return jsonify({"error": "Chat engine timed out"}), 504
     except Exception as e:
@@ -4,10 +4,13 @@ from hockey_blast_common_lib.models import (Division, Game, League,
                                             LevelsMonthly, Organization,
                                             Season, db)
 
+from conditional_get import conditional
+
 day_of_week_bp = Blueprint("day_of_week", __name__)
 
 
 @day_of_week_bp.route("/day_of_week")
+@conditional()
 def interactive_plot():
     # Pass orgs and leagues so the dropdowns can be populated client-side
     organizations = db.session.query(Organization).order_by(Organization.organization_name).all()
@@ -4,10 +4,13 @@ from hockey_blast_common_lib.models import (Division, Game, League, Level,
 from hockey_blast_common_lib.stats_utils import ALL_ORGS_ID
 from sqlalchemy import func
 
+from conditional_get import conditional
+
 days_of_week_bp = Blueprint("days_of_week", __name__, template_folder="../templates")
 
 
 @days_of_week_bp.route("/", methods=["GET"])
+@conditional()
 def index():
     org_id = request.args.get("org_id", type=int)
     organizations = (
@@ -7,6 +7,8 @@ from hockey_blast_common_lib.stats_models import LevelStatsHuman
 from hockey_blast_common_lib.stats_utils import ALL_ORGS_ID
 from hockey_blast_common_lib.utils import get_fake_level
 
+from conditional_get import conditional
+
 dropdowns_bp = Blueprint("dropdowns", __name__)
 
 
@@ -95,6 +97,7 @@ def filter_seasons():
 
 
 @dropdowns_bp.route("/organizations", methods=["GET"])
+@conditional()
 def get_organizations():
     organizations = db.session.query(Organization).all()
     all_orgs = (
@@ -1,5 +1,6 @@
 import sys
 import os
+from collections import defaultdict
 
 # Add parent directory to path to import game_utils
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -8,12 +9,28 @@ from flask import Blueprint, jsonify, render_template, request, url_for
 from hockey_blast_common_lib.models import (Division, Game, GameRoster, Goal,
                                             Human, League, Location, Penalty, Shootout,
                                             Team, db)
+from sqlalchemy.orm import aliased
+
+from conditional_get import conditional, data_version
 from game_utils import is_game_live
+from reference_data import reference_data
 
 game_card_bp = Blueprint("game_card", __name__)
 
 
+def game_card_version():
+    """data_version, except for open games (the live clock moves on its own)."""
+    game_id = request.args.get("game_id", type=int)
+    if game_id is None:
+        return None
+    status = db.session.query(Game.status).filter(Game.id == game_id).scalar()
+    if status is None or status.upper() == "OPEN":
+        return None
+    return data_version()
+
+
 @game_card_bp.route("/game_card", methods=["GET"])
+@conditional(game_card_version)
 def game_card():
     game_id = request.args.get("game_id")
 
@@ -25,77 +42,97 @@ def game_card():
     except ValueError:
         return jsonify({"error": f"Incorrect game_id: {game_id}"}), 404
 
-    # Fetch the game data
-    game = db.session.query(Game).filter(Game.id == game_id).first()
-    if not game:
-        return jsonify({"error": "Game not found"}), 404
-
-    # Fetch related data
-    division = (
-        db.session.query(Division).filter(Division.id == game.division_id).first()
-    )
-    league = (
-        db.session.query(League).filter(League.id == division.league_number).first()
-    )
-    scorekeeper = (
-        db.session.query(Human).filter(Human.id == game.scorekeeper_id).first()
+    # Fetch the game together with its division, league, teams and locations
+    VisitorTeam = aliased(Team)
+    HomeTeam = aliased(Team)
+    MasterLocation = aliased(Location)
+    row = (
+        db.session.query(
+            Game, Division, League, VisitorTeam, HomeTeam, Location, MasterLocation
+        )
+        .outerjoin(Division, Game.division_id == Division.id)
+        .outerjoin(League, League.id == Division.league_number)
+        .outerjoin(VisitorTeam, Game.visitor_team_id == VisitorTeam.id)
+        .outerjoin(HomeTeam, Game.home_team_id == HomeTeam.id)
+        .outerjoin(Location, Game.location_id == Location.id)
+        .outerjoin(MasterLocation, Location.master_location_id == MasterLocation.id)
+        .filter(Game.id == game_id)
+        .first()
     )
-    referee_1 = db.session.query(Human).filter(Human.id == game.referee_1_id).first()
-    referee_2 = db.session.query(Human).filter(Human.id == game.referee_2_id).first()
+    if not row:
+        return jsonify({"error": "Game not found"}), 404
+    game, division, league, visitor_team, home_team, location, master_location = row
 
-    # Fetch team names
-    visitor_team = (
-        db.session.query(Team).filter(Team.id == game.visitor_team_id).first()
-    )
-    home_team = db.session.query(Team).filter(Team.id == game.home_team_id).first()
-
-    # Fetch location and get master location for display
-    location = None
-    master_location = None
-    if game.location_id:
-        location = db.session.query(Location).filter(Location.id == game.location_id).first()
-        if location:
-            # Get the master location for display and linking
-            if location.master_location_id:
-                master_location = db.session.query(Location).filter(Location.id == location.master_location_id).first()
-            else:
-                # If no master location set, use the location itself
-                master_location = location
+    # If no master location set, use the location itself for display and linking
+    if location and not location.master_location_id:
+        master_location = location
 
-    # Fetch rosters
-    home_roster = (
+    # Fetch both rosters and all game events, then group them in memory
+    roster = (
         db.session.query(GameRoster, Human)
         .join(Human, GameRoster.human_id == Human.id)
-        .filter(GameRoster.game_id == game_id, GameRoster.team_id == game.home_team_id)
+        .filter(GameRoster.game_id == game_id)
+        .order_by(GameRoster.id)
         .all()
     )
-    visitor_roster = (
-        db.session.query(GameRoster, Human)
-        .join(Human, GameRoster.human_id == Human.id)
-        .filter(
-            GameRoster.game_id == game_id, GameRoster.team_id == game.visitor_team_id
-        )
+    home_roster = [(r, h) for r, h in roster if r.team_id == game.home_team_id]
+    visitor_roster = [(r, h) for r, h in roster if r.team_id == game.visitor_team_id]
+
+    goals = db.session.query(Goal).filter(Goal.game_id == game_id).all()
+    penalties = (
+        db.session.query(Penalty)
+        .filter(Penalty.game_id == game_id)
+        .order_by(Penalty.penalty_sequence_number)
         .all()
     )
+    shootouts = db.session.query(Shootout).filter(Shootout.game_id == game_id).all()
+
+    # Resolve every referenced human in one query (rostered players are known already)
+    humans = {human.id: human for _, human in roster}
+    referenced_ids = {game.scorekeeper_id, game.referee_1_id, game.referee_2_id}
+    for goal in goals:
+        referenced_ids.update((goal.goal_scorer_id, goal.assist_1_id, goal.assist_2_id))
+    referenced_ids.update(p.penalized_player_id for p in penalties)
+    for shootout in shootouts:
+        referenced_ids.update((shootout.shooter_id, shootout.goalie_id))
+    missing_ids = referenced_ids - humans.keys() - {None}
+    if missing_ids:
+        humans.update(
+            (human.id, human)
+            for human in db.session.query(Human).filter(Human.id.in_(missing_ids))
+        )
+
+    teams = {team.id: team for team in (visitor_team, home_team) if team}
+    missing_team_ids = (
+        {p.team_id for p in penalties} | {s.shooting_team_id for s in shootouts}
+    ) - teams.keys() - {None}
+    for team_id in missing_team_ids:
+        team = reference_data.team(team_id)
+        if team:
+            teams[team_id] = team
+
+    scorekeeper = humans.get(game.scorekeeper_id)
+    referee_1 = humans.get(game.referee_1_id)
+    referee_2 = humans.get(game.referee_2_id)
+
+    goals_by_player = defaultdict(int)
+    assists_by_player = defaultdict(int)
+    for goal in goals:
+        goals_by_player[goal.goal_scorer_id] += 1
+        assists_by_player[goal.assist_1_id] += 1
+        assists_by_player[goal.assist_2_id] += 1
+    penalties_by_player = defaultdict(list)
+    for penalty in penalties:
+        if penalty.infraction:
+            penalties_by_player[penalty.penalized_player_id].append(penalty.infraction)
 
     # Calculate per-player stats for roster display (goals, assists, penalties)
-    def calculate_player_stats(roster_list, gid):
+    def calculate_player_stats(roster_list):
         player_stats = []
         for roster, human in roster_list:
-            goals = db.session.query(Goal).filter(
-                Goal.game_id == gid, Goal.goal_scorer_id == human.id
-            ).count()
-            assists_1 = db.session.query(Goal).filter(
-                Goal.game_id == gid, Goal.assist_1_id == human.id
-            ).count()
-            assists_2 = db.session.query(Goal).filter(
-                Goal.game_id == gid, Goal.assist_2_id == human.id
-            ).count()
-            assists = assists_1 + assists_2
-            player_penalties = db.session.query(Penalty).filter(
-                Penalty.game_id == gid, Penalty.penalized_player_id == human.id
-            ).all()
-            penalty_types = [p.infraction for p in player_penalties if p.infraction]
+            goals = goals_by_player.get(human.id, 0)
+            assists = assists_by_player.get(human.id, 0)
+            penalty_types = penalties_by_player.get(human.id, [])
             points = goals + assists
             player_stats.append({
                 'roster': roster,
@@ -110,21 +147,13 @@ def game_card():
         player_stats.sort(key=lambda x: x['sort_key'], reverse=True)
         return player_stats
 
-    home_roster_with_stats = calculate_player_stats(home_roster, game_id)
-    visitor_roster_with_stats = calculate_player_stats(visitor_roster, game_id)
+    home_roster_with_stats = calculate_player_stats(home_roster)
+    visitor_roster_with_stats = calculate_player_stats(visitor_roster)
 
-    # Fetch goals
-    goals = db.session.query(Goal).filter(Goal.game_id == game_id).all()
     for goal in goals:
-        goal.scorer_name = (
-            db.session.query(Human).filter(Human.id == goal.goal_scorer_id).first()
-        )
-        goal.assist_1_name = (
-            db.session.query(Human).filter(Human.id == goal.assist_1_id).first()
-        )
-        goal.assist_2_name = (
-            db.session.query(Human).filter(Human.id == goal.assist_2_id).first()
-        )
+        goal.scorer_name = humans.get(goal.goal_scorer_id)
+        goal.assist_1_name = humans.get(goal.assist_1_id)
+        goal.assist_2_name = humans.get(goal.assist_2_id)
 
     # Convert time to sortable format (handling both 'MM:SS' and 'SS.SS' formats)
     for goal in goals:
@@ -156,28 +185,15 @@ def game_card():
         elif goal.scoring_team_id == game.home_team_id:
             home_goals_per_period[period] += 1
 
-    # Fetch penalties
-    penalties = (
-        db.session.query(Penalty)
-        .filter(Penalty.game_id == game_id)
-        .order_by(Penalty.penalty_sequence_number)
-        .all()
-    )
     for penalty in penalties:
-        player = (
-            db.session.query(Human)
-            .filter(Human.id == penalty.penalized_player_id)
-            .first()
-        )
-        team = db.session.query(Team).filter(Team.id == penalty.team_id).first()
+        player = humans.get(penalty.penalized_player_id)
+        team = teams.get(penalty.team_id)
         penalty.player_name = (
             f"{player.first_name} {player.last_name}" if player else "Unknown"
         )
         penalty.team_name = team.name if team else "Unknown"
         penalty.team_link = url_for("game_card.game_card", game_id=penalty.team_id)
 
-    # Fetch shootouts
-    shootouts = db.session.query(Shootout).filter(Shootout.game_id == game_id).all()
     visitor_shootouts = [
         s for s in shootouts if s.shooting_team_id == game.visitor_team_id
     ]
@@ -196,13 +212,9 @@ def game_card():
             interleaved_shootouts.append(home_shootouts[i])
 
     for shootout in interleaved_shootouts:
-        shooter = (
-            db.session.query(Human).filter(Human.id == shootout.shooter_id).first()
-        )
-        goalie = db.session.query(Human).filter(Human.id == shootout.goalie_id).first()
-        team = (
-            db.session.query(Team).filter(Team.id == shootout.shooting_team_id).first()
-        )
+        shooter = humans.get(shootout.shooter_id)
+        goalie = humans.get(shootout.goalie_id)
+        team = teams.get(shootout.shooting_team_id)
         shootout.shooter_name = (
             f"{shooter.first_name} {shooter.last_name}" if shooter else "Unknown"
         )
@@ -1,9 +1,13 @@
 from datetime import date
 
 from flask import Blueprint, jsonify, render_template, request, url_for
-from hockey_blast_common_lib.models import (Division, Game, Level, Location, Organization, Team,
+from hockey_blast_common_lib.models import (Division, Game, Level, Location, Team,
                                             db)
 from hockey_blast_common_lib.stats_utils import ALL_ORGS_ID
+from sqlalchemy.orm import aliased
+
+from conditional_get import conditional
+from reference_data import reference_data
 
 games_bp = Blueprint("games", __name__)
 
@@ -12,8 +16,9 @@ MAX_TOP_N = 2000
 
 
 @games_bp.route("/games", methods=["GET"])
+@conditional()
 def games():
-    organizations = db.session.query(Organization).all()
+    organizations = reference_data.organizations()
     top_n = request.args.get("top_n", default=DEFAULT_TOP_N)
     org_id = request.args.get("org_id")
     level_id = request.args.get("level_id")
@@ -62,8 +67,19 @@ def filter_games():
     if top_n > MAX_TOP_N:
         top_n = MAX_TOP_N
 
-    # Use outerjoin to include games with and without location_id
-    query = db.session.query(Game, Location).outerjoin(Location, Game.location_id == Location.id)
+    # Fetch teams, division and level alongside each game so building the
+    # response needs no per-row lookups. Use outerjoin to include games with
+    # and without location_id.
+    VisitorTeam = aliased(Team)
+    HomeTeam = aliased(Team)
+    query = (
+        db.session.query(Game, Location, VisitorTeam, HomeTeam, Level)
+        .join(VisitorTeam, Game.visitor_team_id == VisitorTeam.id)
+        .join(HomeTeam, Game.home_team_id == HomeTeam.id)
+        .outerjoin(Location, Game.location_id == Location.id)
+        .outerjoin(Division, Game.division_id == Division.id)
+        .outerjoin(Level, Division.level_id == Level.id)
+    )
 
     try:
         org_id = int(org_id)
@@ -101,9 +117,7 @@ def filter_games():
         query = query.order_by(Game.date.desc(), Game.time.desc())
 
     if level_id:
-        query = query.join(Division, Game.division_id == Division.id).filter(
-            Division.level_id == level_id
-        )
+        query = query.filter(Division.level_id == level_id)
     if season_id:
         query = query.filter(Division.season_id == season_id)
     if location:
@@ -133,23 +147,10 @@ def filter_games():
         7: "Sun",
     }
 
-    for game, location in results:
-        if game.home_team_id is None or game.visitor_team_id is None:
-            continue
-
-        visitor_team = (
-            db.session.query(Team).filter(Team.id == game.visitor_team_id).first()
-        )
-        home_team = db.session.query(Team).filter(Team.id == game.home_team_id).first()
-
-        # Fetch division and level information
-        division = db.session.query(Division).filter(Division.id == game.division_id).first()
-        level = None
+    for game, location, visitor_team, home_team, level in results:
         level_short_name = ""
-        if division and division.level_id:
-            level = db.session.query(Level).filter(Level.id == division.level_id).first()
-            if level and level.short_name:
-                level_short_name = level.short_name
+        if level and level.short_name:
+            level_short_name = level.short_name
 
         if game.status.startswith("Final"):
             home_period_scores = (
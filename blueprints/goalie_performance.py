@@ -10,6 +10,10 @@ from hockey_blast_common_lib.stats_models import (DivisionStatsGoalie,
                                                   OrgStatsGoalie)
 from hockey_blast_common_lib.stats_utils import ALL_ORGS_ID
 
+from conditional_get import conditional
+from performance_details import load_performance_details
+from reference_data import reference_data
+
 from .goalie_performance_dropdowns import (filter_levels, filter_seasons,
                                            filter_teams,
                                            get_divisions_and_seasons,
@@ -47,7 +51,7 @@ def format_date_link(date, game_id):
 
 
 def append_goalie_performance_result(
-    goalie_performance_results, stats, context, context_value=0
+    goalie_performance_results, stats, context, context_value=0, details=None
 ):
     if isinstance(stats, dict):
         human_id = stats.get("human_id")
@@ -78,16 +82,8 @@ def append_goalie_performance_result(
         save_percentage = stats.save_percentage
         save_percentage_rank = stats.save_percentage_rank
 
-    first_game = (
-        db.session.query(Game.date).filter(Game.id == first_game_id).first()
-        if first_game_id
-        else None
-    )
-    last_game = (
-        db.session.query(Game.date).filter(Game.id == last_game_id).first()
-        if last_game_id
-        else None
-    )
+    if details is None:
+        details = load_performance_details([stats])
     goalie_performance_results.append(
         {
             "human_id": human_id,
@@ -140,12 +136,10 @@ def append_goalie_performance_result(
                     else stats.total_in_rank
                 ),
             ),
-            "first_game": (
-                format_date_link(first_game.date, first_game_id) if first_game else None
-            ),
-            "last_game": (
-                format_date_link(last_game.date, last_game_id) if last_game else None
+            "first_game": format_date_link(
+                details.game_date(first_game_id), first_game_id
             ),
+            "last_game": format_date_link(details.game_date(last_game_id), last_game_id),
         }
     )
 
@@ -158,6 +152,7 @@ def extract_date_from_link(link):
 
 
 @goalie_performance_bp.route("/", methods=["GET"])
+@conditional()
 def goalie_performance():
     human_id = request.args.get("human_id")
     human_name = "All Goalies (for selected Season in Level)"
@@ -249,15 +244,12 @@ def filter_goalie_performance():
 
             org_stats = query.order_by(OrgStatsGoalie.org_id).limit(top_n).all()
 
+            details = load_performance_details(org_stats)
             for stats in org_stats:
-                organization = (
-                    db.session.query(Organization)
-                    .filter(Organization.id == stats.org_id)
-                    .first()
-                )
+                organization = reference_data.organization(stats.org_id)
                 context = organization.organization_name
                 append_goalie_performance_result(
-                    goalie_performance_results, stats, context
+                    goalie_performance_results, stats, context, details=details
                 )
             goalie_performance_results.sort(
                 key=lambda x: (x["games_participated"]), reverse=True
@@ -271,11 +263,7 @@ def filter_goalie_performance():
                     OrgStatsGoalie.human_id == human_id,
                 ).first()
                 if org_stats:
-                    organization = (
-                        db.session.query(Organization)
-                        .filter(Organization.id == org_id)
-                        .first()
-                    )
+                    organization = reference_data.organization(org_id)
                     context = f"{organization.organization_name} (All Levels)"
                     append_goalie_performance_result(
                         goalie_performance_results, org_stats, context
@@ -284,6 +272,7 @@ def filter_goalie_performance():
 
                 # Then show per-level breakdowns
                 levels = get_levels_for_goalie_in_org(org_id, human_id)
+                level_rows = []
                 for level in levels:
                     query = db.session.query(LevelStatsGoalie).filter(
                         LevelStatsGoalie.level_id == level.id,
@@ -297,10 +286,12 @@ def filter_goalie_performance():
                     )
 
                     for stats in level_stats:
-                        context = level.level_name
-                        append_goalie_performance_result(
-                            goalie_performance_results, stats, context
-                        )
+                        level_rows.append((stats, level.level_name))
+                details = load_performance_details([stats for stats, _ in level_rows])
+                for stats, context in level_rows:
+                    append_goalie_performance_result(
+                        goalie_performance_results, stats, context, details=details
+                    )
                 goalie_performance_results.sort(
                     key=lambda x: (not x.get("is_summary", False), -x["games_participated"])
                 )
@@ -310,6 +301,7 @@ def filter_goalie_performance():
                     divisions, seasons = get_divisions_and_seasons(
                         org_id, level_id, human_id
                     )
+                    division_rows = []
                     for division in divisions:
                         query = db.session.query(DivisionStatsGoalie).filter(
                             DivisionStatsGoalie.division_id == division.id,
@@ -329,12 +321,18 @@ def filter_goalie_performance():
                                 (s for s in seasons if s.id == division.season_id), None
                             )
                             context = season.season_name if season else "Unknown Season"
-                            append_goalie_performance_result(
-                                goalie_performance_results,
-                                stats,
-                                context,
-                                context_value=season.season_number,
-                            )
+                            division_rows.append((stats, context, season.season_number))
+                    details = load_performance_details(
+                        [stats for stats, _, _ in division_rows]
+                    )
+                    for stats, context, season_number in division_rows:
+                        append_goalie_performance_result(
+                            goalie_performance_results,
+                            stats,
+                            context,
+                            context_value=season_number,
+                            details=details,
+                        )
                     goalie_performance_results.sort(
                         key=lambda x: (x["context_value"]), reverse=True
                     )
@@ -370,17 +368,13 @@ def filter_goalie_performance():
                         .all()
                     )
 
+                    details = load_performance_details(all_goalies_stats)
                     for stats in all_goalies_stats:
-                        player = (
-                            db.session.query(Human)
-                            .filter(Human.id == stats.human_id)
-                            .first()
-                        )
-                        if player:
-                            link_text = f"{player.first_name} {player.middle_name} {player.last_name}".strip()
-                            link = f'<a href="{url_for("human_stats.human_stats", human_id=player.id, top_n=20)}">{link_text}</a>'
+                        link_text = details.human_name(stats.human_id)
+                        if link_text is not None:
+                            link = f'<a href="{url_for("human_stats.human_stats", human_id=stats.human_id, top_n=20)}">{link_text}</a>'
                             append_goalie_performance_result(
-                                all_goalies_results, stats, link
+                                all_goalies_results, stats, link, details=details
                             )
                 else:
                     # Fetch team stats in division
@@ -403,13 +397,13 @@ def filter_goalie_performance():
                     context = f'<a href="{url_for("team_stats.team_stats", team_id=team.id)}">{team.name}</a>'
 
                     # Add team performance results
+                    details = load_performance_details(list(stats_dict.values()))
                     for key, stats in stats_dict.items():
-                        player = db.session.query(Human).filter(Human.id == key).first()
-                        if player:
-                            link_text = f"{player.first_name} {player.middle_name} {player.last_name}".strip()
-                            link = f'<a href="{url_for("human_stats.human_stats", human_id=player.id, top_n=20)}">{link_text}</a>'
+                        link_text = details.human_name(key)
+                        if link_text is not None:
+                            link = f'<a href="{url_for("human_stats.human_stats", human_id=key, top_n=20)}">{link_text}</a>'
                             append_goalie_performance_result(
-                                team_performance_results, stats, link
+                                team_performance_results, stats, link, details=details
                             )
 
     # Sort the results by last game date (descending) and first game date (ascending)
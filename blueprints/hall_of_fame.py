@@ -7,6 +7,8 @@ from hockey_blast_common_lib.stats_models import (OrgStatsGoalie,
                                                   OrgStatsSkater)
 from hockey_blast_common_lib.utils import get_fake_human_for_stats
 
+from conditional_get import conditional
+
 
 hall_of_fame_bp = Blueprint("hall_of_fame", __name__)
 
@@ -146,6 +148,7 @@ def get_top_humans_data(session, org_id, top_n_stats=10):
 
 
 @hall_of_fame_bp.route("/hall_of_fame", methods=["GET"])
+@conditional()
 def hall_of_fame():
     org_id = -1
     top_n_stats = request.args.get("top_n", default=10)
@@ -1,8 +1,10 @@
 import os
 import sys
+import json
 from datetime import datetime, timedelta
+from functools import partial
 
-from flask import Blueprint, jsonify, render_template, request, url_for
+from flask import Blueprint, g, jsonify, render_template, request, url_for
 
 # Add the project root directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -11,33 +13,140 @@ from game_utils import is_game_live
 
 
 import pandas as pd
-import plotly.graph_objs as go
-import plotly.io as pio
-from hockey_blast_common_lib.h2h_models import SkaterToSkaterStats
-from hockey_blast_common_lib.models import (Division, Game, GameRoster, Goal,
-                                            Human, Level, Penalty, Season,
-                                            Team, db)
-from hockey_blast_common_lib.stats_models import OrgStatsHuman
 from hockey_blast_common_lib.stats_utils import ALL_ORGS_ID
+from jinja2.utils import htmlsafe_json_dumps
+
+from compression import compressed_response, precompress
+from conditional_get import Validator, conditional
+from human_profile_data import (PROFILE_SNAPSHOT_ENABLED, load_human_profile,
+                                profile_snapshot_cache, profile_version)
+from reference_data import reference_data
 
 human_stats_bp = Blueprint("human_stats", __name__)
 
+# Bump when the profile page changes, so snapshots of the old page (rendered
+# and compressed) are not served
+PROFILE_PAGE_FORMAT = 3
+
+# The PulseLine chart is drawn in the browser from plain JSON.  This is the
+# plotly.js build that plotly==5.24.1 embeds, and these are the parts of its
+# default "plotly" template that show on the chart.
+PLOTLY_JS_URL = "https://cdn.plot.ly/plotly-2.35.2.min.js"
+PLOT_AXIS_DEFAULTS = {
+    "automargin": True,
+    "linecolor": "white",
+    "ticks": "",
+    "zerolinecolor": "white",
+    "zerolinewidth": 2,
+}
+
+
+def compact_json_dumps(obj, **kwargs):
+    return json.dumps(obj, separators=(",", ":"), **kwargs)
+
+def goalie_mask(df):
+    """Rows where the human played goalie (role or jersey number "G")."""
+    return (df["role"].str.upper() == "G") | (df["jersey_number"].str.upper() == "G")
+
+
+def first_and_last_game(df):
+    """(first_date, first_game_id, last_date, last_game_id) of a game_date/game_id frame.
+
+    Ties go to the earliest row in frame order.  All four are None for an
+    empty frame.
+    """
+    dates = df["game_date"]
+    if dates.isna().all():
+        return None, None, None, None
+    first, last = dates.argmin(), dates.argmax()
+    game_ids = df["game_id"]
+    return dates.iloc[first], game_ids.iloc[first], dates.iloc[last], game_ids.iloc[last]
+
+
+def game_date_link(game_id, date):
+    return f"<a href='{url_for('game_card.game_card', game_id=game_id)}'>{date.strftime('%m/%d')}<br>{date.strftime('%Y')}</a>"
+
+
+def month_ticks(all_months):
+    """Tick positions and labels for a monthly PeriodIndex.
+
+    If the span is over 2 years there is one tick per year (January, or the
+    first month of that year in range), otherwise up to 12 evenly spaced
+    month ticks.
+    """
+    if len(all_months) > 24:
+        # The range is contiguous, so the first month seen for each year is
+        # January whenever January is in range
+        tickvals = all_months[~all_months.year.duplicated()]
+        return tickvals, [str(year) for year in tickvals.year]
+    tick_interval = max(1, len(all_months) // 12)
+    tickvals = all_months[::tick_interval]
+    return tickvals, list(tickvals.strftime("%b %Y"))
+
+
+def human_stats_version():
+    """Validator from the profile version; profiles with an open game are not validated."""
+    human_id = request.args.get("human_id", type=int)
+    if human_id is None:
+        return None
+    # Kept for the view, so the version is only queried once
+    version = g.profile_version = profile_version(human_id, ALL_ORGS_ID)
+    if version is None or version.has_open_game:
+        return None
+    return Validator(version.token, None)
+
 
 @human_stats_bp.route("/human_stats", methods=["GET"])
+@conditional(human_stats_version)
 def human_stats():
     human_id = request.args.get("human_id")
     top_n = request.args.get("top_n", default=20, type=int)
-    org_id = ALL_ORGS_ID
     if not human_id:
         return jsonify({"error": "Please provide human_id"}), 400
 
     human_id = int(human_id)  # Ensure human_id is an integer
 
-    # Fetch the human's name from the Human table
-    human = db.session.query(Human).filter(Human.id == human_id).first()
-    if not human:
+    if "profile_version" in g:
+        version = g.profile_version
+    else:
+        version = profile_version(human_id, ALL_ORGS_ID)
+    if version is None:
         return jsonify({"error": "Human not found"}), 404
 
+    # The live score of an open game changes with the clock, not the data
+    if PROFILE_SNAPSHOT_ENABLED and not version.has_open_game:
+        body = profile_snapshot_cache.get(
+            f"human_profile:{PROFILE_PAGE_FORMAT}:{human_id}:{top_n}:{version.token}",
+            partial(render_profile_page, human_id, top_n),
+        )
+        if body is None:
+            return jsonify({"error": "Human not found"}), 404
+        return compressed_response(body)
+
+    page = build_profile_page(human_id, top_n)
+    if page is None:
+        return jsonify({"error": "Human not found"}), 404
+    return render_template("human_stats.html", **page)
+
+
+def render_profile_page(human_id, top_n):
+    """The profile page, precompressed for the snapshot cache (None if no such human)."""
+    page = build_profile_page(human_id, top_n)
+    if page is None:
+        return None
+    return precompress(render_template("human_stats.html", **page))
+
+
+def build_profile_page(human_id, top_n):
+    """Template data for a human's profile page, or None if there is no such human."""
+    org_id = ALL_ORGS_ID
+
+    # Load everything the profile needs in a fixed number of queries
+    profile = load_human_profile(human_id, org_id, top_n)
+    if profile is None:
+        return None
+    human = profile.human
+
     full_name = f"{human.first_name} {human.middle_name} {human.last_name}".strip()
 
     roles_data = []
@@ -55,299 +164,94 @@ def human_stats():
             )  # For good stats: lower rank = higher percentile (better)
         return f"{rank}/{total} ({round(percentile)}th)"
 
-    # Fetch overall stats from OrgStatsHuman for all organizations
-    org_stats = (
-        db.session.query(OrgStatsHuman)
-        .filter(OrgStatsHuman.human_id == human_id, OrgStatsHuman.org_id == org_id)
-        .first()
-    )
-
-    # Batch load all game dates to avoid N+1 queries
-    game_ids_to_fetch = []
-    if org_stats:
-        if org_stats.first_game_id_skater:
-            game_ids_to_fetch.append(org_stats.first_game_id_skater)
-        if org_stats.last_game_id_skater:
-            game_ids_to_fetch.append(org_stats.last_game_id_skater)
-        if org_stats.first_game_id_goalie:
-            game_ids_to_fetch.append(org_stats.first_game_id_goalie)
-        if org_stats.last_game_id_goalie:
-            game_ids_to_fetch.append(org_stats.last_game_id_goalie)
-        if org_stats.first_game_id_scorekeeper:
-            game_ids_to_fetch.append(org_stats.first_game_id_scorekeeper)
-        if org_stats.last_game_id_scorekeeper:
-            game_ids_to_fetch.append(org_stats.last_game_id_scorekeeper)
-        if org_stats.first_game_id_referee:
-            game_ids_to_fetch.append(org_stats.first_game_id_referee)
-        if org_stats.last_game_id_referee:
-            game_ids_to_fetch.append(org_stats.last_game_id_referee)
-        if org_stats.first_game_id:
-            game_ids_to_fetch.append(org_stats.first_game_id)
-        if org_stats.last_game_id:
-            game_ids_to_fetch.append(org_stats.last_game_id)
-
-    # Single query to get all needed game dates
-    games_cache = {}
-    if game_ids_to_fetch:
-        games_data = (
-            db.session.query(Game.id, Game.date, Game.time)
-            .filter(Game.id.in_(game_ids_to_fetch))
-            .all()
-        )
-        games_cache = {game.id: game for game in games_data}
-
-    # Placeholder for org_stats - will populate roles_data after roster calculations
-    # Pull recent rosters where this human was present (limit to improve performance)
-    rosters = (
-        db.session.query(GameRoster, Game, Division)
-        .join(Game, GameRoster.game_id == Game.id)
-        .join(Division, Game.division_id == Division.id)
-        .filter(GameRoster.human_id == human_id)
-        .order_by(Game.date.desc(), Game.time.desc())
-        .limit(1000)
-        .all()
-    )
-
-    # Convert rosters to a dataframe
-    rosters_df = pd.DataFrame(
-        [
-            (
-                r.GameRoster.team_id,
-                r.GameRoster.game_id,
-                r.Game.division_id,
-                r.Division.level_id,
-                r.Game.date,
-                r.Game.time,
-                r.GameRoster.role,
-                r.GameRoster.jersey_number,
-                (
-                    r.Game.home_final_score
-                    if r.GameRoster.team_id == r.Game.home_team_id
-                    else r.Game.visitor_final_score
-                ),
-                (
-                    (r.Game.home_period_1_shots or 0)
-                    + (r.Game.home_period_2_shots or 0)
-                    + (r.Game.home_period_3_shots or 0)
-                    + (r.Game.home_ot_shots or 0)
-                    + (r.Game.home_so_shots or 0)
-                    if r.GameRoster.team_id == r.Game.visitor_team_id
-                    else (r.Game.visitor_period_1_shots or 0)
-                    + (r.Game.visitor_period_2_shots or 0)
-                    + (r.Game.visitor_period_3_shots or 0)
-                    + (r.Game.visitor_ot_shots or 0)
-                    + (r.Game.visitor_so_shots or 0)
-                ),
-            )
-            for r in rosters
-        ],
-        columns=[
-            "team_id",
-            "game_id",
-            "division_id",
-            "level_id",
-            "game_date",
-            "game_time",
-            "role",
-            "jersey_number",
-            "goals_allowed",
-            "shots_faced",
-        ],
-    )
-
-    # Filter out rows where both goals_allowed and shots_faced are zero
-
-    # Convert game_date and game_time to datetime
-    rosters_df["game_date"] = pd.to_datetime(rosters_df["game_date"])
-    rosters_df["game_time"] = pd.to_datetime(
-        rosters_df["game_time"], format="%H:%M:%S"
-    ).dt.time
-    rosters_df["game_datetime"] = pd.to_datetime(
-        rosters_df["game_date"].astype(str) + " " + rosters_df["game_time"].astype(str)
-    )
-
-    # Sort rosters_df by game_datetime in descending order
-    rosters_df = rosters_df.sort_values(by="game_datetime", ascending=False)
-
-    # Extract first and last game dates for Skater
-    player_rosters_df = rosters_df[
-        ~(
-            (rosters_df["role"].str.upper() == "G")
-            | (rosters_df["jersey_number"].str.upper() == "G")
-        )
-    ]
-
-    skater_first_game_date = (
-        player_rosters_df["game_date"].min() if not player_rosters_df.empty else None
-    )
-    skater_last_game_date = (
-        player_rosters_df["game_date"].max() if not player_rosters_df.empty else None
-    )
-    skater_first_game_id = (
-        player_rosters_df.loc[
-            player_rosters_df["game_date"] == skater_first_game_date, "game_id"
-        ].values[0]
-        if skater_first_game_date
-        else None
-    )
-    skater_last_game_id = (
-        player_rosters_df.loc[
-            player_rosters_df["game_date"] == skater_last_game_date, "game_id"
-        ].values[0]
-        if skater_last_game_date
-        else None
-    )
-
-    # Prepare links for skater first and last game dates
+    org_stats = profile.org_stats
+    rosters_df = profile.rosters
+
+    # Split skater (player) and goalie games
+    is_goalie = goalie_mask(rosters_df)
+    player_rosters_df = rosters_df[~is_goalie]
+    goalie_rosters_df = rosters_df[is_goalie]
+
+    # First and last game dates and links for Skater and Goalie
+    (
+        skater_first_game_date,
+        skater_first_game_id,
+        skater_last_game_date,
+        skater_last_game_id,
+    ) = first_and_last_game(player_rosters_df)
     skater_first_game_link = (
-        f"<a href='{url_for('game_card.game_card', game_id=skater_first_game_id)}'>{skater_first_game_date.strftime('%m/%d')}<br>{skater_first_game_date.strftime('%Y')}</a>"
+        game_date_link(skater_first_game_id, skater_first_game_date)
         if skater_first_game_date
         else None
     )
     skater_last_game_link = (
-        f"<a href='{url_for('game_card.game_card', game_id=skater_last_game_id)}'>{skater_last_game_date.strftime('%m/%d')}<br>{skater_last_game_date.strftime('%Y')}</a>"
+        game_date_link(skater_last_game_id, skater_last_game_date)
         if skater_last_game_date
         else None
     )
 
-    # Extract first and last game dates for Goalie
-    goalie_rosters_df = rosters_df[
-        (rosters_df["role"].str.upper() == "G")
-        | (rosters_df["jersey_number"].str.upper() == "G")
-    ]
-
-    goalie_first_game_date = (
-        goalie_rosters_df["game_date"].min() if not goalie_rosters_df.empty else None
-    )
-    goalie_last_game_date = (
-        goalie_rosters_df["game_date"].max() if not goalie_rosters_df.empty else None
-    )
-    goalie_first_game_id = (
-        goalie_rosters_df.loc[
-            goalie_rosters_df["game_date"] == goalie_first_game_date, "game_id"
-        ].values[0]
-        if goalie_first_game_date
-        else None
-    )
-    goalie_last_game_id = (
-        goalie_rosters_df.loc[
-            goalie_rosters_df["game_date"] == goalie_last_game_date, "game_id"
-        ].values[0]
-        if goalie_last_game_date
-        else None
-    )
-
-    # Prepare links for goalie first and last game dates
+    (
+        goalie_first_game_date,
+        goalie_first_game_id,
+        goalie_last_game_date,
+        goalie_last_game_id,
+    ) = first_and_last_game(goalie_rosters_df)
     goalie_first_game_link = (
-        f"<a href='{url_for('game_card.game_card', game_id=goalie_first_game_id)}'>{goalie_first_game_date.strftime('%m/%d')}<br>{goalie_first_game_date.strftime('%Y')}</a>"
+        game_date_link(goalie_first_game_id, goalie_first_game_date)
         if goalie_first_game_date
         else None
     )
     goalie_last_game_link = (
-        f"<a href='{url_for('game_card.game_card', game_id=goalie_last_game_id)}'>{goalie_last_game_date.strftime('%m/%d')}<br>{goalie_last_game_date.strftime('%Y')}</a>"
+        game_date_link(goalie_last_game_id, goalie_last_game_date)
         if goalie_last_game_date
         else None
     )
 
-    # Extract first and last game dates for Player
-    first_game_date = rosters_df["game_date"].min() if not rosters_df.empty else None
-    last_game_date = rosters_df["game_date"].max() if not rosters_df.empty else None
-    first_game_id = (
-        rosters_df.loc[rosters_df["game_date"] == first_game_date, "game_id"].values[0]
-        if first_game_date
-        else None
-    )
-    last_game_id = (
-        rosters_df.loc[rosters_df["game_date"] == last_game_date, "game_id"].values[0]
-        if last_game_date
-        else None
-    )
+    goalie_games_count = len(goalie_rosters_df["game_id"].unique())
 
-    # Filter out roles where role or jersey_number is "G" or "g"
-    player_rosters_df = rosters_df[
-        ~(
-            (rosters_df["role"].str.upper() == "G")
-            | (rosters_df["jersey_number"].str.upper() == "G")
-        )
+    # Scorekeeper and referee games
+    officiated_games = profile.officiated_games
+    scorekeeper_games_df = officiated_games.loc[
+        officiated_games["is_scorekeeper"], ["game_date", "game_id"]
     ]
-
-    # Filter for Goalie role
-    goalie_rosters_df = rosters_df[
-        (rosters_df["role"].str.upper() == "G")
-        | (rosters_df["jersey_number"].str.upper() == "G")
+    referee_games_df = officiated_games.loc[
+        officiated_games["is_referee"], ["game_date", "game_id"]
     ]
 
-    goalie_games_count = len(goalie_rosters_df["game_id"].unique())
-
-    # Query for Scorekeeper role
-    scorekeeper_games = (
-        db.session.query(Game).filter((Game.scorekeeper_id == human_id)).all()
-    )
-    scorekeeper_game_dates = [game.date for game in scorekeeper_games]
-    scorekeeper_game_dates = pd.to_datetime(scorekeeper_game_dates)
-    scorekeeper_first_game_date = (
-        min(scorekeeper_game_dates) if not scorekeeper_game_dates.empty else None
-    )
-    scorekeeper_last_game_date = (
-        max(scorekeeper_game_dates) if not scorekeeper_game_dates.empty else None
-    )
-    scorekeeper_first_game_id = (
-        scorekeeper_games[scorekeeper_game_dates.argmin()].id
-        if scorekeeper_first_game_date
-        else None
-    )
-    scorekeeper_last_game_id = (
-        scorekeeper_games[scorekeeper_game_dates.argmax()].id
-        if scorekeeper_last_game_date
-        else None
-    )
+    (
+        scorekeeper_first_game_date,
+        scorekeeper_first_game_id,
+        scorekeeper_last_game_date,
+        scorekeeper_last_game_id,
+    ) = first_and_last_game(scorekeeper_games_df)
 
     # Prepare links for first and last game dates
     scorekeeper_first_game_link = (
-        f"<a href='{url_for('game_card.game_card', game_id=scorekeeper_first_game_id)}'>{scorekeeper_first_game_date.strftime('%m/%d')}<br>{scorekeeper_first_game_date.strftime('%Y')}</a>"
+        game_date_link(scorekeeper_first_game_id, scorekeeper_first_game_date)
         if scorekeeper_first_game_date
         else None
     )
     scorekeeper_last_game_link = (
-        f"<a href='{url_for('game_card.game_card', game_id=scorekeeper_last_game_id)}'>{scorekeeper_last_game_date.strftime('%m/%d')}<br>{scorekeeper_last_game_date.strftime('%Y')}</a>"
+        game_date_link(scorekeeper_last_game_id, scorekeeper_last_game_date)
         if scorekeeper_last_game_date
         else None
     )
 
-    # Query for Referee role
-    referee_games = (
-        db.session.query(Game)
-        .filter((Game.referee_1_id == human_id) | (Game.referee_2_id == human_id))
-        .all()
-    )
-    referee_game_dates_list = [game.date for game in referee_games]
-    referee_first_game_date = (
-        min(referee_game_dates_list) if referee_game_dates_list else None
-    )
-    referee_last_game_date = (
-        max(referee_game_dates_list) if referee_game_dates_list else None
-    )
-    referee_first_game_id = None
-    referee_last_game_id = None
-    if referee_first_game_date:
-        for game in referee_games:
-            if game.date == referee_first_game_date:
-                referee_first_game_id = game.id
-                break
-    if referee_last_game_date:
-        for game in referee_games:
-            if game.date == referee_last_game_date:
-                referee_last_game_id = game.id
-                break
+    (
+        referee_first_game_date,
+        referee_first_game_id,
+        referee_last_game_date,
+        referee_last_game_id,
+    ) = first_and_last_game(referee_games_df)
 
     # Prepare links for referee first and last game dates
     referee_first_game_link = (
-        f"<a href='{url_for('game_card.game_card', game_id=referee_first_game_id)}'>{referee_first_game_date.strftime('%m/%d')}<br>{referee_first_game_date.strftime('%Y')}</a>"
+        game_date_link(referee_first_game_id, referee_first_game_date)
         if referee_first_game_date
         else None
     )
     referee_last_game_link = (
-        f"<a href='{url_for('game_card.game_card', game_id=referee_last_game_id)}'>{referee_last_game_date.strftime('%m/%d')}<br>{referee_last_game_date.strftime('%Y')}</a>"
+        game_date_link(referee_last_game_id, referee_last_game_date)
         if referee_last_game_date
         else None
     )
@@ -405,49 +309,21 @@ def human_stats():
 
     # Determine overall first and last game dates from actual roster data
     # This ensures we show the most up-to-date dates, not stale data from stats table
-    all_game_dates = []
-    all_game_ids_by_date = {}
-
-    # Collect dates from rosters_df (skater/goalie games)
-    if not rosters_df.empty:
-        for _, row in rosters_df.iterrows():
-            date = (
-                row["game_date"].date()
-                if isinstance(row["game_date"], pd.Timestamp)
-                else row["game_date"]
-            )
-            all_game_dates.append(date)
-            if date not in all_game_ids_by_date:
-                all_game_ids_by_date[date] = row["game_id"]
-
-    # Collect dates from scorekeeper games
-    if not scorekeeper_game_dates.empty:
-        for idx, date in enumerate(scorekeeper_game_dates):
-            date_obj = date.date() if isinstance(date, pd.Timestamp) else date
-            all_game_dates.append(date_obj)
-            if date_obj not in all_game_ids_by_date:
-                all_game_ids_by_date[date_obj] = scorekeeper_games[idx].id
-
-    # Collect dates from referee games
-    referee_game_dates_list = [game.date for game in referee_games]
-    for idx, date in enumerate(referee_game_dates_list):
-        all_game_dates.append(date)
-        if date not in all_game_ids_by_date:
-            all_game_ids_by_date[date] = referee_games[idx].id
-
-    # Determine overall first and last dates
-    overall_first_game_date = min(all_game_dates) if all_game_dates else None
-    overall_last_game_date = max(all_game_dates) if all_game_dates else None
-    overall_first_game_id = (
-        all_game_ids_by_date.get(overall_first_game_date)
-        if overall_first_game_date
-        else None
-    )
-    overall_last_game_id = (
-        all_game_ids_by_date.get(overall_last_game_date)
-        if overall_last_game_date
-        else None
+    # Skater/goalie games come first, then scorekeeper and referee games
+    all_games_df = pd.concat(
+        [
+            rosters_df[["game_date", "game_id"]],
+            scorekeeper_games_df,
+            referee_games_df,
+        ],
+        ignore_index=True,
     )
+    (
+        overall_first_game_date,
+        overall_first_game_id,
+        overall_last_game_date,
+        overall_last_game_id,
+    ) = first_and_last_game(all_games_df)
 
     # Prepare links for overall first and last game dates
     overall_first_game_link = (
@@ -472,28 +348,14 @@ def human_stats():
         .sort_values(by="games_played", ascending=False)
     )
 
-    # Get top N teams
-    top_teams = team_game_counts.head(top_n)
-
-    # Batch load team names to avoid N+1 queries
-    team_ids = top_teams["team_id"].tolist()
-    teams_data = (
-        db.session.query(Team.id, Team.name).filter(Team.id.in_(team_ids)).all()
+    # Get top N teams with their names
+    top_teams = team_game_counts.head(top_n).astype({"team_id": int})
+    top_teams["team_name"] = top_teams["team_id"].map(
+        lambda team_id: reference_data.team_name(team_id, "Unknown Team")
+    )
+    most_games_played = top_teams[["team_id", "team_name", "games_played"]].to_dict(
+        "records"
     )
-    teams_cache = {team.id: team.name for team in teams_data}
-
-    # Get team names and prepare data for the template
-    most_games_played = []
-    for _, row in top_teams.iterrows():
-        team_id = int(row["team_id"])  # Convert to standard Python integer
-        team_name = teams_cache.get(team_id, "Unknown Team")
-        most_games_played.append(
-            {
-                "team_id": team_id,
-                "team_name": team_name,
-                "games_played": row["games_played"],
-            }
-        )
 
     # Handle None values in level_id before converting to integer
     rosters_df["level_id"] = rosters_df["level_id"].fillna(0).astype(int)
@@ -510,20 +372,7 @@ def human_stats():
     top_skater_levels = level_game_counts.head(top_n)
 
     # Count points (goals + assists) per level
-    goals = (
-        db.session.query(Goal)
-        .filter(
-            (Goal.goal_scorer_id == human_id)
-            | (Goal.assist_1_id == human_id)
-            | (Goal.assist_2_id == human_id)
-        )
-        .all()
-    )
-    goals_df = pd.DataFrame(
-        [(g.game_id, g.goal_scorer_id, g.assist_1_id, g.assist_2_id) for g in goals],
-        columns=["game_id", "goal_scorer_id", "assist_1_id", "assist_2_id"],
-    )
-    goals_df = goals_df.merge(
+    goals_df = profile.goals.merge(
         rosters_df[["game_id", "level_id"]], on="game_id", how="left"
     )
     points_per_level = goals_df.groupby("level_id").size().reset_index(name="points")
@@ -534,123 +383,45 @@ def human_stats():
     ).fillna(0)
     level_stats["points_per_game"] = level_stats["points"] / level_stats["games_played"]
 
-    # Pull all humans who played together with the given human_id
-    excluded_names = [
-        "Not Signed In",
-        "No Credit- Roster",
-        "No Goalie",
-        "Goalie Not Noted",
+    # Humans who played together with the given human_id the most
+    teammates = [
+        {
+            "teammate_id": teammate.teammate_id,
+            "teammate_name": f"{teammate.first_name} {teammate.middle_name} {teammate.last_name}".strip(),
+            "games_played": teammate.games_played,
+        }
+        for teammate in profile.teammates
     ]
-    teammate_rosters = (
-        db.session.query(GameRoster)
-        .join(Human)
-        .filter(
-            GameRoster.game_id.in_(rosters_df["game_id"]),
-            GameRoster.human_id != human_id,
-            ~(
-                (
-                    Human.first_name + " " + Human.middle_name + " " + Human.last_name
-                ).in_(excluded_names)
-            ),
-        )
-        .all()
-    )
 
-    # Convert teammate rosters to a dataframe
-    teammate_rosters_df = pd.DataFrame(
-        [(r.human_id, r.game_id) for r in teammate_rosters],
-        columns=["teammate_id", "game_id"],
-    )
-
-    # Count how many games were played with each teammate
-    teammate_game_counts = (
-        teammate_rosters_df.groupby("teammate_id")
-        .size()
-        .reset_index(name="games_played")
-        .sort_values(by="games_played", ascending=False)
-    )
-
-    # Get top N teammates
-    top_teammates = teammate_game_counts.head(top_n)
+    # Get skater-to-skater stats if this person is a skater
+    games_against_skaters = []
+    for stat, opponent_id, first_name, middle_name, last_name in profile.skater_matchups:
+        # Skip opponents that no longer exist
+        if opponent_id is None:
+            continue
+        # Determine which side the human is on
+        if stat.skater1_id == human_id:
+            wins = stat.skater1_wins_vs_skater2
+            losses = stat.skater2_wins_vs_skater1
+        else:
+            wins = stat.skater2_wins_vs_skater1
+            losses = stat.skater1_wins_vs_skater2
+        opponent_name = f"{first_name} {middle_name} {last_name}".strip()
 
-    # Batch load teammate names to avoid N+1 queries
-    teammate_ids = top_teammates["teammate_id"].tolist()
-    teammates_data = (
-        db.session.query(Human.id, Human.first_name, Human.middle_name, Human.last_name)
-        .filter(Human.id.in_(teammate_ids))
-        .all()
-    )
-    teammates_cache = {
-        human.id: f"{human.first_name} {human.middle_name} {human.last_name}".strip()
-        for human in teammates_data
-    }
+        # Format wins and losses with colors
+        wins_formatted = f"<span style='color: #7CFC00;'>{wins}W</span>"
+        losses_formatted = f"<span style='color: #FF0000;'>{losses}L</span>"
 
-    # Get teammate names and prepare data for the template
-    teammates = []
-    for _, row in top_teammates.iterrows():
-        teammate_id = int(row["teammate_id"])  # Convert to standard Python integer
-        full_teammate_name = teammates_cache.get(teammate_id, "Unknown Player")
-        teammates.append(
+        games_against_skaters.append(
             {
-                "teammate_id": teammate_id,
-                "teammate_name": full_teammate_name,
-                "games_played": row["games_played"],
+                "opponent_id": opponent_id,
+                "opponent_name": opponent_name,
+                "games_against": stat.games_against,
+                "wins_losses": f"{wins_formatted} {losses_formatted}",
+                "skater_to_skater_link": f"/skater_to_skater/?human_id_1={human_id}&human_id_2={opponent_id}",
             }
         )
 
-    # Get skater-to-skater stats if this person is a skater
-    games_against_skaters = []
-    has_skater_role = any(
-        role["role"] for role in roles_data if "Skater" in role["role"]
-    )
-
-    if has_skater_role:
-        # Query SkaterToSkaterStats where this human is either skater1 or skater2
-        skater_stats = (
-            db.session.query(SkaterToSkaterStats)
-            .filter(
-                (SkaterToSkaterStats.skater1_id == human_id)
-                | (SkaterToSkaterStats.skater2_id == human_id)
-            )
-            .order_by(SkaterToSkaterStats.games_against.desc())
-            .limit(top_n)
-            .all()
-        )
-
-        for stat in skater_stats:
-            # Determine which is the opponent
-            if stat.skater1_id == human_id:
-                opponent_id = stat.skater2_id
-                wins = stat.skater1_wins_vs_skater2
-                losses = stat.skater2_wins_vs_skater1
-            else:
-                opponent_id = stat.skater1_id
-                wins = stat.skater2_wins_vs_skater1
-                losses = stat.skater1_wins_vs_skater2
-
-            # Get opponent name
-            opponent = db.session.query(Human).filter(Human.id == opponent_id).first()
-            if opponent:
-                opponent_name = f"{opponent.first_name} {opponent.middle_name} {opponent.last_name}".strip()
-
-                # Format wins and losses with colors
-                wins_formatted = f"<span style='color: #7CFC00;'>{wins}W</span>"
-                losses_formatted = f"<span style='color: #FF0000;'>{losses}L</span>"
-
-                games_against_skaters.append(
-                    {
-                        "opponent_id": opponent_id,
-                        "opponent_name": opponent_name,
-                        "games_against": stat.games_against,
-                        "wins_losses": f"{wins_formatted} {losses_formatted}",
-                        "skater_to_skater_link": f"/skater_to_skater/?human_id_1={human_id}&human_id_2={opponent_id}",
-                    }
-                )
-
-    # Extract referee game dates for plotting (referee_games already queried earlier)
-    referee_game_dates = [game.date for game in referee_games]
-    referee_game_dates = pd.to_datetime(referee_game_dates)
-
     # Prepare data for Plotly plot
     player_games_per_month = (
         player_rosters_df["game_date"].dt.to_period("M").value_counts().sort_index()
@@ -659,10 +430,10 @@ def human_stats():
         goalie_rosters_df["game_date"].dt.to_period("M").value_counts().sort_index()
     )
     scorekeeper_games_per_month = (
-        pd.Series(scorekeeper_game_dates).dt.to_period("M").value_counts().sort_index()
+        scorekeeper_games_df["game_date"].dt.to_period("M").value_counts().sort_index()
     )
     referee_games_per_month = (
-        pd.Series(referee_game_dates).dt.to_period("M").value_counts().sort_index()
+        referee_games_df["game_date"].dt.to_period("M").value_counts().sort_index()
     )
 
     # Determine the overall date range for the plot
@@ -696,91 +467,56 @@ def human_stats():
             start=pd.Period("2020-01"), end=pd.Period("2020-01"), freq="M"
         )
 
-    # Build ticks: if span > 2 years, one tick per year (Jan or first available month)
-    # otherwise up to 12 evenly spaced month ticks
-    num_months = len(all_months)
-    if num_months > 24:
-        years = sorted(set(m.year for m in all_months))
-        tick_periods = []
-        for y in years:
-            # Pick January if in range, otherwise the first month of that year present
-            jan = pd.Period(f"{y}-01", freq="M")
-            if jan in all_months:
-                tick_periods.append(jan)
-            else:
-                first_of_year = next((m for m in all_months if m.year == y), None)
-                if first_of_year:
-                    tick_periods.append(first_of_year)
-        tickvals = pd.PeriodIndex(tick_periods)
-        ticktext = [str(m.year) for m in tickvals]
-    else:
-        tick_interval = max(1, num_months // 12)
-        tickvals = all_months[::tick_interval]
-        ticktext = list(tickvals.strftime("%b %Y"))
-
-    plot_data = []
-    if player_games_per_month.sum() > 0:
-        plot_data.append(
-            go.Scatter(
-                x=player_games_per_month.index.astype(str),
-                y=player_games_per_month.values,
-                mode="lines",
-                name="Skater",
-                line=dict(color="#FF6347"),
-            )
-        )  # Tomato
-    if goalie_games_per_month.sum() > 0:
-        plot_data.append(
-            go.Scatter(
-                x=goalie_games_per_month.index.astype(str),
-                y=goalie_games_per_month.values,
-                mode="lines",
-                name="Goalie",
-                line=dict(color="#FFD700"),
-            )
-        )  # Gold
-    if scorekeeper_games_per_month.sum() > 0:
-        plot_data.append(
-            go.Scatter(
-                x=scorekeeper_games_per_month.index.astype(str),
-                y=scorekeeper_games_per_month.values,
-                mode="lines",
-                name="Scorekeeper",
-                line=dict(color="#32CD32"),
-            )
-        )  # Lime Green
-    if referee_games_per_month.sum() > 0:
-        plot_data.append(
-            go.Scatter(
-                x=referee_games_per_month.index.astype(str),
-                y=referee_games_per_month.values,
-                mode="lines",
-                name="Referee",
-                line=dict(color="#1E90FF"),
-            )
-        )  # Dodger Blue
-
-    plot_layout = go.Layout(
-        title=dict(text="PulseLine", x=0.5, font=dict(color="#e0f0f0", size=14)),
-        xaxis=dict(
-            title="Month",
-            tickmode="array",
-            tickvals=tickvals.astype(str),
-            ticktext=ticktext,
-            tickangle=-45,
-            color="#e0f0f0",
-            gridcolor="#1a6b6b",
-        ),
-        yaxis=dict(title="Games per Month", color="#e0f0f0", gridcolor="#1a6b6b"),
-        plot_bgcolor="#0a4444",
-        paper_bgcolor="#0d5555",
-        font=dict(color="#e0f0f0", size=12),
-        margin=dict(t=50, b=100, l=60, r=20),
-        legend=dict(orientation="h", y=-0.25, font=dict(color="#e0f0f0", size=11)),
-        height=420,
+    tickvals, ticktext = month_ticks(all_months)
+
+    plot_data = [
+        {
+            "type": "scatter",
+            "x": games_per_month.index.astype(str).tolist(),
+            "y": games_per_month.tolist(),
+            "mode": "lines",
+            "name": name,
+            "line": {"color": color},
+        }
+        for name, games_per_month, color in (
+            ("Skater", player_games_per_month, "#FF6347"),  # Tomato
+            ("Goalie", goalie_games_per_month, "#FFD700"),  # Gold
+            ("Scorekeeper", scorekeeper_games_per_month, "#32CD32"),  # Lime Green
+            ("Referee", referee_games_per_month, "#1E90FF"),  # Dodger Blue
+        )
+        if games_per_month.sum() > 0
+    ]
+
+    plot_layout = {
+        "title": {"text": "PulseLine", "x": 0.5, "font": {"color": "#e0f0f0", "size": 14}},
+        "xaxis": {
+            **PLOT_AXIS_DEFAULTS,
+            "title": {"text": "Month"},
+            "tickmode": "array",
+            "tickvals": tickvals.astype(str).tolist(),
+            "ticktext": ticktext,
+            "tickangle": -45,
+            "color": "#e0f0f0",
+            "gridcolor": "#1a6b6b",
+        },
+        "yaxis": {
+            **PLOT_AXIS_DEFAULTS,
+            "title": {"text": "Games per Month"},
+            "color": "#e0f0f0",
+            "gridcolor": "#1a6b6b",
+        },
+        "hovermode": "closest",
+        "plot_bgcolor": "#0a4444",
+        "paper_bgcolor": "#0d5555",
+        "font": {"color": "#e0f0f0", "size": 12},
+        "margin": {"t": 50, "b": 100, "l": 60, "r": 20},
+        "legend": {"orientation": "h", "y": -0.25, "font": {"color": "#e0f0f0", "size": 11}},
+        "height": 420,
+    }
+    # Serialized once here, so cached snapshots carry the chart ready to embed
+    plot_json = htmlsafe_json_dumps(
+        {"data": plot_data, "layout": plot_layout}, dumps=compact_json_dumps
     )
-    plot_fig = go.Figure(data=plot_data, layout=plot_layout)
-    plot_div = pio.to_html(plot_fig, full_html=False, include_plotlyjs="cdn")
 
     # Extract recent games data
     recent_games_data = []
@@ -794,19 +530,25 @@ def human_stats():
         6: "Sat",
         7: "Sun",
     }
-    for _, row in rosters_df.head(top_n).iterrows():  # Limit to top_n recent games
-        game = db.session.query(Game).filter(Game.id == row["game_id"]).first()
-        visitor_team = (
-            db.session.query(Team).filter(Team.id == game.visitor_team_id).first()
-        )
-        home_team = db.session.query(Team).filter(Team.id == game.home_team_id).first()
+    goals = profile.goals
+    is_scorer = goals["goal_scorer_id"] == human_id
+    is_assist = (goals["assist_1_id"] == human_id) | (goals["assist_2_id"] == human_id)
+    goals_per_game = is_scorer.groupby(goals["game_id"]).sum().to_dict()
+    assists_per_game = is_assist.groupby(goals["game_id"]).sum().to_dict()
+    penalty_minutes_per_game = (
+        profile.penalties.groupby("game_id")["penalty_minutes"].agg(list).to_dict()
+    )
+    # Roster rows carry the game columns, so they stand in for Game objects
+    for game in profile.recent_games:  # Limit to top_n recent games
+        visitor_team = reference_data.team(game.visitor_team_id)
+        home_team = reference_data.team(game.home_team_id)
 
         # Fetch division and level information
-        division = db.session.query(Division).filter(Division.id == game.division_id).first()
+        division = reference_data.division(game.division_id)
         level = None
         level_short_name = ""
         if division and division.level_id:
-            level = db.session.query(Level).filter(Level.id == division.level_id).first()
+            level = reference_data.level(division.level_id)
             if level and level.short_name:
                 level_short_name = level.short_name
 
@@ -817,7 +559,7 @@ def human_stats():
         game_is_live = is_game_live(game, now)
 
         if game.status.startswith("Final"):
-            if game.home_team_id == row["team_id"]:
+            if game.home_team_id == game.team_id:
                 if game.home_final_score > game.visitor_final_score:
                     color = "#7CFC00"
                 elif game.home_final_score < game.visitor_final_score:
@@ -825,7 +567,7 @@ def human_stats():
                 else:
                     color = "black"
                 final_score = f"<span style='color:black;'>{game.visitor_final_score}</span> : <strong style='color:{color};'>{game.home_final_score}</strong>"
-            elif game.visitor_team_id == row["team_id"]:
+            elif game.visitor_team_id == game.team_id:
                 if game.visitor_final_score > game.home_final_score:
                     color = "#7CFC00"
                 elif game.visitor_final_score < game.home_final_score:
@@ -848,7 +590,7 @@ def human_stats():
                 (game.home_period_3_score or 0)
             )
 
-            if game.home_team_id == row["team_id"]:
+            if game.home_team_id == game.team_id:
                 if home_current_score > visitor_current_score:
                     color = "#7CFC00"
                 elif home_current_score < visitor_current_score:
@@ -856,7 +598,7 @@ def human_stats():
                 else:
                     color = "black"
                 final_score = f"<span style='color:black;'>{visitor_current_score}</span> : <strong style='color:{color};'>{home_current_score}</strong> (live)"
-            elif game.visitor_team_id == row["team_id"]:
+            elif game.visitor_team_id == game.team_id:
                 if visitor_current_score > home_current_score:
                     color = "#7CFC00"
                 elif visitor_current_score < home_current_score:
@@ -880,7 +622,7 @@ def human_stats():
                 (game.home_period_3_score or 0)
             )
 
-            if game.home_team_id == row["team_id"]:
+            if game.home_team_id == game.team_id:
                 if home_current_score > visitor_current_score:
                     color = "#7CFC00"
                 elif home_current_score < visitor_current_score:
@@ -888,7 +630,7 @@ def human_stats():
                 else:
                     color = "black"
                 final_score = f"<span style='color:black;'>{visitor_current_score}</span> : <strong style='color:{color};'>{home_current_score}</strong>"
-            elif game.visitor_team_id == row["team_id"]:
+            elif game.visitor_team_id == game.team_id:
                 if visitor_current_score > home_current_score:
                     color = "#7CFC00"
                 elif visitor_current_score < home_current_score:
@@ -903,33 +645,17 @@ def human_stats():
             final_score = "N/A"
 
         # Calculate player stats
-        goals_in_game = (
-            db.session.query(Goal)
-            .filter(Goal.game_id == game.id, Goal.goal_scorer_id == human_id)
-            .count()
-        )
-        assists_in_game = (
-            db.session.query(Goal)
-            .filter(
-                Goal.game_id == game.id,
-                (Goal.assist_1_id == human_id) | (Goal.assist_2_id == human_id),
-            )
-            .count()
-        )
+        goals_in_game = goals_per_game.get(game.game_id, 0)
+        assists_in_game = assists_per_game.get(game.game_id, 0)
 
         # Separate numeric and non-numeric penalty minutes
-        penalties = (
-            db.session.query(Penalty.penalty_minutes)
-            .filter(Penalty.game_id == game.id, Penalty.penalized_player_id == human_id)
-            .all()
-        )
         numeric_penalty_minutes = 0
         non_numeric_penalties = []
-        for penalty in penalties:
+        for penalty_minutes in penalty_minutes_per_game.get(game.game_id, []):
             try:
-                numeric_penalty_minutes += int(penalty.penalty_minutes)
+                numeric_penalty_minutes += int(penalty_minutes)
             except ValueError:
-                non_numeric_penalties.append(penalty.penalty_minutes)
+                non_numeric_penalties.append(penalty_minutes)
 
         player_stats = []
         if goals_in_game > 0:
@@ -942,106 +668,57 @@ def human_stats():
         player_stats_str = " ".join(player_stats)
 
         # Make the team for which the human played bold
-        if game.home_team_id == row["team_id"]:
+        if game.home_team_id == game.team_id:
             team_names = f"<a href='{url_for('team_stats.team_stats', team_id=visitor_team.id)}'>{visitor_team.name}</a> at <strong><a href='{url_for('team_stats.team_stats', team_id=home_team.id)}'>{home_team.name}</a></strong>"
         else:
             team_names = f"<strong><a href='{url_for('team_stats.team_stats', team_id=visitor_team.id)}'>{visitor_team.name}</a></strong> at <a href='{url_for('team_stats.team_stats', team_id=home_team.id)}'>{home_team.name}</a>"
 
         recent_games_data.append(
             {
-                "date_time": f"<a href='{url_for('game_card.game_card', game_id=game.id)}'>{date_time}</a>",
+                "date_time": f"<a href='{url_for('game_card.game_card', game_id=game.game_id)}'>{date_time}</a>",
                 "team_names": team_names,
                 "level": level_short_name,
-                "final_score": f"<a href='{url_for('game_card.game_card', game_id=game.id)}'>{final_score}</a>",
+                "final_score": f"<a href='{url_for('game_card.game_card', game_id=game.game_id)}'>{final_score}</a>",
                 "player_stats": player_stats_str,
             }
         )
 
     # ── Goals & Assists by Team + Season ─────────────────────────────────────
-    # Count goals where this player is the scorer
-    goals_rows = (
-        db.session.query(
-            Season.season_name,
-            Season.season_number,
-            Team.id.label("team_id"),
-            Team.name.label("team_name"),
-            db.func.count(Goal.id).label("goals"),
+    # Count goals and assists (both primary and secondary) per season and team
+    season_team_points = (
+        goals.assign(
+            goals=is_scorer.astype(int),
+            assists=(goals["assist_1_id"] == human_id).astype(int)
+            + (goals["assist_2_id"] == human_id).astype(int),
         )
-        .join(Game, Goal.game_id == Game.id)
-        .join(Division, Game.division_id == Division.id)
-        .join(Season, Division.season_id == Season.id)
-        .join(Team, Goal.scoring_team_id == Team.id)
-        .filter(Goal.goal_scorer_id == human_id)
-        .group_by(Season.season_number, Season.season_name, Team.id, Team.name)
-        .all()
+        .groupby(["season_id", "scoring_team_id"])[["goals", "assists"]]
+        .sum()
+        .reset_index()
     )
 
-    # Count assists (both primary and secondary)
-    assist1_rows = (
-        db.session.query(
-            Season.season_name,
-            Season.season_number,
-            Team.id.label("team_id"),
-            Team.name.label("team_name"),
-            db.func.count(Goal.id).label("assists"),
-        )
-        .join(Game, Goal.game_id == Game.id)
-        .join(Division, Game.division_id == Division.id)
-        .join(Season, Division.season_id == Season.id)
-        .join(Team, Goal.scoring_team_id == Team.id)
-        .filter(Goal.assist_1_id == human_id)
-        .group_by(Season.season_number, Season.season_name, Team.id, Team.name)
-        .all()
-    )
-    assist2_rows = (
-        db.session.query(
-            Season.season_name,
-            Season.season_number,
-            Team.id.label("team_id"),
-            Team.name.label("team_name"),
-            db.func.count(Goal.id).label("assists"),
-        )
-        .join(Game, Goal.game_id == Game.id)
-        .join(Division, Game.division_id == Division.id)
-        .join(Season, Division.season_id == Season.id)
-        .join(Team, Goal.scoring_team_id == Team.id)
-        .filter(Goal.assist_2_id == human_id)
-        .group_by(Season.season_number, Season.season_name, Team.id, Team.name)
-        .all()
-    )
+    def season_team_key(season_id, team_id):
+        season = reference_data.season(season_id)
+        team = reference_data.team(team_id)
+        if season is None or team is None:
+            return None
+        return (season.season_number, season.season_name, team.id, team.name)
 
-    # Count games played per team+season (skater role only)
-    gp_rows = (
-        db.session.query(
-            Season.season_number,
-            Season.season_name,
-            GameRoster.team_id,
-            Team.name.label("team_name"),
-            db.func.count(db.distinct(GameRoster.game_id)).label("gp"),
-        )
-        .join(Game, GameRoster.game_id == Game.id)
-        .join(Division, Game.division_id == Division.id)
-        .join(Season, Division.season_id == Season.id)
-        .join(Team, GameRoster.team_id == Team.id)
-        .filter(GameRoster.human_id == human_id, GameRoster.role != "G")
-        .group_by(Season.season_number, Season.season_name, GameRoster.team_id, Team.name)
-        .all()
-    )
-
-    # Merge into dict keyed by (season_number, season_name, team_id, team_name)
+    # Merge into dict keyed by (season_number, season_name, team_id, team_name),
+    # with games played per team+season (skater role only)
     stats_map = {}
-    for r in gp_rows:
-        key = (r.season_number, r.season_name, r.team_id, r.team_name)
-        stats_map.setdefault(key, {"goals": 0, "assists": 0, "gp": 0})
-        stats_map[key]["gp"] = r.gp
-    for r in goals_rows:
-        key = (r.season_number, r.season_name, r.team_id, r.team_name)
+    for r in profile.team_season_games:
+        key = season_team_key(r.season_id, r.team_id)
+        if key is None:
+            continue
         stats_map.setdefault(key, {"goals": 0, "assists": 0, "gp": 0})
-        stats_map[key]["goals"] += r.goals
-    for r in assist1_rows + assist2_rows:
-        key = (r.season_number, r.season_name, r.team_id, r.team_name)
+        stats_map[key]["gp"] += r.gp
+    for r in season_team_points.itertuples(index=False):
+        key = season_team_key(r.season_id, r.scoring_team_id)
+        if key is None:
+            continue
         stats_map.setdefault(key, {"goals": 0, "assists": 0, "gp": 0})
-        stats_map[key]["assists"] += r.assists
+        stats_map[key]["goals"] += int(r.goals)
+        stats_map[key]["assists"] += int(r.assists)
 
     goals_by_team_season = [
         {
@@ -1058,14 +735,14 @@ def human_stats():
         )
     ]
 
-    return render_template(
-        "human_stats.html",
+    return dict(
         display_name=display_name,
         roles_data=roles_data if len(roles_data) > 0 else [],
         most_games_played=most_games_played,
         teammates=teammates,
         games_against_skaters=games_against_skaters,
-        plot_div=plot_div,
+        plot_json=plot_json,
+        plotly_js_url=PLOTLY_JS_URL,
         recent_games_data=recent_games_data,
         goals_by_team_season=goals_by_team_season,
     )
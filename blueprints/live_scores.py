@@ -0,0 +1,26 @@
+"""
+Live scores — /api/live_scores (JSON) and /api/live_scores/stream (SSE).
+"""
+from flask import Blueprint, Response, jsonify
+
+from live_scores import feed_row, live_scores
+
+live_scores_bp = Blueprint("live_scores", __name__)
+
+
+@live_scores_bp.route("/api/live_scores")
+def live_scores_json():
+    return jsonify({"games": [feed_row(row) for row in live_scores.games()]})
+
+
+@live_scores_bp.route("/api/live_scores/stream")
+def live_scores_stream():
+    stream = live_scores.open_stream()
+    if stream is None:
+        # The page falls back to polling /api/live_scores
+        return jsonify({"error": "Too many live score streams"}), 503
+    response = Response(stream, mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Tell nginx not to buffer the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -6,9 +6,11 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from flask import Blueprint, jsonify, redirect, render_template, request, url_for
-from hockey_blast_common_lib.models import (Division, Game, Location, Team, db)
+from hockey_blast_common_lib.models import (Division, Game, Location, db)
 from jinja2 import Environment
+from conditional_get import conditional
 from game_utils import is_game_live
+from reference_data import reference_data
 
 location_bp = Blueprint("location", __name__)
 
@@ -34,7 +36,7 @@ def location():
     other_rinks = []
 
     if location_id:
-        location_obj = db.session.query(Location).filter_by(id=location_id).first()
+        location_obj = reference_data.location(location_id)
 
         # Define Sharks Ice San Jose rinks group (alphabetically sorted)
         sharks_ice_rinks = [
@@ -135,10 +137,8 @@ def filter_location_games():
         if game.home_team_id is None or game.visitor_team_id is None:
             continue
 
-        visitor_team = (
-            db.session.query(Team).filter(Team.id == game.visitor_team_id).first()
-        )
-        home_team = db.session.query(Team).filter(Team.id == game.home_team_id).first()
+        visitor_team = reference_data.team(game.visitor_team_id)
+        home_team = reference_data.team(game.home_team_id)
 
         # Determine if game is currently live using shared utility function
         is_in_progress = is_game_live(game, now)
@@ -250,6 +250,7 @@ def filter_location_games():
 
 
 @location_bp.route("/rinks", methods=["GET"])
+@conditional()
 def rinks():
     # Get all locations from database
     locations = db.session.query(Location).all()
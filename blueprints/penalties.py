@@ -1,12 +1,15 @@
 from datetime import datetime, timedelta
 
 from flask import Blueprint, jsonify, render_template, request, url_for
-from hockey_blast_common_lib.models import (Division, Game, GameRoster, Human,
-                                            Organization, db)
+from hockey_blast_common_lib.models import Game, GameRoster, Human, db
 from hockey_blast_common_lib.stats_models import (DivisionStatsSkater,
                                                   LevelStatsSkater,
                                                   OrgStatsSkater)
 from hockey_blast_common_lib.stats_utils import ALL_ORGS_ID
+from sqlalchemy.orm import aliased
+
+from conditional_get import conditional
+from reference_data import reference_data
 
 penalties_bp = Blueprint("penalties", __name__)
 
@@ -23,8 +26,9 @@ ACTIVE_PLAYER_WINDOW = timedelta(days=90)
 
 
 @penalties_bp.route("/penalties", methods=["GET"])
+@conditional()
 def penalties():
-    organizations = db.session.query(Organization).all()
+    organizations = reference_data.organizations()
     top_n = request.args.get("top_n", default=50, type=int)
     org_id = request.args.get("org_id", default=ALL_ORGS_ID, type=int)
     level_id = request.args.get("level_id")
@@ -91,15 +95,7 @@ def filter_penalties():
             top_n_to_fetch = int(top_n * COEFF_ORG)
 
     if level_id and season_id:
-        division = (
-            db.session.query(Division)
-            .filter(
-                Division.org_id == org_id,
-                Division.level_id == level_id,
-                Division.season_id == season_id,
-            )
-            .first()
-        )
+        division = reference_data.find_division(org_id, level_id, season_id)
         if not division:
             return jsonify({"error": "Division not found"}), 404
         stats_model = DivisionStatsSkater
@@ -133,86 +129,58 @@ def filter_penalties():
     else:
         human_ids = None
 
-    if penalty_type == "gm":
-        penalties_data = (
-            db.session.query(stats_model, Human)
-            .join(Human, stats_model.human_id == Human.id)
-            .filter(
-                getattr(stats_model, filter_column) == filter_value,
-                stats_model.games_participated >= min_games,
-                Human.id.in_(human_ids) if human_ids else True,
+    # First and last game dates come with the rows (outer joins on two
+    # aliases of Game) instead of one query per row and date
+    FirstGame = aliased(Game)
+    LastGame = aliased(Game)
+
+    def leaderboard(rank_column):
+        return (
+            db.session.query(
+                stats_model,
+                Human,
+                FirstGame.date.label("first_game_date"),
+                LastGame.date.label("last_game_date"),
             )
-            .order_by(stats_model.gm_penalties_rank)
-            .limit(top_n_to_fetch)
-            .all()
-        )
-        penalties_per_game_data = (
-            db.session.query(stats_model, Human)
             .join(Human, stats_model.human_id == Human.id)
+            .outerjoin(FirstGame, FirstGame.id == stats_model.first_game_id)
+            .outerjoin(LastGame, LastGame.id == stats_model.last_game_id)
             .filter(
                 getattr(stats_model, filter_column) == filter_value,
                 stats_model.games_participated >= min_games,
                 Human.id.in_(human_ids) if human_ids else True,
             )
-            .order_by(stats_model.gm_penalties_per_game_rank)
+            .order_by(rank_column)
             .limit(top_n_to_fetch)
             .all()
         )
+
+    if penalty_type == "gm":
+        penalties_data = leaderboard(stats_model.gm_penalties_rank)
+        penalties_per_game_data = leaderboard(stats_model.gm_penalties_per_game_rank)
     else:
-        penalties_data = (
-            db.session.query(stats_model, Human)
-            .join(Human, stats_model.human_id == Human.id)
-            .filter(
-                getattr(stats_model, filter_column) == filter_value,
-                stats_model.games_participated >= min_games,
-                Human.id.in_(human_ids) if human_ids else True,
-            )
-            .order_by(stats_model.penalties_rank)
-            .limit(top_n_to_fetch)
-            .all()
-        )
-        penalties_per_game_data = (
-            db.session.query(stats_model, Human)
-            .join(Human, stats_model.human_id == Human.id)
-            .filter(
-                getattr(stats_model, filter_column) == filter_value,
-                stats_model.games_participated >= min_games,
-                Human.id.in_(human_ids) if human_ids else True,
-            )
-            .order_by(stats_model.penalties_per_game_rank)
-            .limit(top_n_to_fetch)
-            .all()
-        )
+        penalties_data = leaderboard(stats_model.penalties_rank)
+        penalties_per_game_data = leaderboard(stats_model.penalties_per_game_rank)
 
     if player_status == "active":
         active_threshold_date = datetime.now() - ACTIVE_PLAYER_WINDOW
-        penalties_data = [
-            (stats, human)
-            for stats, human in penalties_data
-            if stats.last_game_id
-            and datetime.combine(
-                db.session.query(Game.date)
-                .filter(Game.id == stats.last_game_id)
-                .first()[0],
-                datetime.min.time(),
+
+        def is_active(row):
+            return (
+                row.last_game_date is not None
+                and datetime.combine(row.last_game_date, datetime.min.time())
+                >= active_threshold_date
             )
-            >= active_threshold_date
-        ]
+
+        penalties_data = [row for row in penalties_data if is_active(row)]
         penalties_per_game_data = [
-            (stats, human)
-            for stats, human in penalties_per_game_data
-            if stats.last_game_id
-            and datetime.combine(
-                db.session.query(Game.date)
-                .filter(Game.id == stats.last_game_id)
-                .first()[0],
-                datetime.min.time(),
-            )
-            >= active_threshold_date
+            row for row in penalties_per_game_data if is_active(row)
         ]
 
     penalties_results = []
-    for index, (stats, human) in enumerate(penalties_data[:top_n], start=1):
+    for index, (stats, human, first_game_date, last_game_date) in enumerate(
+        penalties_data[:top_n], start=1
+    ):
         if penalty_type == "gm":
             penalties = stats.gm_penalties
         else:
@@ -223,13 +191,13 @@ def filter_penalties():
             )
             link = f'<a href="{url_for("human_stats.human_stats", human_id=human.id, top_n=20)}">{link_text}</a>'
             first_game_link = (
-                f"<a href='{url_for('game_card.game_card', game_id=stats.first_game_id)}'>{db.session.query(Game.date).filter(Game.id == stats.first_game_id).first()[0].strftime('%m/%d/%y')}</a>"
-                if stats.first_game_id
+                f"<a href='{url_for('game_card.game_card', game_id=stats.first_game_id)}'>{first_game_date.strftime('%m/%d/%y')}</a>"
+                if first_game_date
                 else None
             )
             last_game_link = (
-                f"<a href='{url_for('game_card.game_card', game_id=stats.last_game_id)}'>{db.session.query(Game.date).filter(Game.id == stats.last_game_id).first()[0].strftime('%m/%d/%y')}</a>"
-                if stats.last_game_id
+                f"<a href='{url_for('game_card.game_card', game_id=stats.last_game_id)}'>{last_game_date.strftime('%m/%d/%y')}</a>"
+                if last_game_date
                 else None
             )
             penalties_results.append(
@@ -243,7 +211,9 @@ def filter_penalties():
             )
 
     penalties_per_game_results = []
-    for index, (stats, human) in enumerate(penalties_per_game_data[:top_n], start=1):
+    for index, (stats, human, first_game_date, last_game_date) in enumerate(
+        penalties_per_game_data[:top_n], start=1
+    ):
         if penalty_type == "gm":
             penalties_per_game = stats.gm_penalties_per_game
         else:
@@ -254,13 +224,13 @@ def filter_penalties():
             )
             link = f'<a href="{url_for("human_stats.human_stats", human_id=human.id, top_n=20)}">{link_text}</a>'
             first_game_link = (
-                f"<a href='{url_for('game_card.game_card', game_id=stats.first_game_id)}'>{db.session.query(Game.date).filter(Game.id == stats.first_game_id).first()[0].strftime('%m/%d/%y')}</a>"
-                if stats.first_game_id
+                f"<a href='{url_for('game_card.game_card', game_id=stats.first_game_id)}'>{first_game_date.strftime('%m/%d/%y')}</a>"
+                if first_game_date
                 else None
             )
             last_game_link = (
-                f"<a href='{url_for('game_card.game_card', game_id=stats.last_game_id)}'>{db.session.query(Game.date).filter(Game.id == stats.last_game_id).first()[0].strftime('%m/%d/%y')}</a>"
-                if stats.last_game_id
+                f"<a href='{url_for('game_card.game_card', game_id=stats.last_game_id)}'>{last_game_date.strftime('%m/%d/%y')}</a>"
+                if last_game_date
                 else None
             )
             penalties_per_game_results.append(
@@ -1,15 +1,10 @@
-import matplotlib
 from flask import Blueprint, render_template
 from flask_table import Col, Table
-
-matplotlib.use("Agg")
-import base64
-import io
-
-import matplotlib.pyplot as plt
 from hockey_blast_common_lib.models import (Division, Game,
                                             GameRoster, Season, db)
 
+from chart_artifacts import chart_artifacts, line_chart_png
+
 players_per_season_bp = Blueprint("players_per_season", __name__)
 
 
@@ -30,8 +25,7 @@ class SeasonItem(object):
         self.num_players = num_players
 
 
-@players_per_season_bp.route("/players_per_season")
-def players_per_season():
+def load_players_per_season():
     results = (
         db.session.query(
             Season.season_number,
@@ -49,49 +43,37 @@ def players_per_season():
         )
         .all()
     )
+    return [list(result) for result in results]
+
+
+def render_players_per_season(rows):
+    items = [SeasonItem(*row) for row in rows]
+    return line_chart_png(
+        [item.season_name for item in items],
+        [item.num_players for item in items],
+        "Season Name",
+        "Number of Players",
+        "Number of Players per Season",
+    )
+
+
+chart_artifacts.register(
+    "players_per_season", load_players_per_season, render_players_per_season
+)
 
-    items = [
-        SeasonItem(
-            result.season_number,
-            result.season_name,
-            result.start_date,
-            result.end_date,
-            result.num_players,
-        )
-        for result in results
-    ]
-    table = SeasonTable(items)
-
-    # Generate plot
-    season_names = [item.season_name for item in items]
-    num_players = [item.num_players for item in items]
-    plt.figure(figsize=(20, 10))  # Increase figure size
-    plt.plot(season_names, num_players, marker="o")
-    plt.xlabel("Season Name")
-    plt.ylabel("Number of Players")
-    plt.title("Number of Players per Season")
-    plt.grid(True)
-    plt.xticks(
-        rotation=45, ha="right", fontsize=10
-    )  # Rotate X-axis labels for better readability and adjust font size
-
-    # Annotate each point with the Y-axis value
-    for i, txt in enumerate(num_players):
-        plt.annotate(
-            txt,
-            (season_names[i], num_players[i]),
-            textcoords="offset points",
-            xytext=(0, 10),
-            ha="center",
-        )
 
-    # Save plot to a string buffer
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    plot_url = base64.b64encode(buf.getvalue()).decode("utf8")
-    plt.close()
+@players_per_season_bp.route("/players_per_season")
+def players_per_season():
+    chart = chart_artifacts.get("players_per_season")
+    items = [SeasonItem(*row) for row in chart.rows]
 
     return render_template(
-        "players_per_season.html", players_per_season=items, plot_url=plot_url
+        "players_per_season.html",
+        players_per_season=items,
+        plot_version=chart.version,
     )
+
+
+@players_per_season_bp.route("/players_per_season.png")
+def players_per_season_png():
+    return chart_artifacts.png_response("players_per_season")
@@ -5,6 +5,8 @@ import logging
 from flask import Blueprint, render_template, jsonify
 from sqlalchemy import text
 
+from conditional_get import conditional
+
 logger = logging.getLogger(__name__)
 playoffs_bp = Blueprint("playoffs", __name__)
 
@@ -16,10 +18,12 @@ ROUND_ORDER = {
 }
 
 @playoffs_bp.route("/playoffs")
+@conditional()
 def playoffs():
     return render_template("playoffs.html")
 
 @playoffs_bp.route("/api/playoffs")
+@conditional()
 def playoffs_api():
     from hockey_blast_common_lib.models import db
     sql = text("""
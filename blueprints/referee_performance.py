@@ -1,12 +1,16 @@
 
 from flask import Blueprint, jsonify, render_template, request, url_for
-from hockey_blast_common_lib.models import (Division, Game, Human, Level,
+from hockey_blast_common_lib.models import (Division, Human, Level,
                                             Organization, Season, db)
 from hockey_blast_common_lib.stats_models import (DivisionStatsReferee,
                                                   LevelStatsReferee,
                                                   OrgStatsReferee)
 from hockey_blast_common_lib.stats_utils import ALL_ORGS_ID
 
+from conditional_get import conditional
+from performance_details import load_performance_details
+from reference_data import reference_data
+
 from .referee_performance_dropdowns import (filter_levels, filter_seasons,
                                             filter_teams)
 
@@ -29,7 +33,7 @@ def format_date_link(date, game_id):
 
 
 def append_referee_performance_result(
-    referee_performance_results, stats, context, context_value=0
+    referee_performance_results, stats, context, context_value=0, details=None
 ):
     if isinstance(stats, dict):
         human_id = stats.get("human_id")
@@ -62,16 +66,8 @@ def append_referee_performance_result(
         gm_per_game_rank = stats.gm_per_game_rank
         total_in_rank = stats.total_in_rank
 
-    first_game = (
-        db.session.query(Game.date).filter(Game.id == first_game_id).first()
-        if first_game_id
-        else None
-    )
-    last_game = (
-        db.session.query(Game.date).filter(Game.id == last_game_id).first()
-        if last_game_id
-        else None
-    )
+    if details is None:
+        details = load_performance_details([stats])
     referee_performance_results.append(
         {
             "human_id": human_id,
@@ -93,17 +89,16 @@ def append_referee_performance_result(
             "gm_given_rank": format_rank_percentile(gm_given_rank, total_in_rank),
             "gm_per_game": f"{gm_per_game:.2f}",
             "gm_per_game_rank": format_rank_percentile(gm_per_game_rank, total_in_rank),
-            "first_game": (
-                format_date_link(first_game.date, first_game_id) if first_game else None
-            ),
-            "last_game": (
-                format_date_link(last_game.date, last_game_id) if last_game else None
+            "first_game": format_date_link(
+                details.game_date(first_game_id), first_game_id
             ),
+            "last_game": format_date_link(details.game_date(last_game_id), last_game_id),
         }
     )
 
 
 @referee_performance_bp.route("/", methods=["GET"])
+@conditional()
 def referee_performance():
     human_id = request.args.get("human_id")
     human_name = "All Referees"
@@ -194,15 +189,12 @@ def filter_referee_performance():
             # Remove the limit here, we'll apply it after sorting
             org_stats = query.order_by(OrgStatsReferee.org_id).all()
 
+            details = load_performance_details(org_stats)
             for stats in org_stats:
-                organization = (
-                    db.session.query(Organization)
-                    .filter(Organization.id == stats.org_id)
-                    .first()
-                )
+                organization = reference_data.organization(stats.org_id)
                 context = organization.organization_name
                 append_referee_performance_result(
-                    referee_performance_results, stats, context
+                    referee_performance_results, stats, context, details=details
                 )
 
             # Apply sorting, then min_games filter, then limit
@@ -217,9 +209,7 @@ def filter_referee_performance():
             referee_performance_results = referee_performance_results[:top_n]
     else:
         # Get organization name
-        organization = (
-            db.session.query(Organization).filter(Organization.id == org_id).first()
-        )
+        organization = reference_data.organization(org_id)
         org_name = (
             organization.organization_name if organization else "Selected Organization"
         )
@@ -237,18 +227,18 @@ def filter_referee_performance():
             # Remove limit from the query, get all results first
             org_stats = query.order_by(OrgStatsReferee.penalties_per_game_rank).all()
 
+            details = load_performance_details(org_stats)
             for stats in org_stats:
-                human = (
-                    db.session.query(Human).filter(Human.id == stats.human_id).first()
-                )
-                if human:
-                    link_text = f"{human.first_name} {human.middle_name} {human.last_name}".strip()
-                    link = f'<a href="{url_for("human_stats.human_stats", human_id=human.id, top_n=20)}">{link_text}</a>'
-                    append_referee_performance_result(all_referees_results, stats, link)
+                link_text = details.human_name(stats.human_id)
+                if link_text is not None:
+                    link = f'<a href="{url_for("human_stats.human_stats", human_id=stats.human_id, top_n=20)}">{link_text}</a>'
+                    append_referee_performance_result(
+                        all_referees_results, stats, link, details=details
+                    )
 
                     if human_id and human_id == stats.human_id:
                         append_referee_performance_result(
-                            referee_performance_results, stats, org_name
+                            referee_performance_results, stats, org_name, details=details
                         )
 
             # Apply proper sorting, then limit the results
@@ -290,14 +280,14 @@ def filter_referee_performance():
                 .all()
             )
 
+            details = load_performance_details(level_stats)
             for stats in level_stats:
-                human = (
-                    db.session.query(Human).filter(Human.id == stats.human_id).first()
-                )
-                if human:
-                    link_text = f"{human.first_name} {human.middle_name} {human.last_name}".strip()
-                    link = f'<a href="{url_for("human_stats.human_stats", human_id=human.id, top_n=20)}">{link_text}</a>'
-                    append_referee_performance_result(all_referees_results, stats, link)
+                link_text = details.human_name(stats.human_id)
+                if link_text is not None:
+                    link = f'<a href="{url_for("human_stats.human_stats", human_id=stats.human_id, top_n=20)}">{link_text}</a>'
+                    append_referee_performance_result(
+                        all_referees_results, stats, link, details=details
+                    )
 
             # Apply proper sorting, then limit the results
             all_referees_results.sort(
@@ -353,17 +343,13 @@ def filter_referee_performance():
                     .all()
                 )
 
+                details = load_performance_details(all_referees_stats)
                 for stats in all_referees_stats:
-                    player = (
-                        db.session.query(Human)
-                        .filter(Human.id == stats.human_id)
-                        .first()
-                    )
-                    if player:
-                        link_text = f"{player.first_name} {player.middle_name} {player.last_name}".strip()
-                        link = f'<a href="{url_for("human_stats.human_stats", human_id=player.id, top_n=20)}">{link_text}</a>'
+                    link_text = details.human_name(stats.human_id)
+                    if link_text is not None:
+                        link = f'<a href="{url_for("human_stats.human_stats", human_id=stats.human_id, top_n=20)}">{link_text}</a>'
                         append_referee_performance_result(
-                            all_referees_results, stats, link
+                            all_referees_results, stats, link, details=details
                         )
 
     # Sort the final results before returning
@@ -1,4 +1,3 @@
-import re
 from datetime import datetime, timedelta
 
 import pandas as pd
@@ -7,109 +6,78 @@ import plotly.io as pio
 from flask import Blueprint, current_app, jsonify, render_template, request
 from hockey_blast_common_lib.models import RequestLog, db
 
+from request_log_rollup import (TOTAL_PATH, RequestLogRollup, bucket_start,
+                                dashboard_paths, is_crawler,
+                                latency_percentiles)
+from sketches import HyperLogLog
+
 request_logs_bp = Blueprint("request_logs", __name__)
 
-# List of internal endpoints to filter out
-INTERNAL_ENDPOINTS = [
-    r"/dropdowns/.*",
-    r"/.*filter_.*",
-    r"/get_.*",
-    r"/request_logs.*",  # Exclude request_logs endpoints from plotting themselves
-]
-
-CRAWLER_USER_AGENTS = [
-    # Manual additions per eyeballing
-    "Google-Read-Aloud",
-    # Major Search Engines
-    "Google",
-    "Googlebot",
-    "Bingbot",
-    "Slurp",
-    "DuckDuckBot",
-    "Baiduspider",
-    "YandexBot",
-    "Sogou",
-    "Exabot",
-    "facebot",  # Facebook
-    "facebookexternalhit",
-    "ia_archiver",  # Alexa
-    # AI and Data Crawlers
-    "GPTBot",
-    "Bytespider",
-    "ClaudeBot",
-    "openai",
-    "InternetMeasurement",
-    "Amazonbot",
-    "CriteoBot",
-    # Pen-testing and Research
-    "zgrab",
-    "zmap",
-    "masscan",
-    "nmap",
-    "censys",
-    "shodan",
-    "httpx",
-    # Dev tools / CLI / Libraries
-    "curl",
-    "wget",
-    "python-requests",
-    "httpie",
-    "libwww-perl",
-    "Go-http-client",
-    "Apache-HttpClient",
-    "java",
-    "okhttp",
-    "axios",
-    "node-fetch",
-    "scrapy",
-    "aiohttp",
-    "RestSharp",
-    # Headless browsers
-    "HeadlessChrome",
-    "puppeteer",
-    "phantomjs",
-    "selenium",
-    "Playwright",
-    # Generic indicators
-    "bot",
-    "spider",
-    "crawler",
-    "scanner",
-    "probe",
-]
+# interval: (lookback, rollup granularity, pandas frequency)
+INTERVALS = {
+    "minutely": (timedelta(hours=1), "minute", "min"),
+    "hourly": (timedelta(hours=24), "hour", "H"),
+    "daily": (timedelta(days=30), "day", "D"),
+    "weekly": (timedelta(weeks=12), "day", "W"),
+    "monthly": (timedelta(days=365), "day", "M"),
+}
+
+
+def _count_unique_ips(sketches):
+    """Estimated distinct IPs of the merged sketches (about 1.6% error)."""
+    merged = HyperLogLog()
+    for data in sketches:
+        if data:
+            merged.merge(HyperLogLog.from_bytes(data))
+    return merged.count()
+
+
+def get_recent_requests(start_time, paths, top_n):
+    """Latest request per client IP, newest first."""
+    rows = (
+        db.session.query(
+            RequestLog.timestamp,
+            RequestLog.client_ip,
+            RequestLog.path,
+            RequestLog.user_agent,
+        )
+        .filter(RequestLog.timestamp >= start_time, RequestLog.path.in_(paths))
+        .order_by(RequestLog.id.desc())
+        .limit(top_n * 50)
+        .all()
+    )
+    recent = []
+    seen_ips = set()
+    for row in rows:
+        if row.client_ip in seen_ips or is_crawler(row.user_agent):
+            continue
+        seen_ips.add(row.client_ip)
+        recent.append(row._asdict())
+        if len(recent) >= top_n:
+            break
+    return recent
 
 
 def get_request_logs_data(interval, top_n=20):
-    now = datetime.now()
-    if interval == "minutely":
-        start_time = now - timedelta(hours=1)
-        freq = "min"
-    elif interval == "hourly":
-        start_time = now - timedelta(hours=24)
-        freq = "H"
-    elif interval == "daily":
-        start_time = now - timedelta(days=30)
-        freq = "D"
-    elif interval == "weekly":
-        start_time = now - timedelta(weeks=12)
-        freq = "W"
-    elif interval == "monthly":
-        start_time = now - timedelta(days=365)
-        freq = "M"
-    else:
+    if interval not in INTERVALS:
         return None, None, None, None, None, None, None, None, None
-
-    # Cap rows to prevent OOM/timeout on large intervals — sample evenly if over limit
-    MAX_ROWS = 50_000
-    total = db.session.query(RequestLog).filter(RequestLog.timestamp >= start_time).count()
-    q = db.session.query(RequestLog).filter(RequestLog.timestamp >= start_time).order_by(RequestLog.timestamp)
-    if total > MAX_ROWS:
-        # Take every Nth row to get a representative sample
-        step = max(1, total // MAX_ROWS)
-        logs = [row for i, row in enumerate(q.yield_per(1000)) if i % step == 0]
-    else:
-        logs = q.all()
-    if not logs:
+    lookback, granularity, freq = INTERVALS[interval]
+    start_time = bucket_start(datetime.now() - lookback, granularity)
+
+    rollups = (
+        db.session.query(
+            RequestLogRollup.bucket_start,
+            RequestLogRollup.path,
+            RequestLogRollup.request_count,
+            RequestLogRollup.unique_ips,
+        )
+        .filter(
+            RequestLogRollup.granularity == granularity,
+            RequestLogRollup.bucket_start >= start_time,
+        )
+        .all()
+    )
+    if not rollups:
         return (
             pd.Series([], dtype="int64"),
             pd.Series([], dtype="int64"),
@@ -123,90 +91,38 @@ def get_request_logs_data(interval, top_n=20):
         )
 
     df = pd.DataFrame(
-        [
-            (
-                log.timestamp,
-                log.path,
-                log.client_ip,
-                log.user_agent,
-                log.response_time_ms,
-            )
-            for log in logs
-        ],
-        columns=["timestamp", "path", "client_ip", "user_agent", "response_time_ms"],
+        rollups, columns=["bucket_start", "path", "request_count", "unique_ips"]
     )
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df.set_index("timestamp", inplace=True)
+    df["bucket_start"] = pd.to_datetime(df["bucket_start"])
+    df.set_index("bucket_start", inplace=True)
+    totals = df[df["path"] == TOTAL_PATH]
+    per_path = df[df["path"] != TOTAL_PATH]
 
-    # Filter out non-existing endpoints
-    registered_endpoints = [rule.rule for rule in current_app.url_map.iter_rules()]
-    df = df[df["path"].isin(registered_endpoints)]
-
-    # Filter out internal endpoints using regular expressions
-    for pattern in INTERNAL_ENDPOINTS:
-        df = df[~df["path"].str.match(pattern)]
-
-    # Filter out known crawlers by inspecting the user_agent field
-
-
-    pattern = re.compile("|".join(CRAWLER_USER_AGENTS), flags=re.IGNORECASE)
-    df = df[~df["user_agent"].str.contains(pattern, na=False)]
-
-    # for crawler in CRAWLER_USER_AGENTS:
-    #     df = df[~df['user_agent'].str.contains(crawler, case=False, na=False)]
-
-    request_counts = df.resample(freq).size()
-    unique_ip_counts = df.resample(freq)["client_ip"].nunique()
+    request_counts = totals.resample(freq)["request_count"].sum()
+    unique_ip_counts = totals.resample(freq)["unique_ips"].agg(_count_unique_ips)
 
     endpoint_counts = (
-        df.groupby("path").resample(freq).size().unstack(level=0, fill_value=0)
+        per_path.groupby("path")
+        .resample(freq)["request_count"]
+        .sum()
+        .unstack(level=0, fill_value=0)
     )
 
-    # Calculate response time aggregations
-    # Filter out None/null response times for cleaner stats
-    df_with_response_time = df[df["response_time_ms"].notna()]
-
-    if not df_with_response_time.empty:
-        # Overall response time stats by time window
-        response_time_stats = df_with_response_time.resample(freq)[
-            "response_time_ms"
-        ].agg(["median", "mean", "quantile"])
-        response_time_stats["p90"] = df_with_response_time.resample(freq)[
-            "response_time_ms"
-        ].quantile(0.9)
-        response_time_stats["p95"] = df_with_response_time.resample(freq)[
-            "response_time_ms"
-        ].quantile(0.95)
-
-        # Response time stats by endpoint
-        endpoint_response_times = (
-            df_with_response_time.groupby("path")["response_time_ms"]
-            .agg(["median", "mean", "count"])
-            .sort_values("median", ascending=False)
-        )
-    else:
-        # Empty DataFrames if no response time data
-        response_time_stats = pd.DataFrame()
-        endpoint_response_times = pd.DataFrame()
-
-    # Calculate average number of hits per session
-    session_counts = df.groupby("client_ip").resample(freq).size()
-    session_counts = session_counts[session_counts > 0]  # Filter out zeroes
-    session_stats = session_counts.groupby(level=1).agg(["mean", "min", "max"])
-
-    # Sample logs grouped by client_ip
-    sample_logs = (
-        df.reset_index()  # Ensure `timestamp` is preserved
-        .groupby("client_ip")
-        .apply(lambda group: group.iloc[0])  # Take the first log per client_ip
-        .sort_values(by="timestamp", ascending=False)
-        .head(top_n)
-        .reset_index(drop=True)
-    )
+    # Average hits per IP in each window.  The minimum and maximum per IP
+    # cannot be merged from the rollup buckets, so only the mean is charted
+    session_stats = pd.DataFrame(
+        {"mean": request_counts / unique_ip_counts.where(unique_ip_counts > 0)}
+    ).dropna()
 
-    sample_logs_data = sample_logs[
-        ["timestamp", "client_ip", "path", "user_agent"]
-    ].to_dict(orient="records")
+    (
+        response_time_stats,
+        endpoint_response_times,
+        endpoint_response_time_series,
+    ) = latency_percentiles(granularity, start_time, freq)
+
+    sample_logs_data = get_recent_requests(
+        start_time, dashboard_paths(current_app), top_n
+    )
 
     return (
         request_counts,
@@ -216,7 +132,7 @@ def get_request_logs_data(interval, top_n=20):
         sample_logs_data,
         response_time_stats,
         endpoint_response_times,
-        df_with_response_time,
+        endpoint_response_time_series,
         freq,
     )
 
@@ -240,7 +156,7 @@ def request_logs():
         sample_logs_data,
         response_time_stats,
         endpoint_response_times,
-        df_with_response_time,
+        endpoint_response_time_series,
         freq,
     ) = get_request_logs_data(interval, top_n)
 
@@ -295,7 +211,7 @@ def request_logs():
             x=unique_ip_counts.index,
             y=unique_ip_counts.values,
             mode="lines",
-            name="Unique IPs",
+            name="Unique IPs (approx.)",
             line=dict(color="#17a2b8"),
         )
     ]
@@ -314,25 +230,13 @@ def request_logs():
     )
     unique_ip_plot_div = pio.to_html(unique_ip_plot_fig, full_html=False)
 
-    # Plot for average hits per session
+    # Plot for average hits per IP
     avg_hits_plot_data = [
         go.Scatter(
             x=session_stats.index,
             y=session_stats["mean"],
             mode="lines",
-            name="Avg Hits per Session",
-        ),
-        go.Scatter(
-            x=session_stats.index,
-            y=session_stats["min"],
-            mode="lines",
-            name="Min Hits per Session",
-        ),
-        go.Scatter(
-            x=session_stats.index,
-            y=session_stats["max"],
-            mode="lines",
-            name="Max Hits per Session",
+            name="Avg Hits per IP (approx.)",
         ),
     ]
 
@@ -351,21 +255,16 @@ def request_logs():
     # Create response time plots per endpoint (similar to request logs style)
     median_response_time_plot_div = ""
     p90_response_time_plot_div = ""
+    endpoint_response_time_plot_div = ""
 
-    if not df_with_response_time.empty:
-        # Calculate per-endpoint response times over time
-        endpoint_median_response_times = (
-            df_with_response_time.groupby("path")
-            .resample(freq)["response_time_ms"]
-            .median()
-            .unstack(level=0, fill_value=0)
-        )
-        endpoint_p90_response_times = (
-            df_with_response_time.groupby("path")
-            .resample(freq)["response_time_ms"]
-            .quantile(0.9)
-            .unstack(level=0, fill_value=0)
-        )
+    if not endpoint_response_time_series.empty:
+        # Per-endpoint response times over time
+        endpoint_median_response_times = endpoint_response_time_series.pivot(
+            index="bucket", columns="path", values="median"
+        ).fillna(0)
+        endpoint_p90_response_times = endpoint_response_time_series.pivot(
+            index="bucket", columns="path", values="p90"
+        ).fillna(0)
 
         # Calculate total response time data for sorting (same as endpoint hits logic)
         endpoint_response_totals = []
@@ -533,7 +432,7 @@ def request_logs_data():
         sample_logs_data,
         response_time_stats,
         endpoint_response_times,
-        df_with_response_time,
+        endpoint_response_time_series,
         freq,
     ) = get_request_logs_data(interval)
 
@@ -561,8 +460,6 @@ def request_logs_data():
             for simplified_endpoint, total_hits in endpoint_hits
         },
         "avg_hits_per_session": session_stats["mean"].values.tolist(),
-        "min_hits_per_session": session_stats["min"].values.tolist(),
-        "max_hits_per_session": session_stats["max"].values.tolist(),
         "response_time_median": (
             response_time_stats["median"].values.tolist()
             if not response_time_stats.empty
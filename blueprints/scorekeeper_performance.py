@@ -1,12 +1,16 @@
 
 from flask import Blueprint, jsonify, render_template, request, url_for
-from hockey_blast_common_lib.models import (Game, Human, Level,
+from hockey_blast_common_lib.models import (Human, Level,
                                             Organization,
                                             ScorekeeperSaveQuality, Season,
                                             db)
 from hockey_blast_common_lib.stats_models import OrgStatsScorekeeper
 from hockey_blast_common_lib.stats_utils import ALL_ORGS_ID
 
+from conditional_get import conditional
+from performance_details import load_performance_details
+from reference_data import reference_data
+
 from .scorekeeper_performance_dropdowns import (
     filter_levels, filter_seasons, filter_teams)
 
@@ -29,7 +33,12 @@ def format_date_link(date, game_id):
 
 
 def append_scorekeeper_performance_result(
-    scorekeeper_performance_results, stats, context, context_value=0, quality_data=None
+    scorekeeper_performance_results,
+    stats,
+    context,
+    context_value=0,
+    quality_data=None,
+    details=None,
 ):
     if isinstance(stats, dict):
         human_id = stats.get("human_id")
@@ -54,16 +63,8 @@ def append_scorekeeper_performance_result(
         sog_per_game_rank = stats.sog_per_game_rank
         total_in_rank = stats.total_in_rank
 
-    first_game = (
-        db.session.query(Game.date).filter(Game.id == first_game_id).first()
-        if first_game_id
-        else None
-    )
-    last_game = (
-        db.session.query(Game.date).filter(Game.id == last_game_id).first()
-        if last_game_id
-        else None
-    )
+    if details is None:
+        details = load_performance_details([stats])
 
     # Get quality metrics if available
     avg_saves_5sec = 0
@@ -103,12 +104,10 @@ def append_scorekeeper_performance_result(
             "max_saves_5sec": max_saves_5sec,
             "max_saves_20sec": max_saves_20sec,
             "quality_score": quality_score,
-            "first_game": (
-                format_date_link(first_game.date, first_game_id) if first_game else None
-            ),
-            "last_game": (
-                format_date_link(last_game.date, last_game_id) if last_game else None
+            "first_game": format_date_link(
+                details.game_date(first_game_id), first_game_id
             ),
+            "last_game": format_date_link(details.game_date(last_game_id), last_game_id),
         }
     )
 
@@ -148,6 +147,7 @@ def get_scorekeeper_quality_data(human_id):
 
 
 @scorekeeper_performance_bp.route("/", methods=["GET"])
+@conditional()
 def scorekeeper_performance():
     human_id = request.args.get("human_id")
     human_name = "All Scorekeepers"
@@ -238,12 +238,9 @@ def filter_scorekeeper_performance():
             # Remove the limit here, we'll apply it after sorting
             org_stats = query.order_by(OrgStatsScorekeeper.org_id).all()
 
+            details = load_performance_details(org_stats)
             for stats in org_stats:
-                organization = (
-                    db.session.query(Organization)
-                    .filter(Organization.id == stats.org_id)
-                    .first()
-                )
+                organization = reference_data.organization(stats.org_id)
                 context = organization.organization_name
                 quality_data = get_scorekeeper_quality_data(stats.human_id)
                 append_scorekeeper_performance_result(
@@ -251,6 +248,7 @@ def filter_scorekeeper_performance():
                     stats,
                     context,
                     quality_data=quality_data,
+                    details=details,
                 )
 
             # Apply sorting, then min_games filter, then limit
@@ -265,9 +263,7 @@ def filter_scorekeeper_performance():
             scorekeeper_performance_results = scorekeeper_performance_results[:top_n]
     else:
         # Get organization name
-        organization = (
-            db.session.query(Organization).filter(Organization.id == org_id).first()
-        )
+        organization = reference_data.organization(org_id)
         org_name = (
             organization.organization_name if organization else "Selected Organization"
         )
@@ -285,16 +281,18 @@ def filter_scorekeeper_performance():
             # Remove limit from the query, get all results first
             org_stats = query.order_by(OrgStatsScorekeeper.sog_per_game_rank).all()
 
+            details = load_performance_details(org_stats)
             for stats in org_stats:
-                human = (
-                    db.session.query(Human).filter(Human.id == stats.human_id).first()
-                )
-                if human:
-                    link_text = f"{human.first_name} {human.middle_name} {human.last_name}".strip()
-                    link = f'<a href="{url_for("human_stats.human_stats", human_id=human.id, top_n=20)}">{link_text}</a>'
+                link_text = details.human_name(stats.human_id)
+                if link_text is not None:
+                    link = f'<a href="{url_for("human_stats.human_stats", human_id=stats.human_id, top_n=20)}">{link_text}</a>'
                     quality_data = get_scorekeeper_quality_data(stats.human_id)
                     append_scorekeeper_performance_result(
-                        all_scorekeepers_results, stats, link, quality_data=quality_data
+                        all_scorekeepers_results,
+                        stats,
+                        link,
+                        quality_data=quality_data,
+                        details=details,
                     )
 
                     if human_id and human_id == stats.human_id:
@@ -303,6 +301,7 @@ def filter_scorekeeper_performance():
                             stats,
                             org_name,
                             quality_data=quality_data,
+                            details=details,
                         )
 
             # Apply proper sorting, then limit the results
@@ -331,16 +330,18 @@ def filter_scorekeeper_performance():
 
             org_stats = query.order_by(OrgStatsScorekeeper.sog_per_game_rank).all()
 
+            details = load_performance_details(org_stats)
             for stats in org_stats:
-                human = (
-                    db.session.query(Human).filter(Human.id == stats.human_id).first()
-                )
-                if human:
-                    link_text = f"{human.first_name} {human.middle_name} {human.last_name}".strip()
-                    link = f'<a href="{url_for("human_stats.human_stats", human_id=human.id, top_n=20)}">{link_text}</a>'
+                link_text = details.human_name(stats.human_id)
+                if link_text is not None:
+                    link = f'<a href="{url_for("human_stats.human_stats", human_id=stats.human_id, top_n=20)}">{link_text}</a>'
                     quality_data = get_scorekeeper_quality_data(stats.human_id)
                     append_scorekeeper_performance_result(
-                        all_scorekeepers_results, stats, link, quality_data=quality_data
+                        all_scorekeepers_results,
+                        stats,
+                        link,
+                        quality_data=quality_data,
+                        details=details,
                     )
 
                     if human_id and human_id == stats.human_id:
@@ -354,6 +355,7 @@ def filter_scorekeeper_performance():
                             stats,
                             context,
                             quality_data=quality_data,
+                            details=details,
                         )
 
             # Apply proper sorting, then limit the results
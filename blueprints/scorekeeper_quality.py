@@ -5,6 +5,8 @@ from hockey_blast_common_lib.stats_models import OrgStatsScorekeeper
 from hockey_blast_common_lib.stats_utils import ALL_ORGS_ID
 from sqlalchemy import desc
 
+from conditional_get import conditional
+
 scorekeeper_quality_bp = Blueprint("scorekeeper_quality", __name__)
 
 
@@ -84,6 +86,7 @@ def get_scorekeepers_with_quality_issues(min_games=10, limit=50):
 
 
 @scorekeeper_quality_bp.route("/", methods=["GET"])
+@conditional()
 def scorekeeper_quality():
     """Main scorekeeper quality page - cross-organizational analysis"""
     top_n = request.args.get("top_n", default=50, type=int)
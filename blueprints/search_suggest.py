@@ -0,0 +1,49 @@
+"""
+Search suggestions — /api/search/suggest?q= for the navbar typeahead, and
+/api/search/similar?name= for typo-tolerant name lookups (chat tooling).
+"""
+from flask import Blueprint, jsonify, request
+
+from name_search import SUGGEST_LIMIT, name_search
+from options import MAX_HUMAN_SEARCH_RESULTS
+
+search_suggest_bp = Blueprint("search_suggest", __name__)
+
+MAX_SUGGESTIONS = 20
+
+
+@search_suggest_bp.route("/api/search/suggest")
+def search_suggest():
+    query = request.args.get("q", "")[:100]
+    limit = min(max(request.args.get("k", SUGGEST_LIMIT, type=int), 1), MAX_SUGGESTIONS)
+    response = jsonify(name_search.suggest(query, limit))
+    # Repeated keystrokes (backspace, retyping) are answered by the browser
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response
+
+
+@search_suggest_bp.route("/api/search/similar")
+def search_similar():
+    name = request.args.get("name", "")[:100]
+    limit = min(
+        max(request.args.get("k", MAX_HUMAN_SEARCH_RESULTS, type=int), 1),
+        MAX_HUMAN_SEARCH_RESULTS,
+    )
+    max_distance = request.args.get("max_distance", type=int)
+    if max_distance is not None:
+        max_distance = min(max(max_distance, 0), 3)
+    matches = name_search.fuzzy_humans(name, limit=limit, max_distance=max_distance)
+    return jsonify(
+        {
+            "humans": [
+                {
+                    "id": human.id,
+                    "name": human.name,
+                    "aliases": list(human.aliases),
+                    "distance": distance,
+                }
+                for human, distance in matches
+            ]
+        }
+    )
@@ -1,8 +1,8 @@
 import urllib.parse
 
 from flask import Blueprint, render_template, request, url_for
-from hockey_blast_common_lib.models import Team, db
 
+from name_search import name_search
 from options import MAX_TEAM_SEARCH_RESULTS
 
 search_teams_bp = Blueprint("search_teams", __name__)
@@ -12,13 +12,8 @@ search_teams_bp = Blueprint("search_teams", __name__)
 def search_teams():
     if request.method == "POST":
         team_name = request.form.get("team_name")
-        query = db.session.query(Team)
 
-        if team_name:
-            query = query.filter(Team.name.ilike(f"%{team_name}%"))
-
-        # Apply limit directly in the query
-        results = query.limit(MAX_TEAM_SEARCH_RESULTS).all()
+        results = name_search.teams(team_name, MAX_TEAM_SEARCH_RESULTS)
 
         if not results:
             return render_template(
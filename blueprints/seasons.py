@@ -2,6 +2,8 @@ from flask import Blueprint, render_template
 from hockey_blast_common_lib.models import (Season,
                                             db)
 
+from conditional_get import conditional
+
 from .players_per_season import players_per_season
 from .teams_per_season import teams_per_season
 
@@ -9,6 +11,7 @@ seasons_bp = Blueprint("seasons", __name__)
 
 
 @seasons_bp.route("/seasons")
+@conditional()
 def interactive_plot():
     # Perform the query for all seasons
     seasons_results = (
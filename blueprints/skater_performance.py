@@ -10,6 +10,10 @@ from hockey_blast_common_lib.stats_models import (DivisionStatsSkater,
                                                   OrgStatsSkater)
 from hockey_blast_common_lib.stats_utils import ALL_ORGS_ID
 
+from conditional_get import conditional
+from performance_details import load_performance_details
+from reference_data import reference_data
+
 from .skater_performance_dropdowns import (filter_levels, filter_seasons,
                                            filter_teams,
                                            get_divisions_and_seasons,
@@ -47,7 +51,7 @@ def format_date_link(date, game_id):
 
 
 def append_skater_performance_result(
-    skater_performance_results, stats, context, context_value=0
+    skater_performance_results, stats, context, context_value=0, details=None
 ):
     if isinstance(stats, dict):
         human_id = stats.get("human_id")
@@ -82,22 +86,9 @@ def append_skater_performance_result(
         gm_penalties_per_game = stats.gm_penalties_per_game
         gm_penalties_per_game_rank = stats.gm_penalties_per_game_rank
 
-    # Fetch human to get skill value
-    human = (
-        db.session.query(Human.skater_skill_value).filter(Human.id == human_id).first()
-    )
-    skill_value = human.skater_skill_value if human and human.skater_skill_value else 0
-
-    first_game = (
-        db.session.query(Game.date).filter(Game.id == first_game_id).first()
-        if first_game_id
-        else None
-    )
-    last_game = (
-        db.session.query(Game.date).filter(Game.id == last_game_id).first()
-        if last_game_id
-        else None
-    )
+    if details is None:
+        details = load_performance_details([stats])
+    skill_value = details.skill_value(human_id)
     skater_performance_results.append(
         {
             "human_id": human_id,
@@ -159,12 +150,10 @@ def append_skater_performance_result(
                 ),
                 reverse=True,
             ),
-            "first_game": (
-                format_date_link(first_game.date, first_game_id) if first_game else None
-            ),
-            "last_game": (
-                format_date_link(last_game.date, last_game_id) if last_game else None
+            "first_game": format_date_link(
+                details.game_date(first_game_id), first_game_id
             ),
+            "last_game": format_date_link(details.game_date(last_game_id), last_game_id),
             "skill_value": f"{skill_value:.1f}",
         }
     )
@@ -178,6 +167,7 @@ def extract_date_from_link(link):
 
 
 @skater_performance_bp.route("/", methods=["GET"])
+@conditional()
 def skater_performance():
     human_id = request.args.get("human_id")
     human_name = "selected Season in Level"
@@ -275,15 +265,12 @@ def filter_skater_performance():
                 .all()
             )
 
+            details = load_performance_details(org_stats)
             for stats in org_stats:
-                organization = (
-                    db.session.query(Organization)
-                    .filter(Organization.id == stats.org_id)
-                    .first()
-                )
+                organization = reference_data.organization(stats.org_id)
                 context = organization.organization_name
                 append_skater_performance_result(
-                    skater_performance_results, stats, context
+                    skater_performance_results, stats, context, details=details
                 )
             skater_performance_results.sort(
                 key=lambda x: (x["games_participated"]), reverse=True
@@ -297,11 +284,7 @@ def filter_skater_performance():
                     OrgStatsSkater.human_id == human_id,
                 ).first()
                 if org_stats:
-                    organization = (
-                        db.session.query(Organization)
-                        .filter(Organization.id == org_id)
-                        .first()
-                    )
+                    organization = reference_data.organization(org_id)
                     context = f"{organization.organization_name} (All Levels)"
                     append_skater_performance_result(
                         skater_performance_results, org_stats, context
@@ -310,6 +293,7 @@ def filter_skater_performance():
 
                 levels = get_levels_for_skater_in_org(org_id, human_id)
                 level_sort_keys = {}
+                level_rows = []
                 for level in levels:
                     level_stats = (
                         db.session.query(LevelStatsSkater)
@@ -332,9 +316,12 @@ def filter_skater_performance():
                             level.skill_value if has_skill else 0,
                             level.level_name,
                         )
-                        append_skater_performance_result(
-                            skater_performance_results, stats, context
-                        )
+                        level_rows.append((stats, context))
+                details = load_performance_details([stats for stats, _ in level_rows])
+                for stats, context in level_rows:
+                    append_skater_performance_result(
+                        skater_performance_results, stats, context, details=details
+                    )
                 skater_performance_results.sort(
                     key=lambda x: (not x.get("is_summary", False), level_sort_keys.get(x["context"], (1, 0, x["context"])))
                 )
@@ -344,6 +331,7 @@ def filter_skater_performance():
                     divisions, seasons = get_divisions_and_seasons(
                         org_id, level_id, human_id
                     )
+                    division_rows = []
                     for division in divisions:
                         division_stats = (
                             db.session.query(DivisionStatsSkater)
@@ -361,12 +349,18 @@ def filter_skater_performance():
                                 (s for s in seasons if s.id == division.season_id), None
                             )
                             context = season.season_name if season else "Unknown Season"
-                            append_skater_performance_result(
-                                skater_performance_results,
-                                stats,
-                                context,
-                                context_value=season.season_number,
-                            )
+                            division_rows.append((stats, context, season.season_number))
+                    details = load_performance_details(
+                        [stats for stats, _, _ in division_rows]
+                    )
+                    for stats, context, season_number in division_rows:
+                        append_skater_performance_result(
+                            skater_performance_results,
+                            stats,
+                            context,
+                            context_value=season_number,
+                            details=details,
+                        )
                     skater_performance_results.sort(
                         key=lambda x: (x["context_value"]), reverse=True
                     )
@@ -402,17 +396,13 @@ def filter_skater_performance():
                         .all()
                     )
 
+                    details = load_performance_details(all_skaters_stats)
                     for stats in all_skaters_stats:
-                        player = (
-                            db.session.query(Human)
-                            .filter(Human.id == stats.human_id)
-                            .first()
-                        )
-                        if player:
-                            link_text = f"{player.first_name} {player.middle_name} {player.last_name}".strip()
-                            link = f'<a href="{url_for("human_stats.human_stats", human_id=player.id, top_n=20)}">{link_text}</a>'
+                        link_text = details.human_name(stats.human_id)
+                        if link_text is not None:
+                            link = f'<a href="{url_for("human_stats.human_stats", human_id=stats.human_id, top_n=20)}">{link_text}</a>'
                             append_skater_performance_result(
-                                all_skaters_results, stats, link
+                                all_skaters_results, stats, link, details=details
                             )
                 else:
                     # Fetch team stats in division
@@ -435,13 +425,13 @@ def filter_skater_performance():
                     context = f'<a href="{url_for("team_stats.team_stats", team_id=team.id)}">{team.name}</a>'
 
                     # Add team performance results
+                    details = load_performance_details(list(stats_dict.values()))
                     for key, stats in stats_dict.items():
-                        player = db.session.query(Human).filter(Human.id == key).first()
-                        if player:
-                            link_text = f"{player.first_name} {player.middle_name} {player.last_name}".strip()
-                            link = f'<a href="{url_for("human_stats.human_stats", human_id=player.id, top_n=20)}">{link_text}</a>'
+                        link_text = details.human_name(key)
+                        if link_text is not None:
+                            link = f'<a href="{url_for("human_stats.human_stats", human_id=key, top_n=20)}">{link_text}</a>'
                             append_skater_performance_result(
-                                team_performance_results, stats, link
+                                team_performance_results, stats, link, details=details
                             )
 
     # Sort the results by last game date (descending) and first game date (ascending)
@@ -4,6 +4,8 @@ from hockey_blast_common_lib.h2h_models import SkaterToSkaterStats
 from hockey_blast_common_lib.models import Human, Level, db
 from hockey_blast_common_lib.stats_models import LevelStatsSkater
 
+from conditional_get import conditional
+
 skater_to_skater_bp = Blueprint("skater_to_skater", __name__)
 
 
@@ -14,6 +16,7 @@ def format_date(date):
 
 
 @skater_to_skater_bp.route("/", methods=["GET"])
+@conditional()
 def skater_to_skater():
     human_id_1 = request.args.get("human_id_1", type=int)
     human_id_2 = request.args.get("human_id_2", type=int)
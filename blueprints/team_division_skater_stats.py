@@ -2,9 +2,10 @@ from collections import defaultdict
 
 from flask import Blueprint, jsonify, request
 from hockey_blast_common_lib.models import (Game, GameRoster, Goal, Penalty, db)
-from hockey_blast_common_lib.utils import get_non_human_ids
 from sqlalchemy.sql import case, func
 
+from non_human_registry import non_human_registry
+
 team_division_skater_stats_bp = Blueprint("team_division_skater_stats", __name__)
 
 
@@ -153,7 +154,7 @@ def compute_skater_stats(games, team_id):
         stats_dict[key]["penalties"] += stat.penalties
         stats_dict[key]["gm_penalties"] += stat.gm_penalties
 
-    human_ids_to_filter = get_non_human_ids(db.session)
+    human_ids_to_filter = non_human_registry.ids()
 
     # Remove items from stats_dict where key is in human_ids_to_filter
     for human_id in human_ids_to_filter:
@@ -171,24 +172,24 @@ def compute_skater_stats(games, team_id):
                 stat["gm_penalties"] / stat["games_participated"]
             )
 
-    # Populate first_game_id and last_game_id
+    # Populate first_game_id and last_game_id from the dates of all the
+    # team's games, read once.  The key sorts like Postgres does (nulls last
+    # ascending), so first and last match ORDER BY date, time and its reverse
+    game_order = {}
+    if games:
+        game_order = {
+            game.id: (game.date is None, game.date, game.time is None, game.time)
+            for game in db.session.query(Game.id, Game.date, Game.time).filter(
+                Game.id.in_(games)
+            )
+        }
     for key, stat in stats_dict.items():
-        all_game_ids = stat["game_ids"]
+        all_game_ids = [
+            game_id for game_id in stat["game_ids"] if game_id in game_order
+        ]
         if all_game_ids:
-            first_game = (
-                db.session.query(Game)
-                .filter(Game.id.in_(all_game_ids))
-                .order_by(Game.date, Game.time)
-                .first()
-            )
-            last_game = (
-                db.session.query(Game)
-                .filter(Game.id.in_(all_game_ids))
-                .order_by(Game.date.desc(), Game.time.desc())
-                .first()
-            )
-            stat["first_game_id"] = first_game.id if first_game else None
-            stat["last_game_id"] = last_game.id if last_game else None
+            stat["first_game_id"] = min(all_game_ids, key=game_order.__getitem__)
+            stat["last_game_id"] = max(all_game_ids, key=game_order.__getitem__)
 
     # Calculate total_in_rank
     total_in_rank = len(stats_dict)
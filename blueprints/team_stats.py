@@ -1,13 +1,17 @@
 from datetime import datetime
 
 from flask import Blueprint, jsonify, render_template, request, url_for
-from hockey_blast_common_lib.models import (Division, Game, GameRoster, Goal,
-                                            Human, Season, Team, db)
+from hockey_blast_common_lib.models import (Game, GameRoster, Goal, Human,
+                                            db)
+
+from conditional_get import conditional
+from reference_data import reference_data
 
 team_stats_bp = Blueprint("team_stats", __name__)
 
 
 @team_stats_bp.route("/team_stats", methods=["GET"])
+@conditional()
 def team_stats():
     team_id = request.args.get("team_id")
     top_n = request.args.get("top_n", default=50, type=int)
@@ -17,7 +21,7 @@ def team_stats():
 
     team_id = int(team_id)  # Ensure team_id is an integer
 
-    team = db.session.query(Team).filter(Team.id == team_id).first()
+    team = reference_data.team(team_id)
 
     if not team:
         return jsonify({"error": "Team not found"}), 404
@@ -46,9 +50,7 @@ def team_stats():
     division_id = latest_game.division_id if latest_game else None
 
     last_division_name = (
-        db.session.query(Division).filter(Division.id == division_id).first().level
-        if division_id
-        else None
+        reference_data.division(division_id).level if division_id else None
     )
 
     # Day of week mapping
@@ -65,10 +67,8 @@ def team_stats():
     # Extract recent and upcoming games data from all games (all divisions/leagues/tournaments)
     recent_and_upcoming_games_data = []
     for game in games:
-        visitor_team = (
-            db.session.query(Team).filter(Team.id == game.visitor_team_id).first()
-        )
-        home_team = db.session.query(Team).filter(Team.id == game.home_team_id).first()
+        visitor_team = reference_data.team(game.visitor_team_id)
+        home_team = reference_data.team(game.home_team_id)
         day_of_week = day_of_week_map.get(game.day_of_week, "")
         date_time = f"{day_of_week} {game.date.strftime('%m/%d/%y')} {game.time.strftime('%I:%M%p')}"
         if game.status.startswith("Final") or game.status.upper() == "FORFEIT":
@@ -255,11 +255,7 @@ def team_stats():
             game.visitor_team_id == team_id
             and game.visitor_final_score > game.home_final_score
         ):
-            division = (
-                db.session.query(Division)
-                .filter(Division.id == game.division_id)
-                .first()
-            )
+            division = reference_data.division(game.division_id)
             level = division.level if division else "Unknown Level"
             championship_wins_data.append(
                 {"year": game.date.year, "level": level, "game_id": game.id}
@@ -352,9 +348,7 @@ def team_stats():
     for opponent_team_id, stats in performance_stats.items():
         if opponent_team_id == team_id:
             continue
-        opponent_team = (
-            db.session.query(Team).filter(Team.id == opponent_team_id).first()
-        )
+        opponent_team = reference_data.team(opponent_team_id)
         if opponent_team:
             performance_stats_list.append(
                 {
@@ -404,10 +398,10 @@ def team_stats():
     for game in completed_games:
         if game.game_type in ["Playoff", "Championship"]:
             continue
-        div = db.session.query(Division).filter(Division.id == game.division_id).first()
+        div = reference_data.division(game.division_id)
         if not div:
             continue
-        season = db.session.query(Season).filter(Season.id == div.season_id).first() if div.season_id else None
+        season = reference_data.season(div.season_id)
         season_name = season.season_name if season else str(game.date.year)
         label = f"{div.level} - {season_name}"
         # Use division start_date for sorting (fall back to game date)
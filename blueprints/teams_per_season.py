@@ -1,13 +1,8 @@
-import matplotlib
 from flask import Blueprint, render_template
-
-matplotlib.use("Agg")
-import base64
-import io
-
-import matplotlib.pyplot as plt
 from hockey_blast_common_lib.models import Division, Game, Season, db
 
+from chart_artifacts import chart_artifacts, line_chart_png
+
 teams_per_season_bp = Blueprint("teams_per_season", __name__)
 
 
@@ -20,8 +15,7 @@ class SeasonItem(object):
         self.num_teams = num_teams
 
 
-@teams_per_season_bp.route("/teams_per_season")
-def teams_per_season():
+def load_teams_per_season():
     subquery = (
         db.session.query(
             Game.division_id.label("division_id"),
@@ -65,47 +59,33 @@ def teams_per_season():
         .all()
     )
 
-    items = [
-        SeasonItem(
-            result.season_number,
-            result.season_name,
-            result.start_date,
-            result.end_date,
-            result.num_teams,
-        )
-        for result in results
-    ]
-
-    # Generate plot
-    season_names = [item.season_name for item in items]
-    num_teams = [item.num_teams for item in items]
-    plt.figure(figsize=(20, 10))  # Increase figure size
-    plt.plot(season_names, num_teams, marker="o")
-    plt.xlabel("Season Name")
-    plt.ylabel("Number of Teams")
-    plt.title("Number of Teams per Season")
-    plt.grid(True)
-    plt.xticks(
-        rotation=45, ha="right", fontsize=10
-    )  # Rotate X-axis labels for better readability and adjust font size
-
-    # Annotate each point with the Y-axis value
-    for i, txt in enumerate(num_teams):
-        plt.annotate(
-            txt,
-            (season_names[i], num_teams[i]),
-            textcoords="offset points",
-            xytext=(0, 10),
-            ha="center",
-        )
+    return [list(result) for result in results]
 
-    # Save plot to a string buffer
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    plot_url = base64.b64encode(buf.getvalue()).decode("utf8")
-    plt.close()
+
+def render_teams_per_season(rows):
+    items = [SeasonItem(*row) for row in rows]
+    return line_chart_png(
+        [item.season_name for item in items],
+        [item.num_teams for item in items],
+        "Season Name",
+        "Number of Teams",
+        "Number of Teams per Season",
+    )
+
+
+chart_artifacts.register("teams_per_season", load_teams_per_season, render_teams_per_season)
+
+
+@teams_per_season_bp.route("/teams_per_season")
+def teams_per_season():
+    chart = chart_artifacts.get("teams_per_season")
+    items = [SeasonItem(*row) for row in chart.rows]
 
     return render_template(
-        "teams_per_season.html", teams_per_season=items, plot_url=plot_url
+        "teams_per_season.html", teams_per_season=items, plot_version=chart.version
     )
+
+
+@teams_per_season_bp.route("/teams_per_season.png")
+def teams_per_season_png():
+    return chart_artifacts.png_response("teams_per_season")
@@ -2,10 +2,13 @@ import pandas as pd
 from flask import Blueprint, jsonify, render_template, request
 from hockey_blast_common_lib.models import Division, Game, Season, Team, db
 
+from conditional_get import conditional
+
 time_of_games_bp = Blueprint("time_of_games", __name__)
 
 
 @time_of_games_bp.route("/time_of_games")
+@conditional()
 def interactive_plot():
     levels = db.session.query(Division.level).distinct().all()
     levels = sorted([level[0] for level in levels])  # Sort levels alphabetically
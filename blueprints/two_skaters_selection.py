@@ -1,51 +1,55 @@
 from flask import Blueprint, redirect, render_template, request, url_for
-from hockey_blast_common_lib.models import Human, HumanAlias, db
+from hockey_blast_common_lib.models import db
 from hockey_blast_common_lib.stats_models import OrgStatsSkater
 
+from name_search import name_search
 from options import MAX_HUMAN_SEARCH_RESULTS
 
 two_skaters_selection_bp = Blueprint("two_skaters_selection", __name__)
 
+# Best-ranked name matches checked for skater records at most: a short name
+# matches most humans, and the skaters worth listing are near the top
+MAX_SKATER_CANDIDATES = 1000
+
 
 def search_skaters(first_name, last_name):
     """Search for humans who have skater records in OrgStatsSkater"""
-    query = db.session.query(Human).join(
-        OrgStatsSkater, Human.id == OrgStatsSkater.human_id
-    )
-
-    if first_name:
-        query = query.filter(Human.first_name.ilike(f"%{first_name}%"))
-    if last_name:
-        query = query.filter(Human.last_name.ilike(f"%{last_name}%"))
-
-    # Apply limit and get distinct results
-    results = query.distinct().limit(MAX_HUMAN_SEARCH_RESULTS).all()
-
-    search_results = []
-    for player in results:
-        aliases = (
-            db.session.query(HumanAlias).filter(HumanAlias.human_id == player.id).all()
+    # Names come from the in-memory index; only the skater check hits the
+    # database, widening the window until enough skaters are found
+    fetch = MAX_HUMAN_SEARCH_RESULTS * 2
+    checked = 0
+    skater_ids = set()
+    while True:
+        matches = name_search.humans(
+            first_name, last_name, limit=fetch, include_non_humans=True
         )
-        alias_names = [
-            f"{alias.first_name} {alias.middle_name} {alias.last_name}".strip()
-            for alias in aliases
-            if f"{alias.first_name} {alias.middle_name} {alias.last_name}".strip()
-            != f"{player.first_name} {player.middle_name} {player.last_name}".strip()
-        ]
-        alias_text = f" A.K.A. {', '.join(alias_names)}" if alias_names else ""
-        player_name = (
-            f"{player.first_name} {player.middle_name} {player.last_name}".strip()
-        )
-
-        search_results.append(
-            {
-                "id": player.id,
-                "name": player_name,
-                "display_name": f"{player_name}{alias_text}",
-            }
-        )
-
-    return search_results
+        # A wider window keeps the order, so only the new matches are checked
+        new_ids = [match.id for match in matches[checked:]]
+        if new_ids:
+            skater_ids.update(
+                human_id
+                for (human_id,) in db.session.query(OrgStatsSkater.human_id)
+                .filter(OrgStatsSkater.human_id.in_(new_ids))
+                .distinct()
+            )
+        checked = len(matches)
+        skaters = [match for match in matches if match.id in skater_ids]
+        if (
+            len(skaters) >= MAX_HUMAN_SEARCH_RESULTS
+            or len(matches) < fetch
+            or fetch >= MAX_SKATER_CANDIDATES
+        ):
+            break
+        fetch = min(fetch * 2, MAX_SKATER_CANDIDATES)
+
+    return [
+        {
+            "id": player.id,
+            "name": player.name,
+            "display_name": player.display_name,
+        }
+        for player in skaters[:MAX_HUMAN_SEARCH_RESULTS]
+    ]
 
 
 @two_skaters_selection_bp.route("/", methods=["GET", "POST"])
@@ -2,20 +2,23 @@
 
 Hides the internal video service URI from end users.  The /status endpoint
 is lightweight (JSON); the /video endpoint streams the MP4 with full
-Range-request support so browsers can seek inside the player.
+Range-request support so browsers can seek inside the player.  Recently
+watched videos are served from a local copy (see video_cache).
 """
-import os
 import re
 
 import requests as http_requests
 from flask import Blueprint, Response, jsonify, render_template, request
-from hockey_blast_common_lib.models import Game, Team, db
+from hockey_blast_common_lib.models import Game, db
+
+from highlight_status import highlight_status
+from reference_data import reference_data
+from video_cache import (CHUNK_SIZE, CONNECT_TIMEOUT, VIDEO_TIMEOUT,
+                         highlight_videos)
 
 video_proxy_bp = Blueprint("video_proxy", __name__)
 
-VIDEO_SERVICE_BASE = os.environ.get("VIDEO_SERVICE_URL", "http://127.0.0.1:5004")
-STATUS_TIMEOUT = 5
-VIDEO_TIMEOUT = 300
+STATUS_BROWSER_MAX_AGE = 60
 
 
 def _download_filename(game_id: int) -> str:
@@ -23,10 +26,8 @@ def _download_filename(game_id: int) -> str:
     try:
         game = db.session.query(Game).filter(Game.id == game_id).first()
         if game:
-            home = db.session.query(Team).filter(Team.id == game.home_team_id).first()
-            away = db.session.query(Team).filter(Team.id == game.visitor_team_id).first()
-            home_name = re.sub(r'[^\w]+', '_', (home.name if home else 'Home')).strip('_')
-            away_name = re.sub(r'[^\w]+', '_', (away.name if away else 'Away')).strip('_')
+            home_name = re.sub(r'[^\w]+', '_', reference_data.team_name(game.home_team_id, 'Home')).strip('_')
+            away_name = re.sub(r'[^\w]+', '_', reference_data.team_name(game.visitor_team_id, 'Away')).strip('_')
             date_str = game.date.strftime('%Y-%m-%d') if game.date else ''
             time_str = game.time.strftime('%H%M') if game.time else ''
             return f"highlights_{game_id}_{home_name}_vs_{away_name}_{date_str}_{time_str}.mp4"
@@ -43,29 +44,36 @@ def highlights_viewer(game_id):
 
 @video_proxy_bp.route("/api/highlights/<int:game_id>/status")
 def proxy_status(game_id):
-    url = f"{VIDEO_SERVICE_BASE}/api/highlights/{game_id}/status"
-    try:
-        resp = http_requests.get(url, timeout=STATUS_TIMEOUT)
-        return Response(
-            resp.content,
-            status=resp.status_code,
-            content_type=resp.headers.get("Content-Type", "application/json"),
-        )
-    except Exception:
-        return jsonify({"available": False}), 502
+    answer, ttl = highlight_status.get(game_id)
+    response = Response(
+        answer.body, status=answer.status_code, content_type=answer.content_type
+    )
+    # Polls from the same browser are answered by its own cache for a while
+    response.cache_control.max_age = int(min(ttl, STATUS_BROWSER_MAX_AGE))
+    return response
 
 
 @video_proxy_bp.route("/api/highlights/<int:game_id>/video")
 def proxy_video(game_id):
+    # ?dl=1 forces download (needed for iOS Safari)
+    download_name = _download_filename(game_id) if request.args.get("dl") else None
+
+    video = highlight_videos.lookup(game_id)
+    if video is not None:
+        return highlight_videos.response(video, download_name)
+
+    # Not cached yet (a download has started): relay this request
     headers = {}
     range_header = request.headers.get("Range")
     if range_header:
         headers["Range"] = range_header
 
-    url = f"{VIDEO_SERVICE_BASE}/api/highlights/{game_id}/video"
     try:
-        upstream = http_requests.get(
-            url, headers=headers, stream=True, timeout=VIDEO_TIMEOUT
+        upstream = highlight_videos.upstream.get(
+            highlight_videos.video_url(game_id),
+            headers=headers,
+            stream=True,
+            timeout=(CONNECT_TIMEOUT, VIDEO_TIMEOUT),
         )
     except Exception as e:
         return jsonify({"error": str(e)}), 502
@@ -82,15 +90,17 @@ def proxy_video(game_id):
         if h in upstream.headers:
             response_headers[h] = upstream.headers[h]
 
-    # ?dl=1 forces download (needed for iOS Safari)
-    if request.args.get("dl"):
-        fname = _download_filename(game_id)
+    if download_name:
         response_headers["Content-Disposition"] = (
-            f'attachment; filename="{fname}"'
+            f'attachment; filename="{download_name}"'
         )
 
-    return Response(
-        upstream.iter_content(chunk_size=64 * 1024),
-        status=upstream.status_code,
-        headers=response_headers,
-    )
+    def relay():
+        try:
+            yield from upstream.iter_content(chunk_size=CHUNK_SIZE)
+        except http_requests.exceptions.RequestException:
+            pass  # the viewer sees a truncated response and retries the range
+        finally:
+            upstream.close()
+
+    return Response(relay(), status=upstream.status_code, headers=response_headers)
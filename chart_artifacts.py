@@ -0,0 +1,232 @@
+"""
+On-disk cache for charts rendered on the server.
+
+Some pages aggregate whole tables and draw the result with matplotlib, although
+the data changes at most a few times a day.  A chart registers a function that
+loads its rows and one that renders them to PNG bytes.  Both results are
+written to CHART_CACHE_DIR under a version derived from a cheap max(id) probe
+of the tables involved (plus the day, so renames are picked up daily), so all
+gunicorn workers share them and a restart does not redraw anything.
+
+The page renders the table from the cached rows and links the PNG through its
+own URL, which is served from disk with the version as ETag.  When the data
+version changes, the previous artifact keeps being served while a background
+thread builds the new one.  Only a cold cache builds in the request.
+"""
+
+import glob
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app, send_file
+from hockey_blast_common_lib.models import (Division, Game, GameRoster,
+                                            Season, db)
+from matplotlib.figure import Figure
+from sqlalchemy import func, literal, select, union_all
+
+logger = logging.getLogger(__name__)
+
+CHART_CACHE_DIR = os.environ.get("CHART_CACHE_DIR", "chart_cache")
+CHART_CHECK_INTERVAL = float(os.environ.get("CHART_CHECK_INTERVAL", 5 * 60))
+CHART_MAX_AGE = 24 * 60 * 60  # rebuild at least daily, even if the probe is unchanged
+
+ChartArtifact = namedtuple("ChartArtifact", ["version", "rows", "png_path"])
+ChartSpec = namedtuple("ChartSpec", ["load_rows", "render_png", "tables"])
+
+SEASON_TABLES = (Season, Division, Game, GameRoster)
+
+
+def line_chart_png(labels, values, xlabel, ylabel, title):
+    """A line chart of values with each point annotated, as PNG bytes.
+
+    Uses a Figure directly rather than pyplot, whose global state is not
+    safe to use from the background build threads.
+    """
+    fig = Figure(figsize=(20, 10))
+    ax = fig.subplots()
+    ax.plot(labels, values, marker="o")
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.grid(True)
+    # Rotate X-axis labels for better readability and adjust font size
+    for label in ax.get_xticklabels():
+        label.set(rotation=45, ha="right", fontsize=10)
+
+    # Annotate each point with the Y-axis value
+    for label, value in zip(labels, values):
+        ax.annotate(
+            value,
+            (label, value),
+            textcoords="offset points",
+            xytext=(0, 10),
+            ha="center",
+        )
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+class ChartArtifactCache:
+    """Chart rows and PNGs on disk, keyed by data version."""
+
+    def __init__(self, directory=CHART_CACHE_DIR, check_interval=CHART_CHECK_INTERVAL):
+        self.directory = os.path.abspath(directory)
+        self.check_interval = check_interval
+        self._specs = {}
+        self._current = {}  # name -> (ChartArtifact, checked_at)
+        self._lock = threading.Lock()
+        self._build_locks = {}
+        self._building = set()
+        self.builds = 0
+        self.disk_loads = 0
+
+    def register(self, name, load_rows, render_png, tables=SEASON_TABLES):
+        """Add a chart.  load_rows() runs in an app context and returns
+        JSON-serializable rows; render_png(rows) returns PNG bytes."""
+        self._specs[name] = ChartSpec(load_rows, render_png, tables)
+        self._build_locks[name] = threading.Lock()
+
+    def get(self, name):
+        """The current ChartArtifact for a chart, building it if there is none."""
+        now = time.monotonic()
+        current = self._current.get(name)
+        if current is not None and now - current[1] < self.check_interval:
+            return current[0]
+
+        version = self._version(name)
+        if current is not None and current[0].version == version:
+            self._current[name] = (current[0], now)
+            return current[0]
+
+        artifact = self._load(name, version)
+        if artifact is not None:
+            self._current[name] = (artifact, now)
+            return artifact
+        if current is not None:
+            # Keep serving the previous chart until the new one is ready
+            self._build_in_background(name, version)
+            return current[0]
+        return self._build(name, version)
+
+    def png_response(self, name):
+        """The chart's PNG, with its version as ETag."""
+        artifact = self.get(name)
+        return send_file(
+            artifact.png_path,
+            mimetype="image/png",
+            etag=artifact.version,
+            conditional=True,
+            max_age=self.check_interval,
+        )
+
+    def stats(self):
+        """Return counters for the debug endpoint."""
+        return {
+            "charts": {
+                name: current[0].version for name, current in self._current.items()
+            },
+            "builds": self.builds,
+            "disk_loads": self.disk_loads,
+            "building": sorted(self._building),
+        }
+
+    def _version(self, name):
+        """Hash of the max ids of the chart's tables and the current day."""
+        tables = self._specs[name].tables
+        stmt = union_all(
+            *(
+                select(literal(model.__tablename__), func.max(model.id))
+                for model in tables
+            )
+        )
+        probe = sorted(db.session.execute(stmt).all())
+        day = int(time.time() // CHART_MAX_AGE)
+        return hashlib.sha1(f"{name}:{probe}:{day}".encode()).hexdigest()[:16]
+
+    def _paths(self, name, version):
+        base = os.path.join(self.directory, f"{name}-{version}")
+        return f"{base}.json", f"{base}.png"
+
+    def _load(self, name, version):
+        """The artifact for a version from disk (another worker may have built it)."""
+        rows_path, png_path = self._paths(name, version)
+        if not os.path.exists(png_path):
+            return None
+        try:
+            with open(rows_path) as f:
+                rows = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read chart rows {rows_path}: {e}")
+            return None
+        self.disk_loads += 1
+        return ChartArtifact(version, rows, png_path)
+
+    def _build(self, name, version):
+        with self._build_locks[name]:
+            artifact = self._load(name, version)
+            if artifact is None:
+                spec = self._specs[name]
+                started = time.monotonic()
+                rows = spec.load_rows()
+                png = spec.render_png(rows)
+                artifact = self._write(name, version, rows, png)
+                self.builds += 1
+                elapsed = (time.monotonic() - started) * 1000
+                logger.info(f"Built chart {name} {version} in {elapsed:.0f} ms")
+            self._current[name] = (artifact, time.monotonic())
+            return artifact
+
+    def _build_in_background(self, name, version):
+        with self._lock:
+            if name in self._building:
+                return
+            self._building.add(name)
+        app = current_app._get_current_object()
+
+        def build():
+            try:
+                with app.app_context():
+                    self._build(name, version)
+            except Exception as e:
+                logger.error(f"Failed to build chart {name}: {e}")
+            finally:
+                with self._lock:
+                    self._building.discard(name)
+
+        threading.Thread(target=build, name="chart-build", daemon=True).start()
+
+    def _write(self, name, version, rows, png):
+        os.makedirs(self.directory, exist_ok=True)
+        rows_path, png_path = self._paths(name, version)
+        encoded_rows = json.dumps(rows, default=str)
+        # Rows first: a PNG on disk means the artifact is complete
+        for path, data, mode in ((rows_path, encoded_rows, "w"), (png_path, png, "wb")):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, mode) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._remove_old_versions(name)
+        # Same shape as rows read back from disk (dates become strings)
+        return ChartArtifact(version, json.loads(encoded_rows), png_path)
+
+    def _remove_old_versions(self, name):
+        # Other workers may still serve a recent previous version, so only
+        # drop files that are well past it
+        cutoff = time.time() - 2 * CHART_MAX_AGE
+        for path in glob.glob(os.path.join(self.directory, f"{name}-*")):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+chart_artifacts = ChartArtifactCache()
@@ -0,0 +1,203 @@
+"""
+gzip/brotli compression of HTML and JSON responses.
+
+An after_request hook negotiates Accept-Encoding and compresses text
+responses of at least COMPRESSION_MIN_SIZE bytes, preferring brotli when
+the Brotli package is installed.  Streamed responses are compressed chunk by
+chunk with a flush after each one, so a streamed page still reaches the
+browser as it is produced.  Server-sent events are left alone.
+
+Views whose output comes from an internal cache can store the compressed
+bytes instead of the page: precompress() encodes a body once, in every
+supported encoding, and compressed_response() serves the variant the client
+accepts, so a cache hit is neither re-rendered nor recompressed.
+"""
+
+import gzip
+import os
+import zlib
+from collections import namedtuple
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only without it
+    brotli = None
+
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION", "1") != "0"
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+
+# Responses are compressed on every request, so use fast settings for them
+# and the slower, smaller ones for bodies that are compressed once and cached
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+PRECOMPRESS_GZIP_LEVEL = 9
+PRECOMPRESS_BROTLI_QUALITY = 9
+
+COMPRESSIBLE_MIMETYPES = {
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+}
+
+# A body in each encoding; the identity body is only kept when the page is
+# too small to be worth compressing
+CompressedBody = namedtuple("CompressedBody", ["identity", "gzip", "br"])
+
+
+def supported_encodings():
+    """Encodings this process can produce, in order of preference."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+class _GzipStream:
+    def __init__(self, level=GZIP_LEVEL):
+        self._encoder = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._encoder.compress(data) + self._encoder.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._encoder.flush()
+
+
+class _BrotliStream:
+    def __init__(self, quality=BROTLI_QUALITY):
+        self._encoder = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._encoder.process(data) + self._encoder.flush()
+
+    def finish(self):
+        return self._encoder.finish()
+
+
+def _compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def precompress(body, min_size=COMPRESSION_MIN_SIZE):
+    """A CompressedBody for str or bytes, for storing in a cache."""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if len(body) < min_size:
+        return CompressedBody(body, None, None)
+    return CompressedBody(
+        None,
+        gzip.compress(body, compresslevel=PRECOMPRESS_GZIP_LEVEL, mtime=0),
+        brotli.compress(body, quality=PRECOMPRESS_BROTLI_QUALITY) if brotli else None,
+    )
+
+
+def compressed_response(body, mimetype="text/html"):
+    """A response serving a CompressedBody in the encoding the client accepts."""
+    response = current_app.response_class(mimetype=mimetype)
+    available = [
+        encoding for encoding in supported_encodings() if getattr(body, encoding)
+    ]
+    encoding = request.accept_encodings.best_match(available) if available else None
+    if encoding is not None:
+        response.set_data(getattr(body, encoding))
+        response.headers["Content-Encoding"] = encoding
+        compression.precompressed += 1
+    elif body.identity is not None:
+        response.set_data(body.identity)
+    else:
+        response.set_data(gzip.decompress(body.gzip))
+    if available:
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+class Compression:
+    """Compresses responses after the view has run."""
+
+    def __init__(self, enabled=COMPRESSION_ENABLED, min_size=COMPRESSION_MIN_SIZE):
+        self.enabled = enabled
+        self.min_size = min_size
+        self.compressed = 0
+        self.streamed = 0
+        self.precompressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def init_app(self, app):
+        app.extensions["compression"] = self
+        if self.enabled:
+            app.after_request(self.compress_response)
+
+    def compress_response(self, response):
+        if not self._is_compressible(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(supported_encodings())
+        if encoding is None:
+            return response
+        # Streams of unknown length are compressed whatever their size
+        if response.content_length is not None and response.content_length < self.min_size:
+            return response
+
+        if response.is_streamed:
+            stream = _BrotliStream() if encoding == "br" else _GzipStream()
+            response.response = self._stream(response.response, stream)
+            response.headers.pop("Content-Length", None)
+            self.streamed += 1
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            compressed = _compress(data, encoding)
+            response.set_data(compressed)
+            self.compressed += 1
+            self.bytes_in += len(data)
+            self.bytes_out += len(compressed)
+        response.headers["Content-Encoding"] = encoding
+        # The body differs per encoding, so a strong validator cannot be kept
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def stats(self):
+        """Return counters for the debug endpoint."""
+        return {
+            "enabled": self.enabled,
+            "encodings": list(supported_encodings()),
+            "compressed": self.compressed,
+            "streamed": self.streamed,
+            "precompressed": self.precompressed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+        }
+
+    @staticmethod
+    def _is_compressible(response):
+        if response.direct_passthrough or response.status_code in (204, 206, 304):
+            return False
+        if "Content-Encoding" in response.headers:
+            return False
+        return response.mimetype in COMPRESSIBLE_MIMETYPES
+
+    @staticmethod
+    def _stream(chunks, stream):
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                data = stream.compress(chunk)
+                if data:
+                    yield data
+            yield stream.finish()
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+
+compression = Compression()
@@ -0,0 +1,198 @@
+"""
+Conditional GET for stats pages and JSON endpoints.
+
+A view decorated with @conditional(version) declares a cheap version function
+that returns a Validator (or None when the response must not be validated,
+e.g. for a live game).  The ETag is derived from the validator token, the
+full request path and the build, so a page changes its ETag when its data,
+its query string or the deployed code does.  Requests carrying a matching
+If-None-Match (or, without one, an If-Modified-Since not older than the
+validator) are answered with 304 before the view runs its queries and
+renders anything.
+
+Most pages read from many tables, so the default version is data_version: a
+per-process probe of the latest game id, game update and stats aggregation,
+re-run at most every DATA_VERSION_CHECK_INTERVAL seconds.  A 304 for those
+pages therefore usually costs no query at all.
+
+Responses get "Cache-Control: no-cache", so browsers and Cloudflare keep
+them but revalidate on every use.  Only GET and HEAD are handled; the POST
+filter endpoints cannot be revalidated by clients.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import date, datetime, timezone
+from functools import wraps
+
+from flask import current_app, request
+from hockey_blast_common_lib.models import Game, db
+from hockey_blast_common_lib.stats_models import OrgStatsHuman
+from sqlalchemy import func, select
+
+logger = logging.getLogger(__name__)
+
+CONDITIONAL_GET_ENABLED = os.environ.get("CONDITIONAL_GET", "1") != "0"
+DATA_VERSION_CHECK_INTERVAL = float(os.environ.get("DATA_VERSION_CHECK_INTERVAL", 30))
+
+# token identifies the data a response was built from; last_modified (an
+# aware datetime or None) is sent as Last-Modified
+Validator = namedtuple("Validator", ["token", "last_modified"])
+
+
+def _http_time(value):
+    """A datetime truncated to the one-second precision of HTTP dates."""
+    return value.replace(microsecond=0)
+
+
+class DataVersion:
+    """When the game and stats data last changed, as seen by this process."""
+
+    def __init__(self, check_interval=DATA_VERSION_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._current = None  # (Validator, checked_at)
+        self._lock = threading.Lock()
+        self.probes = 0
+
+    def __call__(self, *args, **kwargs):
+        """The current Validator; usable directly as a version function."""
+        current = self._current
+        if current is not None and time.monotonic() - current[1] < self.check_interval:
+            return current[0]
+        # One thread probes, the others keep using the previous version
+        if not self._lock.acquire(blocking=current is None):
+            return current[0]
+        try:
+            return self._refresh()
+        finally:
+            self._lock.release()
+
+    def stats(self):
+        """Return counters for the debug endpoint."""
+        current = self._current
+        return {
+            "token": current[0].token if current else None,
+            "last_modified": str(current[0].last_modified) if current else None,
+            "probes": self.probes,
+        }
+
+    def _refresh(self):
+        token = self._probe()
+        current = self._current
+        if current is not None and current[0].token == token:
+            validator = current[0]
+        else:
+            # The data timestamps are naive and not all changes bump them,
+            # so Last-Modified is the time this process first saw the token
+            validator = Validator(token, _http_time(datetime.now(timezone.utc)))
+        self._current = (validator, time.monotonic())
+        return validator
+
+    def _probe(self):
+        """Latest game id, game update and stats aggregation, in one query."""
+        stmt = select(
+            func.max(Game.id),
+            func.max(Game.last_update_ts),
+            select(func.max(OrgStatsHuman.aggregation_completed_at)).scalar_subquery(),
+        )
+        row = db.session.execute(stmt).one()
+        self.probes += 1
+        # Pages filter on "today" (upcoming games, recent playoffs), so the
+        # date is part of the version as well
+        return f"{row[0]}:{row[1]}:{row[2]}:{date.today()}"
+
+
+data_version = DataVersion()
+
+
+class ConditionalGet:
+    """ETag/Last-Modified validation for decorated views."""
+
+    def __init__(self, enabled=CONDITIONAL_GET_ENABLED):
+        self.enabled = enabled
+        self.build_id = ""
+        self.checked = 0
+        self.not_modified = 0
+
+    def init_app(self, app):
+        app.extensions["conditional_get"] = self
+        self.build_id = self._build_id(app.root_path)
+
+    def __call__(self, version=data_version):
+        """Decorator: answer conditional requests for a view from version()."""
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method not in ("GET", "HEAD"):
+                    return view(*args, **kwargs)
+                validator = version(*args, **kwargs)
+                if validator is None:
+                    return view(*args, **kwargs)
+
+                self.checked += 1
+                etag = self._etag(validator)
+                if self._is_fresh(etag, validator.last_modified):
+                    self.not_modified += 1
+                    response = current_app.response_class(status=304)
+                else:
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                response.set_etag(etag, weak=True)
+                if validator.last_modified is not None:
+                    response.last_modified = validator.last_modified
+                response.cache_control.no_cache = True
+                return response
+
+            return wrapper
+
+        return decorator
+
+    def stats(self):
+        """Return counters for the debug endpoint."""
+        return {
+            "enabled": self.enabled,
+            "build_id": self.build_id,
+            "checked": self.checked,
+            "not_modified": self.not_modified,
+            "data_version": data_version.stats(),
+        }
+
+    def _etag(self, validator):
+        key = f"{self.build_id}:{request.full_path}:{validator.token}"
+        return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+    @staticmethod
+    def _is_fresh(etag, last_modified):
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(etag)
+        if last_modified is not None and request.if_modified_since is not None:
+            return _http_time(last_modified) <= request.if_modified_since
+        return False
+
+    @staticmethod
+    def _build_id(root_path):
+        """Hash of the code and template mtimes, the same in every worker."""
+        mtimes = []
+        for directory, _, files in os.walk(root_path):
+            relative = os.path.relpath(directory, root_path)
+            if relative != "." and relative.split(os.sep)[0] not in (
+                "api",
+                "blueprints",
+                "templates",
+            ):
+                continue
+            for name in files:
+                if name.endswith((".py", ".html")):
+                    path = os.path.join(directory, name)
+                    mtimes.append(f"{path}:{os.path.getmtime(path)}")
+        return hashlib.sha1("\n".join(sorted(mtimes)).encode()).hexdigest()[:12]
+
+
+conditional = ConditionalGet()
@@ -0,0 +1,335 @@
+"""
+Keyed cache for expensive page fragments, shared by all gunicorn workers.
+
+Values live in an in-process dict and in a small SQLite file that every
+worker on the host reads and writes, so a fragment computed by one worker is
+reused by the others.  Entries are fresh for `ttl` seconds.  After that they
+are served stale (up to `max_stale` seconds) while one background refresh
+recomputes them, so readers never wait on a stale entry.
+
+Recomputation is stampede-protected: within a worker a per-key lock lets
+only one thread compute, and across workers a lease row in SQLite does the
+same.  Threads that lose the race wait for the winner's result.
+
+Cached values are pickled, so they must be plain data.  plain_rows()
+converts ORM query results into picklable objects with the same attributes.
+"""
+
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from types import SimpleNamespace
+
+from flask import current_app
+from sqlalchemy import inspect
+
+logger = logging.getLogger(__name__)
+
+# Values are pickled, so keep the file somewhere only the app can write
+# (like the flask_session directory)
+FRAGMENT_CACHE_PATH = os.environ.get("FRAGMENT_CACHE_PATH", "fragment_cache.sqlite3")
+FRAGMENT_CACHE_TTL = float(os.environ.get("FRAGMENT_CACHE_TTL", 5 * 60))
+FRAGMENT_CACHE_MAX_STALE = float(os.environ.get("FRAGMENT_CACHE_MAX_STALE", 24 * 60 * 60))
+FRAGMENT_CACHE_MAX_ENTRIES = 512  # in-process entries
+LEASE_TIMEOUT = 60  # seconds a worker may hold a recompute lease
+LEASE_WAIT = 10  # seconds to wait for another worker's result before computing anyway
+STORE_RETRY = 5  # seconds the shared store is skipped after a transient error
+STORE_MAX_RETRY = 5 * 60  # ... doubling per consecutive error up to this
+STORE_MAX_FAILURES = 10  # consecutive transient errors before it is disabled
+
+MISS = object()
+
+
+def plain_rows(rows):
+    """Convert ORM rows (tuples of entities) into picklable namespaces."""
+
+    def plain(entity):
+        columns = inspect(entity).mapper.column_attrs
+        return SimpleNamespace(
+            **{column.key: getattr(entity, column.key) for column in columns}
+        )
+
+    return [tuple(plain(entity) for entity in row) for row in rows]
+
+
+class FragmentCache:
+    """Stale-while-revalidate cache backed by memory and a shared SQLite file.
+
+    With an empty path the cache is per process only.
+    """
+
+    def __init__(
+        self,
+        path=FRAGMENT_CACHE_PATH,
+        ttl=FRAGMENT_CACHE_TTL,
+        max_stale=FRAGMENT_CACHE_MAX_STALE,
+        max_entries=FRAGMENT_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self._memory = OrderedDict()  # key -> (computed_at, value)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._refreshing = set()
+        self._store_ok = bool(path)
+        self._store_ready = False
+        self._store_failures = 0  # consecutive
+        self._store_retry_at = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.computed = 0
+
+    def cached(self, key, compute):
+        """The cached value for key, or MISS.
+
+        A stale value is returned as is, and compute() is scheduled to
+        refresh it in the background.
+        """
+        entry = self._read(key)
+        if entry is None:
+            self.misses += 1
+            return MISS
+        computed_at, value = entry
+        age = time.time() - computed_at
+        if age < self.ttl:
+            self.hits += 1
+            return value
+        self.stale_hits += 1
+        self._refresh_in_background(key, compute)
+        return value
+
+    def compute(self, key, compute, wait=True):
+        """Compute and store the value for key, once per key across workers.
+
+        If another thread or worker is already computing the key, wait for
+        its result instead (or, with wait=False, return MISS immediately).
+        """
+        with self._key_lock(key):
+            started = time.time()
+            entry = self._read(key)
+            if entry is not None and started - entry[0] < self.ttl:
+                return entry[1]
+            owner = f"{os.getpid()}:{threading.get_ident()}"
+            deadline = time.monotonic() + LEASE_WAIT
+            while not self._acquire_lease(key, owner):
+                if not wait:
+                    return MISS
+                if time.monotonic() > deadline:
+                    logger.warning(f"Gave up waiting for {key}, computing it here")
+                    break
+                time.sleep(0.05)
+                entry = self._read_store(key)
+                if entry is not None and entry[0] >= started:
+                    self._remember(key, entry)
+                    return entry[1]
+            try:
+                value = compute()
+                self._write(key, value)
+                self.computed += 1
+                return value
+            finally:
+                self._release_lease(key, owner)
+
+    def get(self, key, compute):
+        """The value for key, computing it in the caller on a miss."""
+        value = self.cached(key, compute)
+        if value is MISS:
+            value = self.compute(key, compute)
+        return value
+
+    def stats(self):
+        """Return counters for the debug endpoint."""
+        return {
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "computed": self.computed,
+            "shared_store": self._store_usable(),
+            "store_failures": self._store_failures,
+        }
+
+    def _key_lock(self, key):
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _refresh_in_background(self, key, compute):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        app = current_app._get_current_object()
+
+        def refresh():
+            try:
+                with app.app_context():
+                    self.compute(key, compute, wait=False)
+            except Exception as e:
+                logger.error(f"Failed to refresh {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="fragment-refresh", daemon=True).start()
+
+    # Memory layer
+
+    def _read(self, key):
+        """Newest usable entry from memory or the shared store."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is not None and now - entry[0] < self.ttl:
+            return entry
+        # Another worker may have refreshed it
+        stored = self._read_store(key)
+        if stored is not None and (entry is None or stored[0] > entry[0]):
+            entry = stored
+            self._remember(key, entry)
+        if entry is None or now - entry[0] > self.max_stale:
+            return None
+        return entry
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _write(self, key, value):
+        entry = (time.time(), value)
+        self._remember(key, entry)
+        self._write_store(key, entry)
+
+    # Shared SQLite store.  While it is failing the cache keeps working per
+    # process.  Operational errors ("database is locked" under contention,
+    # a full disk) skip it for a backoff window; other SQLite errors, or too
+    # many operational ones in a row, disable it until restart.
+
+    @contextmanager
+    def _connect(self):
+        if not self._store_ready:
+            self._init_store()
+        with closing(sqlite3.connect(self.path, timeout=5, isolation_level=None)) as conn:
+            yield conn
+
+    def _store_usable(self):
+        return self._store_ok and time.time() >= self._store_retry_at
+
+    def _store_succeeded(self):
+        self._store_failures = 0
+
+    def _store_failed(self, action, error):
+        if not isinstance(error, sqlite3.Error):
+            # A value that does not pickle is not the store's fault
+            logger.error(f"Fragment cache store {self.path} failed to {action}: {error}")
+            return
+        self._store_failures += 1
+        if (
+            isinstance(error, sqlite3.OperationalError)
+            and self._store_failures < STORE_MAX_FAILURES
+        ):
+            retry = min(STORE_RETRY * 2 ** (self._store_failures - 1), STORE_MAX_RETRY)
+            self._store_retry_at = time.time() + retry
+            logger.warning(
+                f"Fragment cache store {self.path} failed to {action}: {error}; "
+                f"retrying in {retry:.0f} s"
+            )
+            return
+        if self._store_ok:
+            logger.error(
+                f"Fragment cache store {self.path} failed to {action}: {error}; disabled"
+            )
+        self._store_ok = False
+
+    def _init_store(self):
+        with closing(sqlite3.connect(self.path, timeout=5, isolation_level=None)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fragments "
+                "(key TEXT PRIMARY KEY, computed_at REAL, value BLOB)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases "
+                "(key TEXT PRIMARY KEY, owner TEXT, expires_at REAL)"
+            )
+        self._store_ready = True
+
+    def _read_store(self, key):
+        if not self._store_usable():
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT computed_at, value FROM fragments WHERE key = ?", (key,)
+                ).fetchone()
+            self._store_succeeded()
+            return (row[0], pickle.loads(row[1])) if row else None
+        except Exception as e:
+            self._store_failed("read", e)
+            return None
+
+    def _write_store(self, key, entry):
+        if not self._store_usable():
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO fragments (key, computed_at, value) "
+                    "VALUES (?, ?, ?)",
+                    (key, entry[0], pickle.dumps(entry[1])),
+                )
+                conn.execute(
+                    "DELETE FROM fragments WHERE computed_at < ?",
+                    (time.time() - self.max_stale,),
+                )
+            self._store_succeeded()
+        except Exception as e:
+            self._store_failed("write", e)
+
+    def _acquire_lease(self, key, owner):
+        if not self._store_usable():
+            return True
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, "
+                    "expires_at = excluded.expires_at WHERE leases.expires_at < ?",
+                    (key, owner, now + LEASE_TIMEOUT, now),
+                )
+            self._store_succeeded()
+            return cursor.rowcount == 1
+        except Exception as e:
+            self._store_failed("lease", e)
+            return True
+
+    def _release_lease(self, key, owner):
+        if not self._store_usable():
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner)
+                )
+            self._store_succeeded()
+        except Exception as e:
+            self._store_failed("release", e)
+
+
+fragment_cache = FragmentCache()
@@ -6,7 +6,10 @@ port = int(os.environ.get("PORT", 5001))
 # Bind to the correct port on all interfaces
 bind = f"0.0.0.0:{port}"
 workers = 4
-threads = 2
+# Live score streams may hold at most half of these; the rest serve ordinary
+# requests.  options.REQUEST_THREADS reads the same GUNICORN_THREADS, so keep
+# the defaults in step.
+threads = int(os.environ.get("GUNICORN_THREADS", 10))
 timeout = 120
 
 # Logging
@@ -1,4 +1,9 @@
+import os
+
 bind = "0.0.0.0:8001"
 workers = 4
-threads = 2
+# Live score streams may hold at most half of these; the rest serve ordinary
+# requests.  options.REQUEST_THREADS reads the same GUNICORN_THREADS, so keep
+# the defaults in step.
+threads = int(os.environ.get("GUNICORN_THREADS", 10))
 timeout = 120
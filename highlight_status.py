@@ -0,0 +1,156 @@
+"""
+Per-process cache of highlight status answers from the video service.
+
+Every viewer of a game card polls /api/highlights/<game_id>/status.  Answers
+are kept for a TTL that depends on what they say: a highlight that is
+available stays available, so that is kept for hours, while "processing"
+and similar states, "not found" and errors are kept for seconds to a
+minute.  Concurrent polls for the same game share one in-flight upstream
+call, so the video service sees about one request per game per TTL and
+worker.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import requests
+
+from http_session import pooled_session
+from video_cache import VIDEO_SERVICE_BASE
+
+logger = logging.getLogger(__name__)
+
+STATUS_AVAILABLE_TTL = float(os.environ.get("HIGHLIGHT_STATUS_AVAILABLE_TTL", 6 * 60 * 60))
+STATUS_PENDING_TTL = float(os.environ.get("HIGHLIGHT_STATUS_PENDING_TTL", 15))
+STATUS_MISSING_TTL = float(os.environ.get("HIGHLIGHT_STATUS_MISSING_TTL", 60))
+STATUS_ERROR_TTL = 5  # keeps an unreachable service from being hammered
+STATUS_TIMEOUT = 5
+STATUS_MAX_ENTRIES = 5000
+
+# An upstream answer as relayed to the browser
+StatusAnswer = namedtuple("StatusAnswer", ["status_code", "body", "content_type"])
+
+ERROR_ANSWER = StatusAnswer(502, b'{"available": false}', "application/json")
+
+
+def _answer_data(answer):
+    """The JSON body of a 200 answer, or None."""
+    if answer.status_code != 200:
+        return None
+    try:
+        data = json.loads(answer.body)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.answer = ERROR_ANSWER
+
+
+class HighlightStatusCache:
+    """Status answers by game, with TTLs by outcome and coalesced fetches."""
+
+    def __init__(self, session, url_template, max_entries=STATUS_MAX_ENTRIES):
+        self.session = session
+        self.url_template = url_template
+        self.max_entries = max_entries
+        self._answers = OrderedDict()  # game_id -> (StatusAnswer, expires_at)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fetches = 0
+        self.coalesced = 0
+
+    def get(self, game_id):
+        """The StatusAnswer for a game and the seconds it stays cached."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._answers.get(game_id)
+            if entry is not None and entry[1] > now:
+                self._answers.move_to_end(game_id)
+                self.hits += 1
+                return entry[0], entry[1] - now
+            in_flight = self._in_flight.get(game_id)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[game_id] = _InFlight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if in_flight.done.wait(STATUS_TIMEOUT + 1):
+                return in_flight.answer, 0
+            # The leader is slow; its placeholder is not an answer, so use
+            # one that arrived meanwhile or ask upstream ourselves
+            with self._lock:
+                entry = self._answers.get(game_id)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0], entry[1] - time.monotonic()
+            return self._fetch(game_id), 0
+
+        try:
+            answer = self._fetch(game_id)
+            ttl = self._ttl(answer)
+            in_flight.answer = answer
+            with self._lock:
+                self._answers[game_id] = (answer, time.monotonic() + ttl)
+                self._answers.move_to_end(game_id)
+                while len(self._answers) > self.max_entries:
+                    self._answers.popitem(last=False)
+            return answer, ttl
+        finally:
+            with self._lock:
+                self._in_flight.pop(game_id, None)
+            in_flight.done.set()
+
+    def stats(self):
+        """Return counters for the debug endpoint."""
+        return {
+            "entries": len(self._answers),
+            "hits": self.hits,
+            "fetches": self.fetches,
+            "coalesced": self.coalesced,
+        }
+
+    def _fetch(self, game_id):
+        self.fetches += 1
+        try:
+            resp = self.session.get(
+                self.url_template.format(game_id=game_id), timeout=STATUS_TIMEOUT
+            )
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Highlight status for game {game_id} failed: {e}")
+            return ERROR_ANSWER
+        return StatusAnswer(
+            resp.status_code,
+            resp.content,
+            resp.headers.get("Content-Type", "application/json"),
+        )
+
+    @staticmethod
+    def _ttl(answer):
+        data = _answer_data(answer)
+        if data is not None:
+            if data.get("available") or data.get("status") == "available":
+                return STATUS_AVAILABLE_TTL
+            # Downloading, processing, failed (will retry)...
+            if data.get("status") not in (None, "unavailable"):
+                return STATUS_PENDING_TTL
+            return STATUS_MISSING_TTL
+        if answer.status_code == 404:
+            return STATUS_MISSING_TTL
+        return STATUS_ERROR_TTL
+
+
+# Its own connections, so status polls never wait behind video downloads
+highlight_status = HighlightStatusCache(
+    pooled_session(),
+    f"{VIDEO_SERVICE_BASE}/api/highlights/{{game_id}}/status",
+)
@@ -0,0 +1,17 @@
+"""
+Keep-alive HTTP sessions for the internal services (video service, sportsbook).
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from options import REQUEST_THREADS
+
+
+def pooled_session(pool_size=REQUEST_THREADS):
+    """A session keeping up to pool_size connections per host alive."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,388 @@
+"""
+Loads everything the human profile page needs in a fixed number of queries.
+
+The profile used to query every role separately and then look up games,
+teams, levels, goals, penalties and names row by row, so a heavy player's
+page took hundreds of round trips.  load_human_profile() fetches each kind of
+row for the human with one set-based query and returns pandas frames (or
+short row lists), so a profile costs at most eight queries however many games
+the person has.  Team, division, level and season names are resolved by the
+caller from the reference data cache.
+
+The page built from this data only changes when the person plays, referees
+or scorekeeps, so it is cached as a snapshot keyed by profile_version(), a
+single cheap query over the human's games and stats aggregation time.
+"""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from hockey_blast_common_lib.h2h_models import SkaterToSkaterStats
+from hockey_blast_common_lib.models import (Division, Game, GameRoster, Goal,
+                                            Human, Penalty, db)
+from hockey_blast_common_lib.stats_models import OrgStatsHuman
+from sqlalchemy import and_, case, func, or_, select, true, union_all
+
+from fragment_cache import FragmentCache
+
+MAX_PROFILE_GAMES = 1000  # most recent roster rows a profile is built from
+
+# Snapshots are keyed by data version, so the TTL only bounds how long a
+# renamed team or teammate can show its old name
+PROFILE_SNAPSHOT_ENABLED = os.environ.get("PROFILE_SNAPSHOT_CACHE", "1") != "0"
+PROFILE_SNAPSHOT_PATH = os.environ.get("PROFILE_SNAPSHOT_PATH", "profile_snapshots.sqlite3")
+PROFILE_SNAPSHOT_TTL = float(os.environ.get("PROFILE_SNAPSHOT_TTL", 60 * 60))
+PROFILE_SNAPSHOT_MAX_ENTRIES = 2000  # in-process snapshots
+
+TEAMMATE_EXCLUDED_NAMES = [
+    "Not Signed In",
+    "No Credit- Roster",
+    "No Goalie",
+    "Goalie Not Noted",
+]
+
+HOME_SHOT_COLUMNS = [
+    "home_period_1_shots",
+    "home_period_2_shots",
+    "home_period_3_shots",
+    "home_ot_shots",
+    "home_so_shots",
+]
+VISITOR_SHOT_COLUMNS = [
+    "visitor_period_1_shots",
+    "visitor_period_2_shots",
+    "visitor_period_3_shots",
+    "visitor_ot_shots",
+    "visitor_so_shots",
+]
+
+# Roster rows carry the game columns too, so the recent games table can be
+# rendered from them.  "date" and "time" keep the Game attribute names so a
+# row can be passed to game_utils.is_game_live().
+ROSTER_QUERY_COLUMNS = {
+    "team_id": GameRoster.team_id,
+    "game_id": GameRoster.game_id,
+    "division_id": Game.division_id,
+    "level_id": Division.level_id,
+    "date": Game.date,
+    "time": Game.time,
+    "day_of_week": Game.day_of_week,
+    "status": Game.status,
+    "role": GameRoster.role,
+    "jersey_number": GameRoster.jersey_number,
+    "home_team_id": Game.home_team_id,
+    "visitor_team_id": Game.visitor_team_id,
+    "home_final_score": Game.home_final_score,
+    "visitor_final_score": Game.visitor_final_score,
+    "home_period_1_score": Game.home_period_1_score,
+    "home_period_2_score": Game.home_period_2_score,
+    "home_period_3_score": Game.home_period_3_score,
+    "visitor_period_1_score": Game.visitor_period_1_score,
+    "visitor_period_2_score": Game.visitor_period_2_score,
+    "visitor_period_3_score": Game.visitor_period_3_score,
+    **{column: getattr(Game, column) for column in HOME_SHOT_COLUMNS},
+    **{column: getattr(Game, column) for column in VISITOR_SHOT_COLUMNS},
+}
+
+ProfileVersion = namedtuple("ProfileVersion", ["token", "has_open_game"])
+
+HumanProfileData = namedtuple(
+    "HumanProfileData",
+    [
+        "human",
+        "org_stats",  # OrgStatsHuman or None
+        "rosters",  # frame of the latest MAX_PROFILE_GAMES roster rows, newest first
+        "recent_games",  # the first top_n roster rows, in frame order
+        "officiated_games",  # game_date, game_id, is_scorekeeper, is_referee
+        "goals",  # every goal the human scored or assisted
+        "penalties",  # game_id, penalty_minutes
+        "teammates",  # top_n rows: teammate_id, names, games_played
+        "skater_matchups",  # top_n rows: stat, opponent names and id
+        "team_season_games",  # season_id, team_id, gp (skater games)
+    ],
+)
+
+
+# Never serve stale snapshots: ttl == max_stale, so an expired one is a miss
+# and is rebuilt in the request (the page needs url_for, so not in a thread)
+profile_snapshot_cache = FragmentCache(
+    path=PROFILE_SNAPSHOT_PATH,
+    ttl=PROFILE_SNAPSHOT_TTL,
+    max_stale=PROFILE_SNAPSHOT_TTL,
+    max_entries=PROFILE_SNAPSHOT_MAX_ENTRIES,
+)
+
+
+def profile_version(human_id, org_id):
+    """Version of a human's profile data, or None if there is no such human.
+
+    The token changes when a game is added to or updated in any of the
+    human's roles, or when their stats are re-aggregated.
+    """
+    games = union_all(
+        select(Game.id, Game.last_update_ts, Game.status)
+        .join(GameRoster, GameRoster.game_id == Game.id)
+        .where(GameRoster.human_id == human_id),
+        select(Game.id, Game.last_update_ts, Game.status).where(
+            or_(
+                Game.scorekeeper_id == human_id,
+                Game.referee_1_id == human_id,
+                Game.referee_2_id == human_id,
+            )
+        ),
+    ).subquery()
+    activity = select(
+        func.count().label("games"),
+        func.max(games.c.id).label("last_game_id"),
+        func.max(games.c.last_update_ts).label("last_update_ts"),
+        func.count().filter(func.upper(games.c.status) == "OPEN").label("open_games"),
+    ).subquery()
+    aggregated_at = (
+        select(OrgStatsHuman.aggregation_completed_at)
+        .where(OrgStatsHuman.human_id == human_id, OrgStatsHuman.org_id == org_id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    row = db.session.execute(
+        select(activity, aggregated_at.label("aggregated_at"))
+        .select_from(Human)
+        .join(activity, true())
+        .where(Human.id == human_id)
+    ).first()
+    if row is None:
+        return None
+    token = f"{row.games}:{row.last_game_id}:{row.last_update_ts}:{row.aggregated_at}"
+    return ProfileVersion(token, row.open_games > 0)
+
+
+def load_human_profile(human_id, org_id, top_n):
+    """All the data for a human's profile page, or None if there is no such human."""
+    row = (
+        db.session.query(Human, OrgStatsHuman)
+        .outerjoin(
+            OrgStatsHuman,
+            and_(OrgStatsHuman.human_id == Human.id, OrgStatsHuman.org_id == org_id),
+        )
+        .filter(Human.id == human_id)
+        .first()
+    )
+    if row is None:
+        return None
+    human, org_stats = row
+
+    roster_rows = _roster_rows(human_id)
+    rosters = build_rosters_df(roster_rows)
+    has_skater_role = org_stats is not None and org_stats.games_skater > 0
+
+    return HumanProfileData(
+        human=human,
+        org_stats=org_stats,
+        rosters=rosters,
+        recent_games=[roster_rows[i] for i in rosters.index[:top_n]],
+        officiated_games=_officiated_games(human_id),
+        goals=_goals(human_id),
+        penalties=_penalties(human_id),
+        teammates=_top_teammates(human_id, rosters["game_id"].unique().tolist(), top_n),
+        skater_matchups=_skater_matchups(human_id, top_n) if has_skater_role else [],
+        team_season_games=_team_season_games(human_id),
+    )
+
+
+def build_rosters_df(rows):
+    """Roster rows as a frame sorted newest first, indexed by position in rows."""
+    df = pd.DataFrame(rows, columns=list(ROSTER_QUERY_COLUMNS)).rename(
+        columns={"date": "game_date", "time": "game_time"}
+    )
+    is_home = df["team_id"] == df["home_team_id"]
+    is_visitor = df["team_id"] == df["visitor_team_id"]
+    df["goals_allowed"] = np.where(
+        is_home, df["home_final_score"], df["visitor_final_score"]
+    )
+    df["shots_faced"] = np.where(
+        is_visitor,
+        df[HOME_SHOT_COLUMNS].fillna(0).sum(axis=1),
+        df[VISITOR_SHOT_COLUMNS].fillna(0).sum(axis=1),
+    )
+    df = df[
+        [
+            "team_id",
+            "game_id",
+            "division_id",
+            "level_id",
+            "game_date",
+            "game_time",
+            "role",
+            "jersey_number",
+            "goals_allowed",
+            "shots_faced",
+        ]
+    ].copy()
+
+    # Convert game_date and game_time to datetime
+    df["game_date"] = pd.to_datetime(df["game_date"])
+    df["game_datetime"] = df["game_date"] + pd.to_timedelta(
+        df["game_time"].astype(str)
+    )
+
+    # Sort by game_datetime in descending order
+    return df.sort_values(by="game_datetime", ascending=False)
+
+
+def _roster_rows(human_id):
+    return (
+        db.session.query(
+            *(column.label(name) for name, column in ROSTER_QUERY_COLUMNS.items())
+        )
+        .select_from(GameRoster)
+        .join(Game, GameRoster.game_id == Game.id)
+        .join(Division, Game.division_id == Division.id)
+        .filter(GameRoster.human_id == human_id)
+        .order_by(Game.date.desc(), Game.time.desc())
+        .limit(MAX_PROFILE_GAMES)
+        .all()
+    )
+
+
+def _officiated_games(human_id):
+    """Games the human scorekept or refereed, with a flag per role."""
+    rows = (
+        db.session.query(
+            Game.id,
+            Game.date,
+            Game.scorekeeper_id,
+            Game.referee_1_id,
+            Game.referee_2_id,
+        )
+        .filter(
+            or_(
+                Game.scorekeeper_id == human_id,
+                Game.referee_1_id == human_id,
+                Game.referee_2_id == human_id,
+            )
+        )
+        .order_by(Game.id)
+        .all()
+    )
+    df = pd.DataFrame(
+        rows,
+        columns=["game_id", "game_date", "scorekeeper_id", "referee_1_id", "referee_2_id"],
+    )
+    return pd.DataFrame(
+        {
+            "game_date": pd.to_datetime(df["game_date"]),
+            "game_id": df["game_id"].astype("int64"),
+            "is_scorekeeper": df["scorekeeper_id"] == human_id,
+            "is_referee": (df["referee_1_id"] == human_id)
+            | (df["referee_2_id"] == human_id),
+        }
+    )
+
+
+def _goals(human_id):
+    rows = (
+        db.session.query(
+            Goal.game_id,
+            Goal.goal_scorer_id,
+            Goal.assist_1_id,
+            Goal.assist_2_id,
+            Goal.scoring_team_id,
+            Division.season_id,
+        )
+        .outerjoin(Game, Goal.game_id == Game.id)
+        .outerjoin(Division, Game.division_id == Division.id)
+        .filter(
+            (Goal.goal_scorer_id == human_id)
+            | (Goal.assist_1_id == human_id)
+            | (Goal.assist_2_id == human_id)
+        )
+        .all()
+    )
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "game_id",
+            "goal_scorer_id",
+            "assist_1_id",
+            "assist_2_id",
+            "scoring_team_id",
+            "season_id",
+        ],
+    )
+
+
+def _penalties(human_id):
+    rows = (
+        db.session.query(Penalty.game_id, Penalty.penalty_minutes)
+        .filter(Penalty.penalized_player_id == human_id)
+        .order_by(Penalty.id)
+        .all()
+    )
+    return pd.DataFrame(rows, columns=["game_id", "penalty_minutes"])
+
+
+def _top_teammates(human_id, game_ids, top_n):
+    """The people the human shared the most roster rows with in game_ids."""
+    full_name = Human.first_name + " " + Human.middle_name + " " + Human.last_name
+    games_played = func.count().label("games_played")
+    return (
+        db.session.query(
+            GameRoster.human_id.label("teammate_id"),
+            Human.first_name,
+            Human.middle_name,
+            Human.last_name,
+            games_played,
+        )
+        .join(Human, GameRoster.human_id == Human.id)
+        .filter(
+            GameRoster.game_id.in_(game_ids),
+            GameRoster.human_id != human_id,
+            ~full_name.in_(TEAMMATE_EXCLUDED_NAMES),
+        )
+        .group_by(GameRoster.human_id, Human.id)
+        .order_by(games_played.desc(), GameRoster.human_id)
+        .limit(top_n)
+        .all()
+    )
+
+
+def _skater_matchups(human_id, top_n):
+    """SkaterToSkaterStats rows for the human with the opponent's name."""
+    opponent_id = case(
+        (SkaterToSkaterStats.skater1_id == human_id, SkaterToSkaterStats.skater2_id),
+        else_=SkaterToSkaterStats.skater1_id,
+    )
+    return (
+        db.session.query(
+            SkaterToSkaterStats,
+            Human.id.label("opponent_id"),
+            Human.first_name,
+            Human.middle_name,
+            Human.last_name,
+        )
+        .outerjoin(Human, Human.id == opponent_id)
+        .filter(
+            (SkaterToSkaterStats.skater1_id == human_id)
+            | (SkaterToSkaterStats.skater2_id == human_id)
+        )
+        .order_by(SkaterToSkaterStats.games_against.desc())
+        .limit(top_n)
+        .all()
+    )
+
+
+def _team_season_games(human_id):
+    """Skater games played per season and team."""
+    return (
+        db.session.query(
+            Division.season_id,
+            GameRoster.team_id,
+            func.count(func.distinct(GameRoster.game_id)).label("gp"),
+        )
+        .join(Game, GameRoster.game_id == Game.id)
+        .join(Division, Game.division_id == Division.id)
+        .filter(GameRoster.human_id == human_id, GameRoster.role != "G")
+        .group_by(Division.season_id, GameRoster.team_id)
+        .all()
+    )
@@ -0,0 +1,267 @@
+"""
+Live scores of the games in progress, pushed to browsers as server-sent events.
+
+The index page used to find live games by scanning every open game and
+resolving its teams, level and rink, and visitors only saw new scores by
+reloading the page.  Each worker now runs one poller thread that computes
+the live games every LIVE_SCORES_POLL_INTERVAL seconds while browsers are
+subscribed, and fans the changed games (and the ids of games that ended)
+out to every open /api/live_scores/stream.  The index renders from the
+poller's latest result when it is fresh.
+
+An open stream holds a request thread, so each worker accepts at most
+LIVE_SCORES_MAX_CLIENTS of them, never more than half of its request
+threads, which leaves the rest to ordinary pages.  A stream ends after
+LIVE_SCORES_STREAM_SECONDS; the browser then reconnects and starts from a
+new snapshot.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from hockey_blast_common_lib.models import Game, db
+
+from background import BackgroundThread
+from game_utils import is_game_live, parse_live_time
+from options import REQUEST_THREADS
+from reference_data import reference_data
+
+logger = logging.getLogger(__name__)
+
+LIVE_SCORES_POLL_INTERVAL = float(os.environ.get("LIVE_SCORES_POLL_INTERVAL", 5))
+LIVE_SCORES_MAX_CLIENTS = min(
+    int(os.environ.get("LIVE_SCORES_MAX_CLIENTS", REQUEST_THREADS // 2)),
+    REQUEST_THREADS // 2,
+)
+LIVE_SCORES_STREAM_SECONDS = float(os.environ.get("LIVE_SCORES_STREAM_SECONDS", 5 * 60))
+HEARTBEAT_INTERVAL = 15  # seconds between keep-alive comments on an idle stream
+RECONNECT_DELAY_MS = 5000
+CLIENT_QUEUE_SIZE = 32  # events a slow client may fall behind before it is dropped
+
+
+def live_games(now=None):
+    """The games in progress with their scores, as the index page renders them."""
+    now = now or datetime.now()
+    # A live game started at most 75 minutes ago, so it is from today or
+    # (just after midnight) yesterday
+    games = (
+        db.session.query(Game)
+        .filter(Game.status == "OPEN", Game.date >= (now - timedelta(days=1)).date())
+        .order_by(Game.date, Game.time, Game.id)
+        .all()
+    )
+    live_games_data = []
+    for game in games:
+        if not is_game_live(game, now):
+            continue
+        visitor_team = reference_data.team(game.visitor_team_id)
+        if not game.division_id or not visitor_team:
+            continue
+
+        visitor_score = (
+            (game.visitor_period_1_score or 0)
+            + (game.visitor_period_2_score or 0)
+            + (game.visitor_period_3_score or 0)
+            + (game.visitor_ot_score or 0)
+        )
+        home_score = (
+            (game.home_period_1_score or 0)
+            + (game.home_period_2_score or 0)
+            + (game.home_period_3_score or 0)
+            + (game.home_ot_score or 0)
+        )
+        period, time_left = parse_live_time(game.live_time)
+
+        live_games_data.append(
+            {
+                "game_id": game.id,
+                "visitor_team_name": visitor_team.name,
+                "visitor_team_id": visitor_team.id,
+                "home_team_name": reference_data.team_name(game.home_team_id),
+                "home_team_id": game.home_team_id,
+                "visitor_score": visitor_score,
+                "home_score": home_score,
+                # Short level name and master location (for linking)
+                "level": reference_data.level_short_name(game.division_id),
+                "period": period,
+                "time_left": time_left,
+                "location": reference_data.master_location(game.location_id),
+            }
+        )
+    return live_games_data
+
+
+def feed_row(row):
+    """A live game as sent to the browser (the location reduced to its label)."""
+    location = row["location"]
+    if location is None:
+        label = "Unknown Location"
+    elif location.location_name or location.rink_name:
+        label = location.location_name or ""
+        if location.rink_name:
+            label += f", {location.rink_name} Rink"
+    else:
+        label = location.location_in_game_source or ""
+    return {
+        **{key: value for key, value in row.items() if key != "location"},
+        "location_id": location.id if location else None,
+        "location_label": label,
+    }
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+class _Client:
+    def __init__(self):
+        self.events = queue.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.dropped = False
+        # A stream that was never iterated is never closed either, so
+        # clients are also forgotten once their stream must have ended
+        self.expires_at = time.monotonic() + LIVE_SCORES_STREAM_SECONDS + HEARTBEAT_INTERVAL
+
+
+class LiveScoreFeed:
+    """One live games poller per worker, fanning changes out to SSE clients."""
+
+    def __init__(
+        self,
+        poll_interval=LIVE_SCORES_POLL_INTERVAL,
+        max_clients=LIVE_SCORES_MAX_CLIENTS,
+    ):
+        self.app = None
+        self.poll_interval = poll_interval
+        self.max_clients = max_clients
+        self._games = {}  # game_id -> row, in display order
+        self._polled_at = None
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._refresher = BackgroundThread(self._run, "live-scores-poller")
+        self.polls = 0
+        self.events = 0
+        self.dropped = 0
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["live_scores"] = self
+
+    def games(self):
+        """The live games, from the poller when it is current."""
+        polled_at = self._polled_at
+        if polled_at is not None and time.monotonic() - polled_at < 2 * self.poll_interval:
+            return list(self._games.values())
+        return live_games()
+
+    def open_stream(self):
+        """An SSE event generator for a new client, or None when the worker is full."""
+        with self._lock:
+            now = time.monotonic()
+            self._clients = {c for c in self._clients if c.expires_at > now}
+            if len(self._clients) >= self.max_clients:
+                return None
+        self._ensure_started()
+        # The first subscriber may find the poller idle, so catch up here
+        # (in the request, where there is an app context)
+        if self._polled_at is None or (
+            time.monotonic() - self._polled_at > 2 * self.poll_interval
+        ):
+            self.poll()
+        client = _Client()
+        # Subscribing between polls means the snapshot and the following
+        # deltas neither overlap nor leave a gap
+        with self._poll_lock:
+            snapshot = [feed_row(row) for row in self._games.values()]
+            with self._lock:
+                # Others may have subscribed since the check above
+                if len(self._clients) >= self.max_clients:
+                    return None
+                self._clients.add(client)
+        return self._stream(client, snapshot)
+
+    def stats(self):
+        """Return counters for the debug endpoint."""
+        return {
+            "clients": len(self._clients),
+            "live_games": len(self._games),
+            "polls": self.polls,
+            "events": self.events,
+            "dropped": self.dropped,
+            "running": self._refresher.is_alive(),
+        }
+
+    def poll(self):
+        """Recompute the live games and send what changed to the clients."""
+        with self._poll_lock:
+            games = {row["game_id"]: row for row in live_games()}
+            previous = self._games
+            changed = [
+                feed_row(row)
+                for game_id, row in games.items()
+                if previous.get(game_id) != row
+            ]
+            ended = [game_id for game_id in previous if game_id not in games]
+            self._games = games
+            self._polled_at = time.monotonic()
+            self.polls += 1
+        if changed or ended:
+            self._broadcast(_event("delta", {"games": changed, "ended": ended}))
+
+    def _broadcast(self, event):
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.events.put_nowait(event)
+                self.events += 1
+            except queue.Full:
+                # Too far behind; it reconnects and gets a fresh snapshot
+                client.dropped = True
+                self._unsubscribe(client)
+                self.dropped += 1
+
+    def _unsubscribe(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def _stream(self, client, snapshot):
+        deadline = time.monotonic() + LIVE_SCORES_STREAM_SECONDS
+        try:
+            yield f"retry: {RECONNECT_DELAY_MS}\n"
+            yield _event("snapshot", {"games": snapshot})
+            while not client.dropped and time.monotonic() < deadline:
+                try:
+                    yield client.events.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            self._unsubscribe(client)
+
+    def _ensure_started(self):
+        if self.app is not None:
+            self._refresher.ensure_started()
+
+    def _run(self, stop):
+        while not stop.wait(self.poll_interval):
+            # Nobody is listening: stay idle, the index computes its own
+            if not self._clients:
+                continue
+            with self.app.app_context():
+                try:
+                    self.poll()
+                except Exception as e:
+                    logger.error(f"Failed to poll live scores: {e}")
+                finally:
+                    db.session.remove()
+
+    def close(self):
+        self._refresher.stop()
+
+
+live_scores = LiveScoreFeed()
@@ -0,0 +1,786 @@
+"""
+In-memory name search over humans, their aliases and teams.
+
+The search forms used to run ilike('%...%') on Human.first_name,
+Human.last_name and Team.name, which Postgres answers with sequential
+scans, followed by one HumanAlias query per result.  Each worker now keeps
+the names in memory instead: normalized (case, accents and punctuation
+folded), with trigram postings for substring matches and a sorted token
+list for the prefix matches of one- and two-letter queries.  A human
+matches if their name or any of their aliases does.
+
+Misspelled names are found by fuzzy_humans, which allows a bounded number
+of edits per word (trigram filtering, then an edit distance check), for
+the search forms and the chat tooling alike.
+
+The navbar typeahead (suggest) matches word prefixes of full names and team
+names, ranks them by games played, and caches its answers by query until
+the index changes.  One- and two-letter prefixes match too many names to
+rank per keystroke, so their best matches are ranked when the index is
+built.
+
+A background thread probes the tables for a larger max(id) every
+NAME_SEARCH_CHECK_INTERVAL seconds and adds only the new rows; everything
+is rebuilt every NAME_SEARCH_RELOAD_INTERVAL seconds so renames, merges and
+deletions are picked up.  Either way a new index is built (the new rows go
+into a copy of the current one) and swapped in, so lookups read an index
+that never changes under them and take no lock.
+"""
+
+import bisect
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict, namedtuple
+from itertools import islice
+
+from hockey_blast_common_lib.models import Game, Human, HumanAlias, Team, db
+from hockey_blast_common_lib.stats_models import OrgStatsHuman
+from hockey_blast_common_lib.stats_utils import ALL_ORGS_ID
+from sqlalchemy import func, literal, select, union_all
+
+from background import BackgroundThread, run_every
+from non_human_registry import non_human_registry
+from options import MAX_HUMAN_SEARCH_RESULTS, MAX_TEAM_SEARCH_RESULTS
+
+logger = logging.getLogger(__name__)
+
+NAME_SEARCH_CHECK_INTERVAL = float(os.environ.get("NAME_SEARCH_CHECK_INTERVAL", 60))
+NAME_SEARCH_RELOAD_INTERVAL = float(
+    os.environ.get("NAME_SEARCH_RELOAD_INTERVAL", 60 * 60)
+)
+SUGGEST_LIMIT = 8
+SUGGEST_CACHE_SIZE = 2048  # cached typeahead answers per worker
+SUGGEST_PRECOMPUTED = 32  # ranked suggestions kept per short prefix
+SHORT_PREFIX = 2  # prefixes up to this long are ranked when the index is built
+
+# Match quality, best first
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING = range(4)
+
+_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    """Lowercase `text` without accents, with punctuation and spaces collapsed."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _SEPARATORS.sub(" ", text.lower()).strip()
+
+
+def _trigrams(text):
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _word_trigrams(word):
+    return _trigrams(f"  {word} ")
+
+
+def edit_distance(a, b, max_distance):
+    """Edits (insertions, deletions, substitutions, adjacent swaps) from `a` to `b`.
+
+    Only the diagonal band of width `max_distance` is computed, and None is
+    returned once the distance is known to exceed `max_distance`.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    over = max_distance + 1
+    previous2 = None
+    previous = [j if j <= max_distance else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+        row_min = current[0]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            value = previous[j - 1] + (a[i - 1] != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (
+                i > 1
+                and j > 1
+                and a[i - 1] == b[j - 2]
+                and a[i - 2] == b[j - 1]
+                and previous2[j - 2] + 1 < value
+            ):
+                value = previous2[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return None
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= max_distance else None
+
+
+def default_max_distance(word):
+    """Typos tolerated in a word: none up to two letters, one up to five, else two."""
+    if len(word) <= 2:
+        return 0
+    return 1 if len(word) <= 5 else 2
+
+
+def full_name(first_name, middle_name, last_name):
+    """A name as the search results have always printed it."""
+    return f"{first_name} {middle_name} {last_name}".strip()
+
+
+class HumanMatch(
+    namedtuple("HumanMatch", ["id", "first_name", "middle_name", "last_name", "aliases"])
+):
+    """A human found by name; `aliases` are their other names."""
+
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return full_name(self.first_name, self.middle_name, self.last_name)
+
+    @property
+    def display_name(self):
+        if not self.aliases:
+            return self.name
+        return f"{self.name} A.K.A. {', '.join(self.aliases)}"
+
+
+TeamMatch = namedtuple("TeamMatch", ["id", "name"])
+
+
+class _FieldIndex:
+    """Normalized strings by document id, with trigram and token postings.
+
+    With `fuzzy`, the distinct words also get (padded) trigram postings of
+    their own, for typo-tolerant word lookups.  Call freeze() after adding.
+    """
+
+    def __init__(self, fuzzy=False):
+        self.texts = {}
+        self._grams = defaultdict(set)
+        self._tokens = defaultdict(set)
+        self._token_grams = defaultdict(set) if fuzzy else None
+        self._sorted_tokens = []
+        # (postings, key) of the sets a copy shares with its original, or
+        # None when every set belongs to this index
+        self._owned = None
+
+    def copy(self):
+        """A copy to add to while this one is still being read."""
+        other = _FieldIndex.__new__(_FieldIndex)
+        other.texts = dict(self.texts)
+        other._grams = defaultdict(set, self._grams)
+        other._tokens = defaultdict(set, self._tokens)
+        other._token_grams = (
+            None if self._token_grams is None else defaultdict(set, self._token_grams)
+        )
+        other._sorted_tokens = self._sorted_tokens
+        other._owned = set()
+        return other
+
+    def add(self, doc_id, text):
+        self.texts[doc_id] = text
+        for gram in _trigrams(text):
+            self._post(self._grams, gram, doc_id)
+        for token in text.split():
+            if self._token_grams is not None and token not in self._tokens:
+                for gram in _word_trigrams(token):
+                    self._post(self._token_grams, gram, token)
+            self._post(self._tokens, token, doc_id)
+
+    def _post(self, postings, key, value):
+        if self._owned is not None and (id(postings), key) not in self._owned:
+            # The set is shared with the index being read: copy it the first
+            # time this index adds to it, then add in place
+            postings[key] = set(postings.get(key, ()))
+            self._owned.add((id(postings), key))
+        postings[key].add(value)
+
+    def freeze(self):
+        self._sorted_tokens = sorted(self._tokens)
+
+    def match(self, query):
+        """Ids whose text contains `query` (or, below three letters, has a word starting with it)."""
+        if len(query) >= 3:
+            postings = sorted(
+                (self._grams.get(gram) for gram in _trigrams(query)),
+                key=lambda ids: len(ids) if ids else 0,
+            )
+            if not postings[0]:
+                return set()
+            candidates = postings[0].intersection(*postings[1:])
+            return {doc_id for doc_id in candidates if query in self.texts[doc_id]}
+        return self.prefixed(query)
+
+    def prefixed(self, prefix):
+        """Ids with a word starting with `prefix`."""
+        ids = set()
+        i = bisect.bisect_left(self._sorted_tokens, prefix)
+        while i < len(self._sorted_tokens) and self._sorted_tokens[i].startswith(prefix):
+            ids.update(self._tokens[self._sorted_tokens[i]])
+            i += 1
+        return ids
+
+    def fuzzy(self, word, max_distance):
+        """{id: distance} of texts with a word within `max_distance` edits of `word`.
+
+        Candidate words must share enough trigrams with `word` (an edit
+        changes at most four of them) and differ in length by at most
+        `max_distance`; only those get an edit distance computed.
+        """
+        grams = _word_trigrams(word)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._token_grams.get(gram, ()))
+        required = max(1, len(grams) - 4 * max_distance)
+        ids = {}
+        for token, shared in counts.items():
+            if shared < required or abs(len(token) - len(word)) > max_distance:
+                continue
+            distance = edit_distance(word, token, max_distance)
+            if distance is None:
+                continue
+            for doc_id in self._tokens[token]:
+                if distance < ids.get(doc_id, max_distance + 1):
+                    ids[doc_id] = distance
+        return ids
+
+    def quality(self, doc_id, query):
+        text = self.texts[doc_id]
+        if text == query:
+            return EXACT
+        if text.startswith(query):
+            return PREFIX
+        if f" {query}" in text:
+            return WORD_PREFIX
+        return SUBSTRING
+
+
+class _NameIndex:
+    """Humans (one variant per name and alias) and teams.
+
+    An index is not changed once freeze() has published it: new rows go into
+    a copy(), which is frozen and swapped in.
+    """
+
+    def __init__(self):
+        self.humans = {}  # human_id -> (first_name, middle_name, last_name), by id
+        self.sort_keys = {}  # human_id -> normalized (last_name, first_name)
+        self.aliases = {}  # human_id -> [(first, middle, last)]
+        self.teams = {}  # team_id -> name
+        self.variant_human = []  # variant id -> human_id
+        self.variant_is_alias = []
+        self.first_names = _FieldIndex()
+        self.last_names = _FieldIndex()
+        self.full_names = _FieldIndex(fuzzy=True)
+        self.team_names = _FieldIndex()
+        # Games played, for ranking suggestions
+        self.human_games = {}
+        self.team_games = {}
+        # Ranked suggestions for one- and two-letter prefixes, which match
+        # too many names to rank per keystroke
+        self.human_top = {}  # prefix -> human ids, best first
+        self.team_top = {}
+        self._new_prefixes = (set(), set())  # (human, team) prefixes to rank
+        self.max_ids = {"humans": 0, "aliases": 0, "teams": 0}
+
+    def copy(self):
+        other = _NameIndex.__new__(_NameIndex)
+        other.__dict__.update(self.__dict__)
+        for name in (
+            "humans", "sort_keys", "aliases", "teams", "variant_human",
+            "variant_is_alias", "human_top", "team_top", "max_ids",
+        ):
+            setattr(other, name, type(getattr(self, name))(getattr(self, name)))
+        for name in ("first_names", "last_names", "full_names", "team_names"):
+            setattr(other, name, getattr(self, name).copy())
+        other._new_prefixes = (set(), set())
+        return other
+
+    def freeze(self):
+        """Finish adding: sort the tokens and rank the new short prefixes."""
+        for field in (self.first_names, self.last_names, self.full_names, self.team_names):
+            field.freeze()
+        human_prefixes, team_prefixes = self._new_prefixes
+        for prefix in human_prefixes:
+            self.human_top[prefix] = tuple(
+                self.rank_humans(
+                    prefix, self.full_names.prefixed(prefix), SUGGEST_PRECOMPUTED
+                )
+            )
+        for prefix in team_prefixes:
+            self.team_top[prefix] = tuple(
+                self.rank_teams(
+                    prefix, self.team_names.prefixed(prefix), SUGGEST_PRECOMPUTED
+                )
+            )
+        self._new_prefixes = (set(), set())
+
+    def add_human(self, human_id, first_name, middle_name, last_name):
+        self.humans[human_id] = (first_name, middle_name, last_name)
+        self.sort_keys[human_id] = (normalize(last_name), normalize(first_name))
+        self._add_variant(human_id, first_name, last_name, is_alias=False)
+        self.max_ids["humans"] = max(self.max_ids["humans"], human_id)
+
+    def add_alias(self, alias_id, human_id, first_name, middle_name, last_name):
+        self.max_ids["aliases"] = max(self.max_ids["aliases"], alias_id)
+        if human_id not in self.humans:
+            return
+        # A new list, as a copy shares the old one
+        self.aliases[human_id] = [
+            *self.aliases.get(human_id, ()),
+            (first_name, middle_name, last_name),
+        ]
+        self._add_variant(human_id, first_name, last_name, is_alias=True)
+
+    def add_team(self, team_id, name):
+        self.teams[team_id] = name
+        text = normalize(name)
+        self.team_names.add(team_id, text)
+        self._new_prefixes[1].update(_short_prefixes(text))
+        self.max_ids["teams"] = max(self.max_ids["teams"], team_id)
+
+    def _add_variant(self, human_id, first_name, last_name, is_alias):
+        variant = len(self.variant_human)
+        self.variant_human.append(human_id)
+        self.variant_is_alias.append(is_alias)
+        self.first_names.add(variant, normalize(first_name))
+        self.last_names.add(variant, normalize(last_name))
+        text = normalize(f"{first_name} {last_name}")
+        self.full_names.add(variant, text)
+        self._new_prefixes[0].update(_short_prefixes(text))
+
+    def match(self, human_id):
+        first_name, middle_name, last_name = self.humans[human_id]
+        name = full_name(first_name, middle_name, last_name)
+        aliases = []
+        for alias in self.aliases.get(human_id, ()):
+            alias_name = full_name(*alias)
+            if alias_name != name and alias_name not in aliases:
+                aliases.append(alias_name)
+        return HumanMatch(human_id, first_name, middle_name, last_name, tuple(aliases))
+
+    # Suggestions
+
+    def rank_humans(self, query, variants, limit, excluded=frozenset()):
+        """The best `limit` humans of the full name variants matching `query`."""
+        texts = self.full_names.texts
+        best = {}
+        for variant in variants:
+            human_id = self.variant_human[variant]
+            if human_id in excluded:
+                continue
+            rank = (not texts[variant].startswith(query), self.variant_is_alias[variant])
+            if human_id not in best or rank < best[human_id]:
+                best[human_id] = rank
+        return heapq.nsmallest(
+            limit,
+            best,
+            key=lambda human_id: (
+                best[human_id],
+                -self.human_games.get(human_id, 0),
+                self.sort_keys[human_id],
+                human_id,
+            ),
+        )
+
+    def rank_teams(self, query, team_ids, limit):
+        texts = self.team_names.texts
+        return heapq.nsmallest(
+            limit,
+            team_ids,
+            key=lambda team_id: (
+                not texts[team_id].startswith(query),
+                -self.team_games.get(team_id, 0),
+                texts[team_id],
+                team_id,
+            ),
+        )
+
+    def suggest_humans(self, query, words, limit, excluded):
+        top = self.human_top.get(query) if len(words) == 1 else None
+        if top is not None:
+            human_ids = [human_id for human_id in top if human_id not in excluded]
+            # Unless too many of the ranked ones were excluded
+            if len(human_ids) >= limit or len(top) < SUGGEST_PRECOMPUTED:
+                return human_ids[:limit]
+        return self.rank_humans(
+            query, _prefixed_all(self.full_names, words), limit, excluded
+        )
+
+    def suggest_teams(self, query, words, limit):
+        top = self.team_top.get(query) if len(words) == 1 else None
+        if top is not None and (limit <= len(top) or len(top) < SUGGEST_PRECOMPUTED):
+            return list(top[:limit])
+        return self.rank_teams(query, _prefixed_all(self.team_names, words), limit)
+
+
+class NameSearch:
+    """Name lookups for humans and teams, answered from memory."""
+
+    def __init__(
+        self,
+        check_interval=NAME_SEARCH_CHECK_INTERVAL,
+        reload_interval=NAME_SEARCH_RELOAD_INTERVAL,
+    ):
+        self.app = None
+        self.check_interval = check_interval
+        self.reload_interval = reload_interval
+        self._index = _NameIndex()
+        self._suggestions = OrderedDict()  # (query, limit) -> suggestions
+        self._last_reload = 0.0
+        self._lock = threading.Lock()
+        self._refresher = BackgroundThread(self._run, "name-search-refresh")
+        self.searches = 0
+        self.fuzzy_searches = 0
+        self.suggestion_hits = 0
+        self.loads = 0
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["name_search"] = self
+        with app.app_context():
+            self.refresh(force=True)
+
+    # Lookups
+
+    def humans(
+        self,
+        first_name=None,
+        last_name=None,
+        limit=MAX_HUMAN_SEARCH_RESULTS,
+        include_non_humans=False,
+    ):
+        """HumanMatches whose first and last name contain the given parts, best first.
+
+        Exact names rank before prefixes, prefixes before other substrings,
+        and a person's own name before their aliases.  Without either part
+        every human matches, in id order.
+        """
+        self._ensure_started()
+        first_query = normalize(first_name)
+        last_query = normalize(last_name)
+        excluded = frozenset() if include_non_humans else non_human_registry.ids()
+        self.searches += 1
+        index = self._index
+        if not first_query and not last_query:
+            ids = (human_id for human_id in index.humans if human_id not in excluded)
+            return [index.match(human_id) for human_id in islice(ids, limit)]
+
+        variants = None
+        for field, query in (
+            (index.first_names, first_query),
+            (index.last_names, last_query),
+        ):
+            if query:
+                found = field.match(query)
+                variants = found if variants is None else variants & found
+
+        # The best-ranked variant of every human
+        best = {}
+        for variant in variants:
+            human_id = index.variant_human[variant]
+            if human_id in excluded:
+                continue
+            rank = (
+                (index.first_names.quality(variant, first_query) if first_query else EXACT)
+                + (index.last_names.quality(variant, last_query) if last_query else EXACT),
+                index.variant_is_alias[variant],
+            )
+            if human_id not in best or rank < best[human_id]:
+                best[human_id] = rank
+        ranked = heapq.nsmallest(
+            limit,
+            best,
+            key=lambda human_id: (best[human_id], index.sort_keys[human_id], human_id),
+        )
+        return [index.match(human_id) for human_id in ranked]
+
+    def fuzzy_humans(
+        self,
+        name,
+        limit=MAX_HUMAN_SEARCH_RESULTS,
+        max_distance=None,
+        include_non_humans=False,
+    ):
+        """(HumanMatch, distance) pairs for names that resemble `name`, closest first.
+
+        Every word of `name` must be within `max_distance` edits (by default
+        depending on its length, see default_max_distance) of a word of the
+        person's first and last name or of an alias; `distance` is the sum
+        over the words.  Among equally close names the most active person
+        comes first.
+        """
+        self._ensure_started()
+        words = normalize(name).split()
+        if not words:
+            return []
+        excluded = frozenset() if include_non_humans else non_human_registry.ids()
+        self.fuzzy_searches += 1
+        index = self._index
+        distances = None
+        for word in words:
+            word_distance = (
+                default_max_distance(word) if max_distance is None else max_distance
+            )
+            found = index.full_names.fuzzy(word, word_distance)
+            if distances is None:
+                distances = found
+            else:
+                distances = {
+                    variant: distance + found[variant]
+                    for variant, distance in distances.items()
+                    if variant in found
+                }
+            if not distances:
+                return []
+
+        best = {}
+        for variant, distance in distances.items():
+            human_id = index.variant_human[variant]
+            if human_id in excluded:
+                continue
+            rank = (distance, index.variant_is_alias[variant])
+            if human_id not in best or rank < best[human_id]:
+                best[human_id] = rank
+        ranked = heapq.nsmallest(
+            limit,
+            best,
+            key=lambda human_id: (
+                best[human_id],
+                -index.human_games.get(human_id, 0),
+                index.sort_keys[human_id],
+                human_id,
+            ),
+        )
+        return [(index.match(human_id), best[human_id][0]) for human_id in ranked]
+
+    def teams(self, name=None, limit=MAX_TEAM_SEARCH_RESULTS):
+        """TeamMatches whose name contains `name`, best first (all teams without it)."""
+        self._ensure_started()
+        query = normalize(name)
+        self.searches += 1
+        index = self._index
+        if not query:
+            team_ids = list(islice(index.teams, limit))
+        else:
+            names = index.team_names
+            team_ids = heapq.nsmallest(
+                limit,
+                names.match(query),
+                key=lambda team_id: (
+                    names.quality(team_id, query),
+                    names.texts[team_id],
+                    team_id,
+                ),
+            )
+        return [TeamMatch(team_id, index.teams[team_id]) for team_id in team_ids]
+
+    def suggest(self, query, limit=SUGGEST_LIMIT):
+        """Typeahead matches for `query`: {"humans": [...], "teams": [...]}.
+
+        Every word of the query must start a word of the name.  Names that
+        start with the whole query come first, then the most games played.
+        Answers are cached by query until the index changes.
+        """
+        self._ensure_started()
+        query = normalize(query)
+        if not query:
+            return {"humans": [], "teams": []}
+        key = (query, limit)
+        with self._lock:
+            index = self._index
+            suggestions = self._suggestions.get(key)
+            if suggestions is not None:
+                self._suggestions.move_to_end(key)
+                self.suggestion_hits += 1
+                return suggestions
+        self.searches += 1
+        words = query.split()
+        human_ids = index.suggest_humans(
+            query, words, limit, non_human_registry.ids()
+        )
+        team_ids = index.suggest_teams(query, words, limit)
+        suggestions = {
+            "humans": [
+                {
+                    "id": human_id,
+                    "name": index.match(human_id).name,
+                    "games": index.human_games.get(human_id, 0),
+                }
+                for human_id in human_ids
+            ],
+            "teams": [
+                {
+                    "id": team_id,
+                    "name": index.teams[team_id],
+                    "games": index.team_games.get(team_id, 0),
+                }
+                for team_id in team_ids
+            ],
+        }
+        with self._lock:
+            # Not if the index was replaced meanwhile
+            if self._index is index:
+                self._suggestions[key] = suggestions
+                while len(self._suggestions) > SUGGEST_CACHE_SIZE:
+                    self._suggestions.popitem(last=False)
+        return suggestions
+
+    def stats(self):
+        """Return counters for the debug endpoint."""
+        index = self._index
+        return {
+            "humans": len(index.humans),
+            "aliases": sum(len(aliases) for aliases in index.aliases.values()),
+            "teams": len(index.teams),
+            "max_ids": dict(index.max_ids),
+            "searches": self.searches,
+            "fuzzy_searches": self.fuzzy_searches,
+            "cached_suggestions": len(self._suggestions),
+            "suggestion_hits": self.suggestion_hits,
+            "loads": self.loads,
+            "running": self._refresher.is_alive(),
+        }
+
+    # Refreshing
+
+    def refresh(self, force=False):
+        """Add rows created since the last refresh, or rebuild everything."""
+        try:
+            if force or time.monotonic() - self._last_reload > self.reload_interval:
+                started = time.monotonic()
+                index = _NameIndex()
+                self._add_rows(index, self._fetch(index.max_ids))
+                index.human_games, index.team_games = self._fetch_activity()
+                index.freeze()
+                # Searches keep using the old index until the new one is complete
+                self._publish(index)
+                self._last_reload = time.monotonic()
+                self.loads += 1
+                logger.info(
+                    f"Built name search index of {len(index.humans)} humans and "
+                    f"{len(index.teams)} teams in {time.monotonic() - started:.1f} s"
+                )
+                return
+            max_ids = self._probe()
+            if any(max_ids[name] > self._index.max_ids[name] for name in max_ids):
+                # Searches read the index without locking, so the rows go
+                # into a copy
+                index = self._index.copy()
+                self._add_rows(index, self._fetch(index.max_ids))
+                index.freeze()
+                self._publish(index)
+        except Exception as e:
+            logger.error(f"Failed to refresh the name search index: {e}")
+        finally:
+            db.session.remove()
+
+    def _publish(self, index):
+        with self._lock:
+            self._index = index
+            self._suggestions.clear()
+
+    def _probe(self):
+        """max(id) of humans, aliases and teams, in one round trip."""
+        stmt = union_all(
+            select(literal("humans"), func.max(Human.id)),
+            select(literal("aliases"), func.max(HumanAlias.id)),
+            select(literal("teams"), func.max(Team.id)),
+        )
+        return {name: max_id or 0 for name, max_id in db.session.execute(stmt)}
+
+    @staticmethod
+    def _fetch(max_ids):
+        """Humans, aliases and teams with ids above `max_ids`."""
+        humans = db.session.execute(
+            select(Human.id, Human.first_name, Human.middle_name, Human.last_name)
+            .where(Human.id > max_ids["humans"])
+            .order_by(Human.id)
+        ).all()
+        aliases = db.session.execute(
+            select(
+                HumanAlias.id,
+                HumanAlias.human_id,
+                HumanAlias.first_name,
+                HumanAlias.middle_name,
+                HumanAlias.last_name,
+            )
+            .where(HumanAlias.id > max_ids["aliases"], HumanAlias.human_id.isnot(None))
+            .order_by(HumanAlias.id)
+        ).all()
+        teams = db.session.execute(
+            select(Team.id, Team.name).where(Team.id > max_ids["teams"]).order_by(Team.id)
+        ).all()
+        return humans, aliases, teams
+
+    @staticmethod
+    def _fetch_activity():
+        """Games played by every human (all organizations) and every team."""
+        human_games = dict(
+            db.session.execute(
+                select(OrgStatsHuman.human_id, OrgStatsHuman.games_total).where(
+                    OrgStatsHuman.org_id == ALL_ORGS_ID
+                )
+            ).all()
+        )
+        team_game = union_all(
+            select(Game.visitor_team_id.label("team_id")),
+            select(Game.home_team_id.label("team_id")),
+        ).subquery()
+        team_games = dict(
+            db.session.execute(
+                select(team_game.c.team_id, func.count()).group_by(team_game.c.team_id)
+            ).all()
+        )
+        return human_games, team_games
+
+    @staticmethod
+    def _add_rows(index, rows):
+        humans, aliases, teams = rows
+        for row in humans:
+            index.add_human(*row)
+        for row in aliases:
+            index.add_alias(*row)
+        for row in teams:
+            index.add_team(*row)
+
+    def _ensure_started(self):
+        if self.app is not None:
+            self._refresher.ensure_started()
+
+    def _run(self, stop):
+        run_every(stop, self.check_interval, self.app, self.refresh)
+
+    def close(self):
+        self._refresher.stop()
+
+
+def _short_prefixes(text):
+    return {token[:n] for token in text.split() for n in range(1, SHORT_PREFIX + 1)}
+
+
+def _prefixed_all(field, words):
+    """Ids in which every word starts some word of the text."""
+    # Look up the longest (usually most selective) word and check the others
+    # against the candidates' texts, rather than collect every name starting
+    # with a short one
+    words = sorted(words, key=len, reverse=True)
+    ids = field.prefixed(words[0])
+    for word in words[1:]:
+        ids = {
+            doc_id
+            for doc_id in ids
+            if field.texts[doc_id].startswith(word) or f" {word}" in field.texts[doc_id]
+        }
+        if not ids:
+            break
+    return ids
+
+
+name_search = NameSearch()
@@ -0,0 +1,110 @@
+"""
+Refreshable registry of non-human ids (placeholder names like "Home",
+"Unknown" or "Empty Net", test accounts and percentile markers).
+
+The ids used to be loaded once at startup and shipped to Postgres as a
+literal NOT IN list on every leaderboard and search query.  The registry
+reloads them in the background, and queries drop non-humans in Python
+instead: they over-fetch past their LIMIT and filter the rows, so the SQL
+text stays small and constant and new placeholders are picked up without a
+restart.
+"""
+
+import logging
+import os
+import time
+
+from hockey_blast_common_lib.models import db
+from hockey_blast_common_lib.utils import get_non_human_ids
+
+from background import BackgroundThread, run_every
+
+logger = logging.getLogger(__name__)
+
+NON_HUMAN_REFRESH_INTERVAL = float(os.environ.get("NON_HUMAN_REFRESH_INTERVAL", 10 * 60))
+
+
+def _row_human_id(row):
+    return row[0].human_id
+
+
+class NonHumanRegistry:
+    """The current set of non-human ids, reloaded every refresh_interval seconds."""
+
+    def __init__(self, refresh_interval=NON_HUMAN_REFRESH_INTERVAL):
+        self.app = None
+        self.refresh_interval = refresh_interval
+        self._ids = frozenset()
+        self._loaded_at = None
+        self._refresher = BackgroundThread(self._run, "non-human-refresh")
+        self.refetches = 0
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["non_human_registry"] = self
+        with app.app_context():
+            self.refresh()
+
+    def ids(self):
+        self._ensure_started()
+        return self._ids
+
+    def is_non_human(self, human_id):
+        return human_id in self.ids()
+
+    def top_rows(self, query, limit, human_id=_row_human_id):
+        """The first `limit` rows of an ordered query that belong to real humans.
+
+        Fetches a few extra rows and drops non-humans in Python.  If too many
+        rows were dropped to fill the limit, the query is re-run with a larger
+        window, so the result matches a NOT IN filter in SQL.  `human_id`
+        extracts the human id from a row (by default the human_id of the first
+        entity, which fits the OrgStats* leaderboard queries).
+        """
+        non_human_ids = self.ids()
+        if not non_human_ids:
+            return query.limit(limit).all()
+        fetch = limit + max(limit, 10)
+        while True:
+            rows = query.limit(fetch).all()
+            humans = [row for row in rows if human_id(row) not in non_human_ids]
+            if len(humans) >= limit or len(rows) < fetch:
+                return humans[:limit]
+            self.refetches += 1
+            fetch *= 2
+
+    def stats(self):
+        """Return counters for the debug endpoint."""
+        return {
+            "count": len(self._ids),
+            "loaded_at": self._loaded_at,
+            "refetches": self.refetches,
+            "running": self._refresher.is_alive(),
+        }
+
+    def refresh(self):
+        try:
+            ids = frozenset(get_non_human_ids(db.session))
+        except Exception as e:
+            # Keep serving the previous set
+            logger.error(f"Failed to refresh non-human ids: {e}")
+            return
+        finally:
+            db.session.remove()
+        if ids != self._ids:
+            logger.info(f"Loaded {len(ids)} non-human ids")
+        self._ids = ids
+        self._loaded_at = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    def _ensure_started(self):
+        if self.app is not None:
+            self._refresher.ensure_started()
+
+    def _run(self, stop):
+        run_every(stop, self.refresh_interval, self.app, self.refresh)
+
+    def close(self):
+        self._refresher.stop()
+
+
+non_human_registry = NonHumanRegistry()
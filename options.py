@@ -1,3 +1,5 @@
+import os
+
 # Define possible organizations
 orgs = {
     "caha": {
@@ -37,3 +39,7 @@ orgs = {
 
 MAX_HUMAN_SEARCH_RESULTS = 25
 MAX_TEAM_SEARCH_RESULTS = 25
+
+# Request threads per gunicorn worker, from the same variable and default as
+# the gunicorn configs
+REQUEST_THREADS = int(os.environ.get("GUNICORN_THREADS", 10))
@@ -0,0 +1,73 @@
+"""
+Bulk lookups for the skater, goalie, referee and scorekeeper performance tables.
+
+The append_*_performance_result helpers used to read the human (for the
+skill value or the link text) and the first and last game dates with one
+query each, for every row they appended.  Callers now load the details of
+all their stats rows up front with load_performance_details, which costs
+two queries however many rows there are, and pass them to the helpers.
+"""
+
+from collections import namedtuple
+
+from hockey_blast_common_lib.models import Game, Human, db
+from sqlalchemy import select
+
+
+def stats_value(stats, name):
+    """A field of a stats row, which is either a model instance or a dict."""
+    if isinstance(stats, dict):
+        return stats.get(name)
+    return getattr(stats, name, None)
+
+
+class PerformanceDetails(namedtuple("PerformanceDetails", ["humans", "game_dates"])):
+    """Humans (id, names, skill value) and game dates by id."""
+
+    __slots__ = ()
+
+    def human_name(self, human_id):
+        human = self.humans.get(human_id)
+        if human is None:
+            return None
+        return f"{human.first_name} {human.middle_name} {human.last_name}".strip()
+
+    def skill_value(self, human_id):
+        human = self.humans.get(human_id)
+        return human.skater_skill_value if human and human.skater_skill_value else 0
+
+    def game_date(self, game_id):
+        return self.game_dates.get(game_id)
+
+
+def load_performance_details(stats_rows):
+    """The PerformanceDetails for a list of stats rows, in two queries."""
+    human_ids = set()
+    game_ids = set()
+    for stats in stats_rows:
+        human_ids.add(stats_value(stats, "human_id"))
+        game_ids.add(stats_value(stats, "first_game_id"))
+        game_ids.add(stats_value(stats, "last_game_id"))
+    human_ids.discard(None)
+    game_ids.discard(None)
+
+    humans = {}
+    if human_ids:
+        humans = {
+            human.id: human
+            for human in db.session.execute(
+                select(
+                    Human.id,
+                    Human.first_name,
+                    Human.middle_name,
+                    Human.last_name,
+                    Human.skater_skill_value,
+                ).where(Human.id.in_(human_ids))
+            )
+        }
+    game_dates = {}
+    if game_ids:
+        game_dates = dict(
+            db.session.execute(select(Game.id, Game.date).where(Game.id.in_(game_ids))).all()
+        )
+    return PerformanceDetails(humans, game_dates)
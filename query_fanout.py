@@ -0,0 +1,143 @@
+"""
+Run independent read-only queries concurrently.
+
+Pages like the index run a dozen unrelated queries one after another, so
+their latency is the sum of all of them.  fan_out() runs each query function
+on a small per-process thread pool instead.  Every task gets its own app
+context, and with it its own SQLAlchemy session and pooled connection, plus a
+statement timeout, so a slow or failing section only leaves that section
+empty instead of failing the whole page.
+
+Tasks never queue behind other requests' tasks: when every pool thread is
+busy, the remaining tasks run in the calling request thread, so a task's
+timeout always counts from when it starts.  They use the request's own
+session, inside a savepoint, so the request never holds a second connection
+and a failed task does not abort the request's transaction.
+
+Results are ORM objects detached from their (closed) session.  Their column
+attributes are loaded, but lazy relationships cannot be loaded afterwards, so
+tasks should query everything they need explicitly.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from flask import current_app
+from hockey_blast_common_lib.models import db
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Each worker holds a pooled connection while it runs; app.py adds them to
+# the SQLAlchemy pool size
+FANOUT_WORKERS = int(os.environ.get("FANOUT_WORKERS", 4))
+FANOUT_TIMEOUT = float(os.environ.get("FANOUT_TIMEOUT", 10.0))  # seconds
+
+_executor = None
+_executor_slots = None  # idle pool threads
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Pool threads do not survive into forked gunicorn workers
+    global _executor, _executor_slots, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(
+                    max_workers=FANOUT_WORKERS, thread_name_prefix="query-fanout"
+                )
+                _executor_slots = threading.BoundedSemaphore(FANOUT_WORKERS)
+                _executor_pid = pid
+    return _executor, _executor_slots
+
+
+def _run_task(app, name, func, timeout):
+    started = time.monotonic()
+    # The session is removed (and its transaction ended) when the app context
+    # exits.  That closes it without expiring the returned objects.
+    with app.app_context():
+        # Let Postgres cancel the query too, rather than only abandoning it
+        db.session.execute(
+            text(f"SET LOCAL statement_timeout = {int(timeout * 1000)}")
+        )
+        try:
+            return func()
+        finally:
+            elapsed = (time.monotonic() - started) * 1000
+            logger.debug(f"Fan-out task {name} took {elapsed:.1f} ms")
+
+
+def _run_inline(name, func, timeout):
+    started = time.monotonic()
+    try:
+        with db.session.begin_nested():
+            db.session.execute(
+                text(f"SET LOCAL statement_timeout = {int(timeout * 1000)}")
+            )
+            result = func()
+            # A rolled back savepoint undoes SET LOCAL, a released one does not
+            db.session.execute(text("SET LOCAL statement_timeout = DEFAULT"))
+        return result
+    finally:
+        elapsed = (time.monotonic() - started) * 1000
+        logger.debug(f"Fan-out task {name} took {elapsed:.1f} ms inline")
+
+
+def _run_pooled(slots, app, name, func, timeout):
+    try:
+        return _run_task(app, name, func, timeout)
+    finally:
+        slots.release()
+
+
+def fan_out(tasks, timeout=FANOUT_TIMEOUT, defaults=None):
+    """Run the callables in `tasks` ({name: func}) concurrently.
+
+    Returns {name: result}.  A task that raises or does not finish within
+    `timeout` seconds gets defaults[name] (None if not given) and is logged.
+    """
+    defaults = defaults or {}
+    app = current_app._get_current_object()
+    executor, slots = _get_executor()
+    started = time.monotonic()
+    futures = {}
+    inline = []
+    for name, func in tasks.items():
+        if slots.acquire(blocking=False):
+            futures[name] = executor.submit(
+                _run_pooled, slots, app, name, func, timeout
+            )
+        else:
+            inline.append(name)
+
+    results = {}
+    # The pool is busy with other requests: run the rest here rather than
+    # queue them, where their timeout would tick before they started
+    for name in inline:
+        try:
+            results[name] = _run_inline(name, tasks[name], timeout)
+        except Exception as e:
+            logger.error(f"Fan-out task {name} failed, rendering its default: {e}")
+            results[name] = defaults.get(name)
+
+    # Pooled tasks started when they were submitted
+    wait(futures.values(), timeout=max(0, started + timeout - time.monotonic()))
+    for name, future in futures.items():
+        if not future.done():
+            logger.error(
+                f"Fan-out task {name} timed out after {timeout}s, rendering its default"
+            )
+            results[name] = defaults.get(name)
+            continue
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            logger.error(f"Fan-out task {name} failed, rendering its default: {e}")
+            results[name] = defaults.get(name)
+    return {name: results[name] for name in tasks}
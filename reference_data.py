@@ -0,0 +1,287 @@
+"""
+Process-wide cache of small reference tables.
+
+Teams, divisions, levels, locations, seasons and organizations are small and
+change rarely, but nearly every page resolves ids from them row by row.  The
+registry keeps each table as an id -> namedtuple map, loaded when the worker
+starts.  A background thread probes the tables with a single count/max(id)
+query and reloads only the ones that changed; every table is also reloaded
+in full periodically so renames (which the probe cannot see) are picked up.
+
+Lookups never fail because of the cache: an id that is not in the map yet is
+read from the database and added to it.  An id the database does not have
+either is remembered as missing until the next refresh, so pages that keep
+asking for it do not query for it every time.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+from hockey_blast_common_lib.models import (Division, Level, Location,
+                                            Organization, Season, Team, db)
+from sqlalchemy import func, literal, select, union_all
+
+from background import BackgroundThread, run_every
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_DATA_CHECK_INTERVAL = float(
+    os.environ.get("REFERENCE_DATA_CHECK_INTERVAL", 60)
+)
+REFERENCE_DATA_RELOAD_INTERVAL = float(
+    os.environ.get("REFERENCE_DATA_RELOAD_INTERVAL", 60 * 60)
+)
+
+# Field names match the model columns, so these can stand in for ORM objects
+# in templates (e.g. macros.location_display)
+TeamRef = namedtuple("TeamRef", ["id", "name", "org_id"])
+DivisionRef = namedtuple(
+    "DivisionRef",
+    ["id", "org_id", "season_id", "level_id", "level", "league_number", "season_number"],
+)
+LevelRef = namedtuple(
+    "LevelRef", ["id", "org_id", "level_name", "short_name", "skill_value"]
+)
+LocationRef = namedtuple(
+    "LocationRef",
+    [
+        "id",
+        "location_in_game_source",
+        "location_name",
+        "rink_name",
+        "address",
+        "google_maps_link",
+        "master_location_id",
+    ],
+)
+SeasonRef = namedtuple(
+    "SeasonRef",
+    ["id", "org_id", "league_id", "season_number", "season_name", "start_date", "end_date"],
+)
+OrganizationRef = namedtuple(
+    "OrganizationRef", ["id", "alias", "organization_name", "website"]
+)
+
+REFERENCE_TABLES = {
+    "teams": (Team, TeamRef),
+    "divisions": (Division, DivisionRef),
+    "levels": (Level, LevelRef),
+    "locations": (Location, LocationRef),
+    "seasons": (Season, SeasonRef),
+    "organizations": (Organization, OrganizationRef),
+}
+
+
+class ReferenceData:
+    """Id -> namedtuple maps for the reference tables, refreshed in the background."""
+
+    def __init__(
+        self,
+        check_interval=REFERENCE_DATA_CHECK_INTERVAL,
+        reload_interval=REFERENCE_DATA_RELOAD_INTERVAL,
+    ):
+        self.app = None
+        self.check_interval = check_interval
+        self.reload_interval = reload_interval
+        self._maps = {name: {} for name in REFERENCE_TABLES}
+        self._missing = {name: set() for name in REFERENCE_TABLES}
+        self._divisions_by_key = {}
+        self._signatures = {}
+        self._last_reload = 0.0
+        self._refresher = BackgroundThread(self._run, "reference-data-refresh")
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["reference_data"] = self
+        with app.app_context():
+            self.refresh(force=True)
+
+    # Lookups
+
+    def team(self, team_id):
+        return self._get("teams", team_id)
+
+    def division(self, division_id):
+        return self._get("divisions", division_id)
+
+    def level(self, level_id):
+        return self._get("levels", level_id)
+
+    def location(self, location_id):
+        return self._get("locations", location_id)
+
+    def season(self, season_id):
+        return self._get("seasons", season_id)
+
+    def organization(self, org_id):
+        return self._get("organizations", org_id)
+
+    def team_name(self, team_id, default="Unknown"):
+        team = self.team(team_id)
+        return team.name if team else default
+
+    def master_location(self, location_id):
+        """The canonical location for a rink, or the location itself."""
+        location = self.location(location_id)
+        if location and location.master_location_id:
+            return self.location(location.master_location_id) or location
+        return location
+
+    def level_short_name(self, division_id):
+        """Level short name for a division, falling back to the division's level name."""
+        division = self.division(division_id)
+        if not division:
+            return ""
+        level = self.level(division.level_id)
+        if level and level.short_name:
+            return level.short_name
+        return division.level
+
+    def find_division(self, org_id, level_id, season_id):
+        """The division for an org, level and season (lowest id if several)."""
+        self._ensure_started()
+        key = (int(org_id), int(level_id), int(season_id))
+        division_id = self._divisions_by_key.get(key)
+        if division_id is not None:
+            return self.division(division_id)
+        division = (
+            db.session.query(Division)
+            .filter(
+                Division.org_id == key[0],
+                Division.level_id == key[1],
+                Division.season_id == key[2],
+            )
+            .order_by(Division.id)
+            .first()
+        )
+        return self._remember("divisions", division)
+
+    def organizations(self):
+        """All organizations, in the order the table returns them."""
+        self._ensure_started()
+        return list(self._maps["organizations"].values())
+
+    def stats(self):
+        """Return counters for the debug endpoint."""
+        return {
+            "sizes": {name: len(rows) for name, rows in self._maps.items()},
+            "missing": {name: len(ids) for name, ids in self._missing.items()},
+            "loads": self.loads,
+            "misses": self.misses,
+            "running": self._refresher.is_alive(),
+        }
+
+    def _get(self, name, row_id):
+        if row_id is None:
+            return None
+        self._ensure_started()
+        row_id = int(row_id)
+        row = self._maps[name].get(row_id)
+        if row is not None:
+            return row
+        missing = self._missing[name]
+        if row_id in missing:
+            return None
+        # Not loaded yet (e.g. created since the last refresh), read it directly
+        with self._lock:
+            self.misses += 1
+        model, _ = REFERENCE_TABLES[name]
+        row = self._remember(name, db.session.get(model, row_id))
+        if row is None:
+            with self._lock:
+                missing.add(row_id)
+        return row
+
+    def _remember(self, name, obj):
+        if obj is None:
+            return None
+        _, ref = REFERENCE_TABLES[name]
+        row = ref(*(getattr(obj, field) for field in ref._fields))
+        self._maps[name][row.id] = row
+        if name == "divisions":
+            self._index_division(self._divisions_by_key, row)
+        return row
+
+    @staticmethod
+    def _index_division(index, division):
+        if None in (division.org_id, division.level_id, division.season_id):
+            return
+        key = (division.org_id, division.level_id, division.season_id)
+        if key not in index or division.id < index[key]:
+            index[key] = division.id
+
+    # Refreshing
+
+    def refresh(self, force=False):
+        """Reload the tables whose count or max(id) changed (all of them if force)."""
+        try:
+            signatures = self._probe()
+            if force or time.monotonic() - self._last_reload > self.reload_interval:
+                changed = list(REFERENCE_TABLES)
+                self._last_reload = time.monotonic()
+            else:
+                changed = [
+                    name
+                    for name, signature in signatures.items()
+                    if signature != self._signatures.get(name)
+                ]
+            for name in changed:
+                self._load(name)
+            self._signatures = signatures
+            # Look the missing ids up again, they may have been created since
+            self._missing = {name: set() for name in REFERENCE_TABLES}
+            if changed:
+                logger.info(f"Reloaded reference data: {', '.join(changed)}")
+        except Exception as e:
+            logger.error(f"Failed to refresh reference data: {e}")
+        finally:
+            db.session.remove()
+
+    def _probe(self):
+        """Row count and max(id) of every reference table, in one round trip."""
+        stmt = union_all(
+            *(
+                select(literal(name), func.count(), func.max(model.id))
+                for name, (model, _) in REFERENCE_TABLES.items()
+            )
+        )
+        return {
+            name: (count, max_id)
+            for name, count, max_id in db.session.execute(stmt)
+        }
+
+    def _load(self, name):
+        model, ref = REFERENCE_TABLES[name]
+        columns = [getattr(model, field) for field in ref._fields]
+        rows = {
+            row.id: row
+            for row in (ref(*values) for values in db.session.execute(select(*columns)))
+        }
+        if name == "divisions":
+            index = {}
+            for division in rows.values():
+                self._index_division(index, division)
+            self._divisions_by_key = index
+        # Swapping the whole map keeps concurrent readers consistent
+        self._maps[name] = rows
+        with self._lock:
+            self.loads += 1
+
+    def _ensure_started(self):
+        if self.app is not None:
+            self._refresher.ensure_started()
+
+    def _run(self, stop):
+        run_every(stop, self.check_interval, self.app, self.refresh)
+
+    def close(self):
+        self._refresher.stop()
+
+
+reference_data = ReferenceData()
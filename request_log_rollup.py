@@ -0,0 +1,404 @@
+"""
+Pre-aggregated request log rollups for the /request_logs dashboard.
+
+Every batch written by the RequestLogWriter is folded into per-minute,
+per-hour and per-day buckets.  A bucket has one row per path plus a totals
+row (path "*") that also carries a HyperLogLog sketch of client IPs.  Every
+row carries a QuantileSketch of response times, so latency percentiles can
+be merged across buckets and workers.  The dashboard reads a few hundred
+small rows instead of sampling raw logs.
+
+Crawler, internal and unregistered paths are filtered out at ingest time,
+using the same rules the dashboard always applied.
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta
+
+import pandas as pd
+from hockey_blast_common_lib.models import db
+from sqlalchemy import bindparam, exists, func, literal, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+
+from sketches import HyperLogLog, QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+# List of internal endpoints to filter out
+INTERNAL_ENDPOINTS = [
+    r"/dropdowns/.*",
+    r"/.*filter_.*",
+    r"/get_.*",
+    r"/request_logs.*",  # Exclude request_logs endpoints from plotting themselves
+]
+
+CRAWLER_USER_AGENTS = [
+    # Manual additions per eyeballing
+    "Google-Read-Aloud",
+    # Major Search Engines
+    "Google",
+    "Googlebot",
+    "Bingbot",
+    "Slurp",
+    "DuckDuckBot",
+    "Baiduspider",
+    "YandexBot",
+    "Sogou",
+    "Exabot",
+    "facebot",  # Facebook
+    "facebookexternalhit",
+    "ia_archiver",  # Alexa
+    # AI and Data Crawlers
+    "GPTBot",
+    "Bytespider",
+    "ClaudeBot",
+    "openai",
+    "InternetMeasurement",
+    "Amazonbot",
+    "CriteoBot",
+    # Pen-testing and Research
+    "zgrab",
+    "zmap",
+    "masscan",
+    "nmap",
+    "censys",
+    "shodan",
+    "httpx",
+    # Dev tools / CLI / Libraries
+    "curl",
+    "wget",
+    "python-requests",
+    "httpie",
+    "libwww-perl",
+    "Go-http-client",
+    "Apache-HttpClient",
+    "java",
+    "okhttp",
+    "axios",
+    "node-fetch",
+    "scrapy",
+    "aiohttp",
+    "RestSharp",
+    # Headless browsers
+    "HeadlessChrome",
+    "puppeteer",
+    "phantomjs",
+    "selenium",
+    "Playwright",
+    # Generic indicators
+    "bot",
+    "spider",
+    "crawler",
+    "scanner",
+    "probe",
+]
+
+CRAWLER_REGEX = "|".join(CRAWLER_USER_AGENTS)
+CRAWLER_PATTERN = re.compile(CRAWLER_REGEX, flags=re.IGNORECASE)
+INTERNAL_PATTERNS = [re.compile(pattern) for pattern in INTERNAL_ENDPOINTS]
+
+TOTAL_PATH = "*"
+ROLLUP_GRANULARITIES = ("minute", "hour", "day")
+
+# Fine-grained buckets are only read for short lookbacks, so they are pruned
+ROLLUP_RETENTION = {
+    "minute": timedelta(days=2),
+    "hour": timedelta(days=14),
+    "day": None,
+}
+
+
+class RequestLogRollup(db.Model):
+    __tablename__ = "request_log_rollups"
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String, nullable=False)  # minute, hour or day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    path = db.Column(db.String, nullable=False)  # TOTAL_PATH for the totals row
+    request_count = db.Column(db.Integer, nullable=False, default=0)
+    response_time_count = db.Column(db.Integer, nullable=False, default=0)
+    response_time_sum_ms = db.Column(db.Float, nullable=False, default=0.0)
+    unique_ips = db.Column(db.LargeBinary, nullable=True)  # HyperLogLog, totals only
+    response_time_sketch = db.Column(db.LargeBinary, nullable=True)  # QuantileSketch
+    __table_args__ = (
+        db.UniqueConstraint(
+            "granularity",
+            "bucket_start",
+            "path",
+            name="_request_log_rollup_bucket_uc",
+        ),
+    )
+
+
+# Spans of raw request logs already folded into the rollups, so a backfill
+# never counts them twice
+class RequestLogRollupCoverage(db.Model):
+    __tablename__ = "request_log_rollup_coverage"
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String, nullable=False)  # live or backfill
+    start = db.Column(db.DateTime, nullable=False)
+    end = db.Column(db.DateTime, nullable=True)  # exclusive; None for live ingestion
+
+
+def ensure_rollup_table(app):
+    """Create the rollup tables if they do not exist yet."""
+    try:
+        with app.app_context():
+            RequestLogRollup.__table__.create(db.engine, checkfirst=True)
+            RequestLogRollupCoverage.__table__.create(db.engine, checkfirst=True)
+            with db.engine.begin() as conn:
+                # Added after the table was first created
+                conn.execute(
+                    text(
+                        "ALTER TABLE request_log_rollups "
+                        "ADD COLUMN IF NOT EXISTS response_time_sketch BYTEA"
+                    )
+                )
+    except Exception as e:
+        logger.error(f"Failed to create {RequestLogRollup.__tablename__}: {e}")
+
+
+def bucket_start(timestamp, granularity):
+    """Truncate a timestamp to the start of its rollup bucket."""
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def dashboard_paths(app):
+    """Registered, non-internal paths that the dashboard reports on."""
+    return {
+        rule.rule
+        for rule in app.url_map.iter_rules()
+        if not any(pattern.match(rule.rule) for pattern in INTERNAL_PATTERNS)
+    }
+
+
+def is_crawler(user_agent):
+    return bool(CRAWLER_PATTERN.search(user_agent or ""))
+
+
+def aggregate_request_logs(rows, paths):
+    """Aggregate request log rows into {(granularity, bucket_start, path): bucket}."""
+    buckets = {}
+    for row in rows:
+        if row["path"] not in paths or is_crawler(row["user_agent"]):
+            continue
+        # Timestamps are stored as naive Pacific wall-clock time
+        timestamp = row["timestamp"].replace(tzinfo=None)
+        response_time_ms = row.get("response_time_ms")
+        for granularity in ROLLUP_GRANULARITIES:
+            start = bucket_start(timestamp, granularity)
+            for path in (row["path"], TOTAL_PATH):
+                bucket = buckets.get((granularity, start, path))
+                if bucket is None:
+                    bucket = buckets[(granularity, start, path)] = {
+                        "request_count": 0,
+                        "response_time_count": 0,
+                        "response_time_sum_ms": 0.0,
+                        "unique_ips": HyperLogLog() if path == TOTAL_PATH else None,
+                        "response_time_sketch": QuantileSketch(),
+                    }
+                bucket["request_count"] += 1
+                if response_time_ms is not None:
+                    bucket["response_time_count"] += 1
+                    bucket["response_time_sum_ms"] += response_time_ms
+                    bucket["response_time_sketch"].add(response_time_ms)
+                if bucket["unique_ips"] is not None:
+                    bucket["unique_ips"].add(row["client_ip"])
+    return buckets
+
+
+def rollup_request_logs(conn, rows, paths):
+    """Fold a batch of request log rows into the rollup table.
+
+    Runs inside the caller's transaction.  Counters are added with a single
+    upsert, which also locks the affected rows, so their sketches can then be
+    merged without racing other workers.  Every statement touches the rows in
+    bucket key order, so concurrent writers lock them in the same order and
+    cannot deadlock.
+    """
+    buckets = aggregate_request_logs(rows, paths)
+    if not buckets:
+        return 0
+
+    table = RequestLogRollup.__table__
+    stmt = insert(table).values(
+        [
+            {
+                "granularity": granularity,
+                "bucket_start": start,
+                "path": path,
+                "request_count": bucket["request_count"],
+                "response_time_count": bucket["response_time_count"],
+                "response_time_sum_ms": bucket["response_time_sum_ms"],
+            }
+            for (granularity, start, path), bucket in sorted(buckets.items())
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="_request_log_rollup_bucket_uc",
+        set_={
+            "request_count": table.c.request_count + stmt.excluded.request_count,
+            "response_time_count": table.c.response_time_count
+            + stmt.excluded.response_time_count,
+            "response_time_sum_ms": table.c.response_time_sum_ms
+            + stmt.excluded.response_time_sum_ms,
+        },
+    )
+    conn.execute(stmt)
+
+    key_columns = (table.c.granularity, table.c.bucket_start, table.c.path)
+    existing = conn.execute(
+        select(
+            table.c.id,
+            *key_columns,
+            table.c.unique_ips,
+            table.c.response_time_sketch,
+        )
+        .where(tuple_(*key_columns).in_(list(buckets)))
+        .order_by(*key_columns)
+        .with_for_update()
+    ).all()
+    sketch_updates = []
+    for row in existing:
+        bucket = buckets[(row.granularity, row.bucket_start, row.path)]
+        ip_sketch = bucket["unique_ips"]
+        if ip_sketch is not None and row.unique_ips:
+            ip_sketch.merge(HyperLogLog.from_bytes(row.unique_ips))
+        response_time_sketch = bucket["response_time_sketch"]
+        if row.response_time_sketch:
+            response_time_sketch.merge(
+                QuantileSketch.from_bytes(row.response_time_sketch)
+            )
+        sketch_updates.append(
+            {
+                "rollup_id": row.id,
+                "ip_sketch": ip_sketch.to_bytes() if ip_sketch is not None else None,
+                "rt_sketch": response_time_sketch.to_bytes(),
+            }
+        )
+    if sketch_updates:
+        conn.execute(
+            update(table)
+            .where(table.c.id == bindparam("rollup_id"))
+            .values(
+                unique_ips=bindparam("ip_sketch"),
+                response_time_sketch=bindparam("rt_sketch"),
+            ),
+            sketch_updates,
+        )
+    return len(buckets)
+
+
+def record_live_start(conn, rows):
+    """Record when live ingestion started, unless it already has.
+
+    Call it before the first batch is rolled up.  Rollups written before
+    the start was recorded at all begin no later than their oldest day
+    bucket, so that is recorded instead if it is earlier.
+    """
+    table = RequestLogRollupCoverage.__table__
+    first_day = (
+        select(func.min(RequestLogRollup.bucket_start))
+        .where(RequestLogRollup.granularity == "day")
+        .scalar_subquery()
+    )
+    start = min(row["timestamp"] for row in rows).replace(tzinfo=None)
+    conn.execute(
+        insert(table).from_select(
+            ["source", "start"],
+            select(literal("live"), func.least(literal(start), first_day)).where(
+                ~exists().where(table.c.source == "live")
+            ),
+        )
+    )
+
+
+def prune_request_log_rollups(conn, now=None):
+    """Delete fine-grained buckets that are past their retention window."""
+    now = now or datetime.now()
+    table = RequestLogRollup.__table__
+    for granularity, retention in ROLLUP_RETENTION.items():
+        if retention is None:
+            continue
+        conn.execute(
+            table.delete().where(
+                table.c.granularity == granularity,
+                table.c.bucket_start < now - retention,
+            )
+        )
+
+
+def resample_label(timestamps, freq):
+    """Map bucket starts onto the labels pandas resample uses for freq."""
+    if freq in ("W", "M"):
+        return timestamps.to_period(freq).end_time.normalize()
+    return timestamps
+
+
+def latency_percentiles(granularity, start_time, freq, quantiles=(0.5, 0.9, 0.95)):
+    """Response time percentiles merged from the rollup sketches.
+
+    Returns three DataFrames: overall stats per time window (indexed by
+    window), per-endpoint totals over the whole range (indexed by path, sorted
+    by median) and per-endpoint stats per window (bucket and path columns).
+    Percentile columns are named "median" for 0.5 and "p90"-style otherwise.
+    """
+    rows = (
+        db.session.query(
+            RequestLogRollup.bucket_start,
+            RequestLogRollup.path,
+            RequestLogRollup.response_time_count,
+            RequestLogRollup.response_time_sum_ms,
+            RequestLogRollup.response_time_sketch,
+        )
+        .filter(
+            RequestLogRollup.granularity == granularity,
+            RequestLogRollup.bucket_start >= start_time,
+            RequestLogRollup.response_time_count > 0,
+        )
+        .all()
+    )
+    columns = ["median" if q == 0.5 else f"p{round(q * 100)}" for q in quantiles]
+    df = pd.DataFrame(
+        rows, columns=["bucket", "path", "count", "sum_ms", "sketch"]
+    )
+    df["bucket"] = resample_label(pd.DatetimeIndex(df["bucket"]), freq)
+
+    def summarize(group):
+        sketch = QuantileSketch.merge_bytes(group["sketch"])
+        count = group["count"].sum()
+        values = {
+            column: sketch.quantile(q) for column, q in zip(columns, quantiles)
+        }
+        values["mean"] = group["sum_ms"].sum() / count
+        values["count"] = count
+        return pd.Series(values)
+
+    empty = pd.DataFrame(columns=columns + ["mean", "count"])
+    totals = df[df["path"] == TOTAL_PATH]
+    per_path = df[df["path"] != TOTAL_PATH]
+    if totals.empty:
+        return empty, empty, empty
+
+    response_time_stats = (
+        totals.groupby("bucket")
+        .apply(summarize, include_groups=False)
+        .astype({"count": int})
+    )
+    endpoint_response_times = (
+        per_path.groupby("path")
+        .apply(summarize, include_groups=False)
+        .astype({"count": int})
+        .sort_values("median", ascending=False)
+    )
+    endpoint_series = (
+        per_path.groupby(["bucket", "path"])
+        .apply(summarize, include_groups=False)
+        .astype({"count": int})
+        .reset_index()
+    )
+    return response_time_stats, endpoint_response_times, endpoint_series
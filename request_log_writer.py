@@ -0,0 +1,189 @@
+"""
+Background writer for RequestLog rows.
+
+The after_request hook hands each log row to a bounded in-process queue and
+returns immediately.  A daemon thread drains the queue and writes the rows in
+batches (one multi-row INSERT per batch), flushing whenever the batch is full
+or the flush interval elapses.  When the queue is full new rows are dropped
+and counted rather than blocking the request.  Each written batch is also
+folded into the dashboard rollups (see request_log_rollup.py).
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+import psycopg2
+from hockey_blast_common_lib.models import RequestLog, db
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+
+from background import BackgroundThread
+from request_log_rollup import (dashboard_paths, prune_request_log_rollups,
+                                record_live_start, rollup_request_logs)
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LOG_QUEUE_SIZE = int(os.environ.get("REQUEST_LOG_QUEUE_SIZE", 10000))
+REQUEST_LOG_BATCH_SIZE = int(os.environ.get("REQUEST_LOG_BATCH_SIZE", 500))
+REQUEST_LOG_FLUSH_INTERVAL = float(os.environ.get("REQUEST_LOG_FLUSH_INTERVAL", 5.0))
+ROLLUP_PRUNE_INTERVAL = 60 * 60  # seconds
+
+
+class RequestLogWriter:
+    """Queue RequestLog rows and write them from a background thread."""
+
+    def __init__(
+        self,
+        app,
+        max_queue=REQUEST_LOG_QUEUE_SIZE,
+        batch_size=REQUEST_LOG_BATCH_SIZE,
+        flush_interval=REQUEST_LOG_FLUSH_INTERVAL,
+    ):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._writer = BackgroundThread(
+            self._run, "request-log-writer", on_new_process=self._reset_queue
+        )
+        self._paths = None
+        self._last_prune = 0.0
+        self._live_start_recorded = False
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.rollup_failed = 0
+
+        app.extensions["request_log_writer"] = self
+        atexit.register(self.close)
+
+    def submit(self, row):
+        """Queue one RequestLog row (a dict of column values) without blocking."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            # Log the first drop and then every 1000th to avoid flooding the logs
+            if dropped % 1000 == 1:
+                logger.warning(
+                    f"Request log queue full, dropped {dropped} rows so far"
+                )
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def stats(self):
+        """Return counters for the debug endpoint."""
+        with self._lock:
+            return {
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "written": self.written,
+                "failed": self.failed,
+                "batches": self.batches,
+                "rollup_failed": self.rollup_failed,
+                "queued": self._queue.qsize(),
+                "running": self._writer.is_alive(),
+            }
+
+    def close(self, timeout=10):
+        """Stop the writer thread and flush whatever is still queued."""
+        self._writer.stop(timeout)
+        # Anything queued after the thread exited is written synchronously here
+        self._drain()
+
+    def _ensure_started(self):
+        self._writer.ensure_started()
+
+    def _reset_queue(self):
+        # Rows queued in the parent before a fork are the parent's to write
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+
+    def _run(self, stop):
+        while not stop.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._write(batch)
+        self._drain()
+
+    def _collect_batch(self):
+        """Block until a batch is full or the flush interval has elapsed."""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._writer.stop_event.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.5)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _drain(self):
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as conn:
+                    conn.execute(insert(RequestLog), batch)
+        except DBAPIError as e:
+            with self._lock:
+                self.failed += len(batch)
+            if isinstance(e.orig, psycopg2.errors.InsufficientPrivilege):
+                logger.error(
+                    f"Failed to log {len(batch)} requests: {e.orig}. The database user does not have permission to access the table."
+                )
+            else:
+                logger.error(f"Failed to log {len(batch)} requests: {e}")
+            return
+        except Exception as e:
+            with self._lock:
+                self.failed += len(batch)
+            logger.error(f"Failed to log {len(batch)} requests: {e}")
+            return
+        with self._lock:
+            self.written += len(batch)
+            self.batches += 1
+        self._rollup(batch)
+
+    def _rollup(self, batch):
+        # Separate transaction so a rollup failure never loses the raw logs
+        try:
+            with self.app.app_context():
+                if self._paths is None:
+                    self._paths = dashboard_paths(self.app)
+                with db.engine.begin() as conn:
+                    if not self._live_start_recorded:
+                        record_live_start(conn, batch)
+                    rollup_request_logs(conn, batch, self._paths)
+                    if time.monotonic() - self._last_prune > ROLLUP_PRUNE_INTERVAL:
+                        prune_request_log_rollups(conn)
+                        self._last_prune = time.monotonic()
+                self._live_start_recorded = True
+        except Exception as e:
+            with self._lock:
+                self.rollup_failed += len(batch)
+            logger.error(f"Failed to roll up {len(batch)} request logs: {e}")
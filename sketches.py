@@ -0,0 +1,150 @@
+"""
+Small mergeable sketches used by the request log rollups.
+
+Sketches are serialized to bytes so they can be stored in rollup rows and
+merged later across time buckets and across gunicorn workers.
+"""
+
+import hashlib
+import math
+import zlib
+
+import numpy as np
+
+
+class HyperLogLog:
+    """Approximate distinct counter (about 1.6% standard error with p=12)."""
+
+    def __init__(self, p=12, registers=None):
+        self.p = p
+        self.m = 1 << p
+        if registers is None:
+            self.registers = np.zeros(self.m, dtype=np.uint8)
+        else:
+            self.registers = np.frombuffer(registers, dtype=np.uint8).copy()
+
+    def add(self, value):
+        # Python's hash() is salted per process, so use a stable hash to keep
+        # sketches from different workers mergeable
+        h = int.from_bytes(
+            hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        index = h >> (64 - self.p)
+        rest = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / np.sum(np.exp2(-self.registers.astype(float)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and zeros:
+            # Small-range correction (linear counting) is near exact for sparse sketches
+            return int(round(self.m * math.log(self.m / zeros)))
+        return int(round(estimate))
+
+    def to_bytes(self):
+        # Registers are mostly zero for quiet buckets, so they compress well
+        return bytes([self.p]) + zlib.compress(self.registers.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data:
+            return cls()
+        return cls(p=data[0], registers=zlib.decompress(data[1:]))
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error (DDSketch-style).
+
+    Values are counted in logarithmically sized bins, so any quantile is
+    accurate to within RELATIVE_ACCURACY of the true value and two sketches
+    merge by adding bin counts.  A sketch of response times spanning 1 ms to
+    2 minutes has at most a few hundred bins.
+    """
+
+    RELATIVE_ACCURACY = 0.01
+    MIN_VALUE = 0.01  # values below this are counted in the zero bin
+
+    _gamma = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    _log_gamma = math.log(_gamma)
+
+    def __init__(self, bins=None, zero_count=0):
+        self.bins = bins if bins is not None else {}
+        self.zero_count = zero_count
+
+    @property
+    def count(self):
+        return self.zero_count + sum(self.bins.values())
+
+    def add(self, value):
+        if value < self.MIN_VALUE:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + 1
+
+    def merge(self, other):
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        return self
+
+    def quantile(self, q):
+        """Value at quantile q (0..1), or None for an empty sketch."""
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                # Midpoint of the bin (gamma^(key-1), gamma^key] in relative terms
+                return 2 * self._gamma**key / (self._gamma + 1)
+        return 2 * self._gamma ** max(self.bins) / (self._gamma + 1)
+
+    def to_bytes(self):
+        keys = np.fromiter(self.bins.keys(), dtype=np.int16, count=len(self.bins))
+        counts = np.fromiter(self.bins.values(), dtype=np.uint32, count=len(self.bins))
+        header = np.array([self.zero_count, len(keys)], dtype=np.uint32)
+        return header.tobytes() + keys.tobytes() + counts.tobytes()
+
+    @staticmethod
+    def _decode(data):
+        zero_count, size = np.frombuffer(data, dtype=np.uint32, count=2)
+        keys = np.frombuffer(data, dtype=np.int16, count=size, offset=8)
+        counts = np.frombuffer(data, dtype=np.uint32, count=size, offset=8 + 2 * size)
+        return int(zero_count), keys, counts
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data:
+            return cls()
+        zero_count, keys, counts = cls._decode(data)
+        return cls(dict(zip(keys.tolist(), counts.tolist())), zero_count)
+
+    @classmethod
+    def merge_bytes(cls, blobs):
+        """Merge many serialized sketches at once (vectorized)."""
+        decoded = [cls._decode(data) for data in blobs if data]
+        if not decoded:
+            return cls()
+        keys = np.concatenate([d[1] for d in decoded]).astype(np.int64)
+        counts = np.concatenate([d[2] for d in decoded])
+        if len(keys) == 0:
+            return cls(zero_count=sum(d[0] for d in decoded))
+        offset = keys.min()
+        merged = np.bincount(keys - offset, weights=counts)
+        nonzero = np.flatnonzero(merged)
+        return cls(
+            dict(zip((nonzero + offset).tolist(), merged[nonzero].astype(np.int64).tolist())),
+            sum(d[0] for d in decoded),
+        )
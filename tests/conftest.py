@@ -0,0 +1,83 @@
+"""
+Fixtures for tests that run the app against a hockey-blast database.
+
+The database is configured the same way as for the app (DB_NAME, DB_USER,
+DB_PASSWORD, DB_HOST, DB_PORT); the tests are skipped when it cannot be
+reached.  Run them with `python -m pytest tests`.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the on-disk caches out of the working tree
+_cache_dir = tempfile.mkdtemp(prefix="hockey-blast-tests-")
+for _name, _default in (
+    ("FRAGMENT_CACHE_PATH", "fragment_cache.sqlite3"),
+    ("PROFILE_SNAPSHOT_PATH", "profile_snapshots.sqlite3"),
+    ("CHART_CACHE_DIR", "chart_cache"),
+    ("VIDEO_CACHE_DIR", "video_cache"),
+    ("SESSION_FILE_DIR", "flask_session"),
+):
+    os.environ.setdefault(_name, os.path.join(_cache_dir, _default))
+
+
+@pytest.fixture(scope="session")
+def app():
+    from hockey_blast_common_lib.models import db
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    from app import create_prod_app
+
+    app = create_prod_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        try:
+            db.session.execute(text("SELECT 1"))
+        except OperationalError as e:
+            pytest.skip(f"No database: {e}")
+        finally:
+            db.session.remove()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def count_queries(app):
+    """A context manager counting the statements this thread sends.
+
+    Background threads (the request log writer...) share the engine, so only
+    statements from the calling thread are counted.
+    """
+    from hockey_blast_common_lib.models import db
+    from sqlalchemy import event
+
+    @contextmanager
+    def counting():
+        thread = threading.get_ident()
+        counter = {"queries": 0}
+
+        def count(*args, **kwargs):
+            if threading.get_ident() == thread:
+                counter["queries"] += 1
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            yield counter
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+
+    return counting
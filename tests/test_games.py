@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.mark.parametrize("game_status", ["completed", "all"])
+def test_filter_games_query_count_does_not_depend_on_top_n(
+    client, count_queries, game_status
+):
+    counts = {}
+    for top_n in (5, 50):
+        with count_queries() as counter:
+            response = client.post(
+                "/games/filter_games", json={"top_n": top_n, "game_status": game_status}
+            )
+        assert response.status_code == 200
+        if not response.get_json()["games"]:
+            pytest.skip("No games to list")
+        counts[top_n] = counter["queries"]
+
+    assert counts[5] == counts[50]
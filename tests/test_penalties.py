@@ -0,0 +1,25 @@
+import pytest
+
+# The two leaderboards, with their players and first and last game dates
+QUERY_BUDGET = 2
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"penalty_type": "all", "player_status": "all"},
+        {"penalty_type": "all", "player_status": "active"},
+        {"penalty_type": "gm", "player_status": "all"},
+    ],
+    ids=["all", "active", "gm"],
+)
+def test_filter_penalties_query_budget(client, count_queries, filters):
+    with count_queries() as counter:
+        response = client.post(
+            "/penalties/filter_penalties", json={"top_n": 50, **filters}
+        )
+    assert response.status_code == 200
+    data = response.get_json()
+    if not data["penalties"] and not data["penalties_per_game"]:
+        pytest.skip("No skater stats to rank")
+    assert counter["queries"] == QUERY_BUDGET
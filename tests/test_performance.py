@@ -0,0 +1,71 @@
+import pytest
+
+# The division, the team's games, five stat aggregates over them, their
+# dates, the team, and the skaters' humans and first and last games
+TEAM_TABLE_QUERY_BUDGET = 11
+# The referees' org stats, and their humans and first and last games
+ORG_TABLE_QUERY_BUDGET = 3
+
+
+def _busiest_team(app):
+    """(org_id, level_id, season_id, team_id) of the team with the most skaters."""
+    from hockey_blast_common_lib.models import Division, Game, GameRoster, db
+    from sqlalchemy import func
+
+    with app.app_context():
+        try:
+            return (
+                db.session.query(
+                    Division.org_id, Division.level_id, Division.season_id, GameRoster.team_id
+                )
+                .join(Game, Game.division_id == Division.id)
+                .join(GameRoster, GameRoster.game_id == Game.id)
+                .group_by(
+                    Division.org_id, Division.level_id, Division.season_id, GameRoster.team_id
+                )
+                .order_by(func.count(func.distinct(GameRoster.human_id)).desc())
+                .first()
+            )
+        finally:
+            db.session.remove()
+
+
+def test_skater_team_table_query_budget(app, client, count_queries):
+    team = _busiest_team(app)
+    if team is None:
+        pytest.skip("No team rosters")
+    org_id, level_id, season_id, team_id = team
+    with count_queries() as counter:
+        response = client.post(
+            "/skater_performance/filter_skater_performance",
+            json={
+                "org_id": org_id,
+                "level_id": level_id,
+                "season_id": season_id,
+                "team_id": team_id,
+            },
+        )
+    assert response.status_code == 200
+    assert response.get_json()["team_performance"]
+    assert counter["queries"] == TEAM_TABLE_QUERY_BUDGET
+
+
+def test_referee_org_table_query_budget(app, client, count_queries):
+    from hockey_blast_common_lib.models import db
+    from hockey_blast_common_lib.stats_models import OrgStatsReferee
+
+    with app.app_context():
+        try:
+            org_id = db.session.query(OrgStatsReferee.org_id).limit(1).scalar()
+        finally:
+            db.session.remove()
+    if org_id is None:
+        pytest.skip("No referee stats to rank")
+    with count_queries() as counter:
+        response = client.post(
+            "/referee_performance/filter_referee_performance",
+            json={"org_id": org_id, "top_n": 50},
+        )
+    assert response.status_code == 200
+    assert response.get_json()["all_referees"]
+    assert counter["queries"] == ORG_TABLE_QUERY_BUDGET
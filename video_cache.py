@@ -0,0 +1,350 @@
+"""
+Local copies of recently watched highlight videos.
+
+Seeking in the player fires a Range request for every jump, and relaying
+each one from livebarn-serve ties up a request thread for as long as the
+bytes take to arrive.  The first request for a game's video therefore starts
+a background download of the whole file into VIDEO_CACHE_DIR; until it is
+complete requests are relayed from upstream over a pooled keep-alive
+session, and afterwards they are answered from disk.
+
+A cached video is handed to nginx with X-Accel-Redirect when
+VIDEO_ACCEL_REDIRECT names an internal location that maps to
+VIDEO_CACHE_DIR, so no gunicorn thread is held while it is sent.  Without it
+the file is served with send_file, which answers Range requests itself and
+lets gunicorn use sendfile().
+
+The directory is shared by all workers and bounded by VIDEO_CACHE_MAX_BYTES;
+the least recently watched videos are removed first.  A cached file is
+revalidated against upstream (a HEAD request) every VIDEO_CACHE_REVALIDATE
+seconds, since a highlight can be regenerated; the check runs in the
+background and the copy is served meanwhile.
+"""
+
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+import requests
+from flask import Response, send_file
+
+from http_session import pooled_session
+
+logger = logging.getLogger(__name__)
+
+VIDEO_SERVICE_BASE = os.environ.get("VIDEO_SERVICE_URL", "http://127.0.0.1:5004")
+VIDEO_CACHE_DIR = os.environ.get("VIDEO_CACHE_DIR", "video_cache")
+VIDEO_CACHE_MAX_BYTES = int(os.environ.get("VIDEO_CACHE_MAX_BYTES", 4 * 1024**3))
+VIDEO_CACHE_REVALIDATE = float(os.environ.get("VIDEO_CACHE_REVALIDATE", 10 * 60))
+# e.g. "/_highlight_videos/", an nginx location with "internal" and an alias
+# to VIDEO_CACHE_DIR
+VIDEO_ACCEL_REDIRECT = os.environ.get("VIDEO_ACCEL_REDIRECT", "")
+
+VIDEO_TIMEOUT = 300
+CONNECT_TIMEOUT = 5
+CHUNK_SIZE = 256 * 1024
+MAX_DOWNLOADS = 2  # concurrent background downloads per worker
+STALLED_DOWNLOAD = 120  # seconds without progress before a .part file is taken over
+TOUCH_INTERVAL = 60  # how often a hit refreshes a video's LRU position
+
+# Headers of the upstream video response kept with the cached file
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Content-Length")
+
+CachedVideo = namedtuple("CachedVideo", ["path", "headers", "validated_at"])
+
+
+class HighlightVideoCache:
+    """Highlight MP4s on disk, shared by the workers and bounded in size."""
+
+    def __init__(
+        self,
+        directory=VIDEO_CACHE_DIR,
+        max_bytes=VIDEO_CACHE_MAX_BYTES,
+        revalidate=VIDEO_CACHE_REVALIDATE,
+    ):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.revalidate = revalidate
+        self.upstream = pooled_session()
+        self._lock = threading.Lock()
+        self._downloading = set()
+        self._revalidating = set()
+        self._download_slots = threading.BoundedSemaphore(MAX_DOWNLOADS)
+        self.hits = 0
+        self.misses = 0
+        self.downloads = 0
+        self.evictions = 0
+
+    def video_url(self, game_id):
+        return f"{VIDEO_SERVICE_BASE}/api/highlights/{game_id}/video"
+
+    def lookup(self, game_id):
+        """The CachedVideo for a game, or None (and a download is started)."""
+        video = self._read(game_id)
+        if video is not None and time.time() - video.validated_at > self.revalidate:
+            # Keep serving the copy; a slow video service must not stall it
+            self._revalidate_in_background(game_id, video)
+        if video is None:
+            self.misses += 1
+            self._download_in_background(game_id)
+            return None
+        self.hits += 1
+        # The metadata file's mtime is the LRU position; touching the video
+        # would change the ETag browsers send back in If-Range
+        self._touch(self._paths(game_id)[1])
+        return video
+
+    def response(self, video, download_name=None):
+        """Serve a cached video, through nginx when it is configured to."""
+        mimetype = video.headers.get("Content-Type", "video/mp4")
+        if VIDEO_ACCEL_REDIRECT:
+            response = Response(mimetype=mimetype)
+            response.headers["X-Accel-Redirect"] = (
+                f"{VIDEO_ACCEL_REDIRECT}{os.path.basename(video.path)}"
+            )
+            if download_name:
+                response.headers["Content-Disposition"] = (
+                    f'attachment; filename="{download_name}"'
+                )
+            return response
+        return send_file(
+            video.path,
+            mimetype=mimetype,
+            as_attachment=bool(download_name),
+            download_name=download_name,
+            conditional=True,
+        )
+
+    def stats(self):
+        """Return counters for the debug endpoint."""
+        videos = glob.glob(os.path.join(self.directory, "*.mp4"))
+        return {
+            "videos": len(videos),
+            "bytes": sum(self._size(path) for path in videos),
+            "hits": self.hits,
+            "misses": self.misses,
+            "downloads": self.downloads,
+            "evictions": self.evictions,
+            "downloading": sorted(self._downloading),
+            "revalidating": sorted(self._revalidating),
+            "accel_redirect": bool(VIDEO_ACCEL_REDIRECT),
+        }
+
+    # Files
+
+    def _paths(self, game_id):
+        base = os.path.join(self.directory, str(int(game_id)))
+        return f"{base}.mp4", f"{base}.json"
+
+    def _read(self, game_id):
+        video_path, meta_path = self._paths(game_id)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(video_path):
+            return None
+        return CachedVideo(video_path, meta["headers"], meta["validated_at"])
+
+    def _write_meta(self, game_id, headers):
+        _, meta_path = self._paths(game_id)
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"headers": headers, "validated_at": time.time()}, f)
+        os.replace(tmp_path, meta_path)
+
+    def _remove(self, game_id):
+        for path in self._paths(game_id):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _touch(path):
+        try:
+            if time.time() - os.path.getmtime(path) > TOUCH_INTERVAL:
+                os.utime(path)
+        except OSError:
+            pass
+
+    # Upstream
+
+    def _revalidate(self, game_id, video):
+        """The video if upstream still serves the same file, else None."""
+        try:
+            resp = self.upstream.head(
+                self.video_url(game_id), timeout=(CONNECT_TIMEOUT, 30)
+            )
+        except requests.exceptions.RequestException as e:
+            # Keep serving the copy while the video service is unreachable
+            logger.warning(f"Could not revalidate highlights for game {game_id}: {e}")
+            return video
+        headers = {h: resp.headers[h] for h in CACHED_HEADERS if h in resp.headers}
+        if resp.status_code != 200 or any(
+            headers.get(h) != video.headers.get(h)
+            for h in ("ETag", "Last-Modified", "Content-Length")
+        ):
+            logger.info(f"Highlights for game {game_id} changed upstream, dropping copy")
+            self._remove(game_id)
+            return None
+        self._write_meta(game_id, video.headers)
+        return video._replace(validated_at=time.time())
+
+    def _revalidate_in_background(self, game_id, video):
+        self._in_background(
+            self._revalidating,
+            game_id,
+            lambda: self._revalidate(game_id, video),
+            "video-revalidate",
+        )
+
+    def _download_in_background(self, game_id):
+        def download():
+            with self._download_slots:
+                self._download(game_id)
+
+        self._in_background(self._downloading, game_id, download, "video-download")
+
+    def _in_background(self, pending, game_id, target, name):
+        """Run target in a thread unless one is already running for the game."""
+        with self._lock:
+            if game_id in pending:
+                return
+            pending.add(game_id)
+
+        def run():
+            try:
+                target()
+            except Exception as e:
+                logger.error(f"{name} failed for game {game_id}: {e}")
+            finally:
+                with self._lock:
+                    pending.discard(game_id)
+
+        threading.Thread(target=run, name=name, daemon=True).start()
+
+    @staticmethod
+    def _open_part(part_path):
+        """An fd for a new .part file, or None while another writer holds it."""
+        # The .part file is the download lock across workers
+        for _ in range(3):
+            try:
+                return os.open(part_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                pass
+            try:
+                if time.time() - os.path.getmtime(part_path) < STALLED_DOWNLOAD:
+                    return None
+                os.remove(part_path)
+            except FileNotFoundError:
+                # The holder just finished or gave up
+                pass
+        return None
+
+    @staticmethod
+    def _owns(part_path, owned):
+        """Whether part_path is still the file we created (not a takeover)."""
+        try:
+            st = os.stat(part_path)
+        except OSError:
+            return False
+        return (st.st_dev, st.st_ino) == owned
+
+    def _download(self, game_id):
+        os.makedirs(self.directory, exist_ok=True)
+        video_path, _ = self._paths(game_id)
+        part_path = f"{video_path}.part"
+        fd = self._open_part(part_path)
+        if fd is None:
+            return
+        st = os.fstat(fd)
+        owned = (st.st_dev, st.st_ino)
+
+        started = time.monotonic()
+        limit = self.max_bytes // 4
+        try:
+            with os.fdopen(fd, "wb") as f, self.upstream.get(
+                self.video_url(game_id),
+                stream=True,
+                timeout=(CONNECT_TIMEOUT, VIDEO_TIMEOUT),
+            ) as resp:
+                if resp.status_code != 200:
+                    return
+                length = int(resp.headers.get("Content-Length") or 0)
+                if length > limit:
+                    return
+                if length:
+                    self._make_room(length)
+                received = 0
+                # Upstream may not send a length, or send more than it said
+                for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                    received += len(chunk)
+                    if received > (length or limit):
+                        logger.warning(
+                            f"Highlights for game {game_id} exceed "
+                            f"{length or limit} bytes, not caching"
+                        )
+                        return
+                    f.write(chunk)
+                headers = {
+                    h: resp.headers[h] for h in CACHED_HEADERS if h in resp.headers
+                }
+            if length and received != length:
+                logger.warning(f"Incomplete highlights download for game {game_id}")
+                return
+            if not length:
+                self._make_room(received)
+            # A stalled download may have been taken over by another writer,
+            # in which case the path is no longer ours to publish or remove
+            if not self._owns(part_path, owned):
+                logger.warning(f"Highlights download for game {game_id} was taken over")
+                return
+            # Metadata first: a video file without it is never served
+            self._write_meta(game_id, headers)
+            os.replace(part_path, video_path)
+            self.downloads += 1
+            elapsed = time.monotonic() - started
+            logger.info(f"Cached highlights for game {game_id} in {elapsed:.1f} s")
+        finally:
+            if self._owns(part_path, owned):
+                try:
+                    os.remove(part_path)
+                except OSError:
+                    pass
+
+    def _make_room(self, needed):
+        """Remove the least recently watched videos until `needed` bytes fit."""
+        videos = sorted(
+            glob.glob(os.path.join(self.directory, "*.mp4")),
+            key=lambda path: self._mtime(f"{path[: -len('.mp4')]}.json"),
+        )
+        total = sum(self._size(path) for path in videos)
+        for path in videos:
+            if total + needed <= self.max_bytes:
+                break
+            total -= self._size(path)
+            self._remove(os.path.basename(path)[: -len(".mp4")])
+            self.evictions += 1
+
+
+highlight_videos = HighlightVideoCache()